@@ -1,8 +1,8 @@
 from fastapi import FastAPI, HTTPException, Query, Depends, APIRouter, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import pandas as pd
 import sqlite3
 import json
@@ -11,10 +11,11 @@ import os
 from contextlib import contextmanager
 import logging
 import time
+import config
 
 # Importar módulos do projeto original
-from src.database.queries import get_dashboard_stats, unified_search_people, search_by_designation, search_by_id_vivo, search_by_address, search_by_ggl_gr
-from src.database.connection import get_connection, get_tables, load_table, insert_row, update_row, delete_row, get_primary_key_column
+from src.database.queries import get_dashboard_stats, unified_search_people, unified_search_people_many, search_by_designation, search_by_id_vivo, search_by_address, search_by_ggl_gr, suggest_stores
+from src.database.connection import get_connection, get_read_connection, get_tables, load_table, load_table_page, export_table, insert_row, update_row, delete_row, get_primary_key_column, get_pool_stats, count_rows, bulk_write, ensure_indexes, get_index_report
 from src.editor.operations import (
     get_lojas, get_circuitos, get_inventario,
     create_loja, update_loja, delete_loja,
@@ -22,6 +23,11 @@ from src.editor.operations import (
     create_inventario_item, update_inventario_item, delete_inventario_item
 )
 from src.editor.audit import log_change, get_audit_log
+from src.database.pagination import InvalidCursorError
+from src.database.executor import run_export, run_read, run_write, get_executor_stats
+from src.database.timeouts import QueryInterruptedError, query_deadline, disconnect_waiter
+from src.database.query_log import get_query_log
+from src.database.metrics import get_registry, metrics_enabled, record_request, track_request
 from src.cache.memory_cache import get_cache, set_cache, clear_cache, get_cache_stats
 
 app = FastAPI(
@@ -43,8 +49,14 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request, call_next):
     start_time = time.time()
-    response = await call_next(request)
+    with track_request() as sql_counter:
+        response = await call_next(request)
     process_time = (time.time() - start_time) * 1000  # ms
+    # Template da rota (ex: /api/lojas/{loja_id}) para não multiplicar as séries
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    if record_request(route, process_time / 1000, sql_counter):
+        logging.warning(f"[SQL] {request.method} {request.url.path} executou {sql_counter.statements} statements "
+                        f"({sql_counter.rows} linhas, {sql_counter.seconds * 1000:.1f}ms em SQL)")
     log_params = {
         "method": request.method,
         "path": request.url.path,
@@ -55,6 +67,36 @@ async def log_requests(request, call_next):
     logging.info(f"[API] {log_params['method']} {log_params['path']} - {log_params['status_code']} - {log_params['process_time_ms']}ms @ {log_params['timestamp']}")
     return response
 
+# Middleware de cancelamento: consultas em andamento são interrompidas se o cliente desconectar
+class QueryCancellationMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def wait_for_disconnect():
+            # Só é aguardado durante consultas, quando o corpo da requisição já foi lido
+            while (await receive())["type"] != "http.disconnect":
+                pass
+        
+        with disconnect_waiter(wait_for_disconnect):
+            await self.app(scope, receive, send)
+
+app.add_middleware(QueryCancellationMiddleware)
+
+# Índices das chaves de junção e filtros (idempotente)
+@app.on_event("startup")
+def apply_index_registry():
+    try:
+        result = ensure_indexes()
+        if result['created']:
+            logging.info(f"[DB] Índices criados: {', '.join(result['created'])}")
+    except Exception as e:
+        logging.warning(f"[DB] Não foi possível aplicar os índices: {e}")
+
 # Modelos Pydantic para validação
 class LojaCreate(BaseModel):
     nome: str
@@ -122,6 +164,18 @@ class PaginatedResponse(BaseModel):
 class SQLRequest(BaseModel):
     query: str
 
+class BulkUpdateItem(BaseModel):
+    id: Any
+    data: Dict[str, Any]
+
+class BulkWriteRequest(BaseModel):
+    insert: List[Dict[str, Any]] = []
+    update: List[BulkUpdateItem] = []
+    delete: List[Any] = []
+
+class PeopleBatchRequest(BaseModel):
+    codes: List[str]
+
 # Modelos para Templates
 class TemplateCreate(BaseModel):
     tipo: str  # 'informativo' ou 'alerta'
@@ -144,41 +198,46 @@ async def health_check():
 @app.get("/api/dashboard/stats", response_model=ApiResponse)
 async def get_dashboard_statistics():
     try:
-        stats = get_dashboard_stats()
+        stats = await run_read(get_dashboard_stats)
         return ApiResponse(success=True, data=stats)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Lojas
+def _count_lojas(status: Optional[str], uf: Optional[str], search: Optional[str]) -> Tuple[int, bool]:
+    where = "WHERE 1=1"
+    params = []
+    if status:
+        where += " AND status = ?"
+        params.append(status)
+    if uf:
+        where += " AND uf = ?"
+        params.append(uf)
+    if search:
+        where += " AND (nome LIKE ? OR endereco LIKE ?)"
+        params.extend([f"%{search}%", f"%{search}%"])
+    
+    return count_rows("lojas", where, params)
+
 @app.get("/api/lojas", response_model=PaginatedResponse)
 async def get_lojas_api(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = None,
     uf: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    include_total: bool = True
 ):
     try:
         offset = (page - 1) * limit
-        lojas = get_lojas(limit=limit, offset=offset, status=status, uf=uf, search=search)
+        lojas = await run_read(get_lojas, limit=limit, offset=offset, status=status, uf=uf, search=search)
         
-        # Contar total para paginação
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            count_query = "SELECT COUNT(*) FROM lojas WHERE 1=1"
-            params = []
-            if status:
-                count_query += " AND status = ?"
-                params.append(status)
-            if uf:
-                count_query += " AND uf = ?"
-                params.append(uf)
-            if search:
-                count_query += " AND (nome LIKE ? OR endereco LIKE ?)"
-                params.extend([f"%{search}%", f"%{search}%"])
-            
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
+        # Contar total para paginação (em cache; estimado em tabelas grandes)
+        total = total_exact = None
+        if include_total:
+            total, total_exact = await run_read(_count_lojas, status, uf, search)
         
         return PaginatedResponse(
             success=True,
@@ -187,86 +246,103 @@ async def get_lojas_api(
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit
+                "total_exact": total_exact,
+                "pages": (total + limit - 1) // limit if total is not None else None
             }
         )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _fetch_loja(loja_id: int) -> Optional[Dict[str, Any]]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
+        loja = cursor.fetchone()
+        if not loja:
+            return None
+        columns = [description[0] for description in cursor.description]
+        return dict(zip(columns, loja))
+
 @app.get("/api/lojas/{loja_id}", response_model=ApiResponse)
 async def get_loja_by_id(loja_id: int):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
-            loja = cursor.fetchone()
-            
-            if not loja:
-                raise HTTPException(status_code=404, detail="Loja não encontrada")
-            
-            columns = [description[0] for description in cursor.description]
-            loja_dict = dict(zip(columns, loja))
-            
-            return ApiResponse(success=True, data=loja_dict)
+        loja_dict = await run_read(_fetch_loja, loja_id)
+        if not loja_dict:
+            raise HTTPException(status_code=404, detail="Loja não encontrada")
+        
+        return ApiResponse(success=True, data=loja_dict)
     except HTTPException:
         raise
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/lojas", response_model=ApiResponse)
 async def create_loja_api(loja: LojaCreate):
     try:
-        new_loja = create_loja(loja.dict())
+        new_loja = await run_write(create_loja, loja.dict())
         return ApiResponse(success=True, data=new_loja, message="Loja criada com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/lojas/{loja_id}", response_model=ApiResponse)
 async def update_loja_api(loja_id: int, loja: LojaUpdate):
     try:
-        updated_loja = update_loja(loja_id, loja.dict(exclude_unset=True))
+        updated_loja = await run_write(update_loja, loja_id, loja.dict(exclude_unset=True))
         return ApiResponse(success=True, data=updated_loja, message="Loja atualizada com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/lojas/{loja_id}")
 async def delete_loja_api(loja_id: int):
     try:
-        delete_loja(loja_id)
+        await run_write(delete_loja, loja_id)
         return ApiResponse(success=True, message="Loja excluída com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Circuitos
+def _count_circuitos(operadora: Optional[str], status: Optional[str], search: Optional[str]) -> Tuple[int, bool]:
+    where = "WHERE 1=1"
+    params = []
+    if operadora:
+        where += " AND operadora = ?"
+        params.append(operadora)
+    if status:
+        where += " AND status = ?"
+        params.append(status)
+    if search:
+        where += " AND (designacao LIKE ? OR operadora LIKE ?)"
+        params.extend([f"%{search}%", f"%{search}%"])
+    
+    return count_rows("circuitos", where, params)
+
 @app.get("/api/circuitos", response_model=PaginatedResponse)
 async def get_circuitos_api(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     operadora: Optional[str] = None,
     status: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    include_total: bool = True
 ):
     try:
         offset = (page - 1) * limit
-        circuitos = get_circuitos(limit=limit, offset=offset, operadora=operadora, status=status, search=search)
+        circuitos = await run_read(get_circuitos, limit=limit, offset=offset, operadora=operadora, status=status, search=search)
         
-        # Contar total para paginação
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            count_query = "SELECT COUNT(*) FROM circuitos WHERE 1=1"
-            params = []
-            if operadora:
-                count_query += " AND operadora = ?"
-                params.append(operadora)
-            if status:
-                count_query += " AND status = ?"
-                params.append(status)
-            if search:
-                count_query += " AND (designacao LIKE ? OR operadora LIKE ?)"
-                params.extend([f"%{search}%", f"%{search}%"])
-            
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
+        # Contar total para paginação (em cache; estimado em tabelas grandes)
+        total = total_exact = None
+        if include_total:
+            total, total_exact = await run_read(_count_circuitos, operadora, status, search)
         
         return PaginatedResponse(
             success=True,
@@ -275,62 +351,74 @@ async def get_circuitos_api(
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit
+                "total_exact": total_exact,
+                "pages": (total + limit - 1) // limit if total is not None else None
             }
         )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/circuitos", response_model=ApiResponse)
 async def create_circuito_api(circuito: CircuitoCreate):
     try:
-        new_circuito = create_circuito(circuito.dict())
+        new_circuito = await run_write(create_circuito, circuito.dict())
         return ApiResponse(success=True, data=new_circuito, message="Circuito criado com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/circuitos/{circuito_id}", response_model=ApiResponse)
 async def update_circuito_api(circuito_id: int, circuito: CircuitoUpdate):
     try:
-        updated_circuito = update_circuito(circuito_id, circuito.dict(exclude_unset=True))
+        updated_circuito = await run_write(update_circuito, circuito_id, circuito.dict(exclude_unset=True))
         return ApiResponse(success=True, data=updated_circuito, message="Circuito atualizado com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/circuitos/{circuito_id}")
 async def delete_circuito_api(circuito_id: int):
     try:
-        delete_circuito(circuito_id)
+        await run_write(delete_circuito, circuito_id)
         return ApiResponse(success=True, message="Circuito excluído com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Inventário
+def _count_inventario(status: Optional[str], search: Optional[str]) -> Tuple[int, bool]:
+    where = "WHERE 1=1"
+    params = []
+    if status:
+        where += " AND status = ?"
+        params.append(status)
+    if search:
+        where += " AND (equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?)"
+        params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
+    
+    return count_rows("inventario", where, params)
+
 @app.get("/api/inventario", response_model=PaginatedResponse)
 async def get_inventario_api(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    include_total: bool = True
 ):
     try:
         offset = (page - 1) * limit
-        inventario = get_inventario(limit=limit, offset=offset, status=status, search=search)
+        inventario = await run_read(get_inventario, limit=limit, offset=offset, status=status, search=search)
         
-        # Contar total para paginação
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            count_query = "SELECT COUNT(*) FROM inventario WHERE 1=1"
-            params = []
-            if status:
-                count_query += " AND status = ?"
-                params.append(status)
-            if search:
-                count_query += " AND (equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?)"
-                params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
-            
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
+        # Contar total para paginação (em cache; estimado em tabelas grandes)
+        total = total_exact = None
+        if include_total:
+            total, total_exact = await run_read(_count_inventario, status, search)
         
         return PaginatedResponse(
             success=True,
@@ -339,78 +427,100 @@ async def get_inventario_api(
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit
+                "total_exact": total_exact,
+                "pages": (total + limit - 1) // limit if total is not None else None
             }
         )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/inventario", response_model=ApiResponse)
 async def create_inventario_api(item: InventarioCreate):
     try:
-        new_item = create_inventario_item(item.dict())
+        new_item = await run_write(create_inventario_item, item.dict())
         return ApiResponse(success=True, data=new_item, message="Item de inventário criado com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/inventario/{item_id}", response_model=ApiResponse)
 async def update_inventario_api(item_id: int, item: InventarioUpdate):
     try:
-        updated_item = update_inventario_item(item_id, item.dict(exclude_unset=True))
+        updated_item = await run_write(update_inventario_item, item_id, item.dict(exclude_unset=True))
         return ApiResponse(success=True, data=updated_item, message="Item de inventário atualizado com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/inventario/{item_id}")
 async def delete_inventario_api(item_id: int):
     try:
-        delete_inventario_item(item_id)
+        await run_write(delete_inventario_item, item_id)
         return ApiResponse(success=True, message="Item de inventário excluído com sucesso")
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Busca Unificada
+def _unified_search(q: str) -> Dict[str, Any]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Buscar em lojas
+        cursor.execute("""
+            SELECT 'loja' as tipo, id, nome as titulo, endereco as descricao, status
+            FROM lojas 
+            WHERE nome LIKE ? OR endereco LIKE ? OR people_code LIKE ? OR peop_code LIKE ?
+        """, (f"%{q}%", f"%{q}%", f"%{q}%", f"%{q}%"))
+        lojas = cursor.fetchall()
+        
+        # Buscar em circuitos
+        cursor.execute("""
+            SELECT 'circuito' as tipo, id, designacao as titulo, operadora as descricao, status
+            FROM circuitos 
+            WHERE designacao LIKE ? OR operadora LIKE ?
+        """, (f"%{q}%", f"%{q}%"))
+        circuitos = cursor.fetchall()
+        
+        # Buscar em inventário
+        cursor.execute("""
+            SELECT 'inventario' as tipo, id, equipamento as titulo, modelo as descricao, status
+            FROM inventario 
+            WHERE equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?
+        """, (f"%{q}%", f"%{q}%", f"%{q}%"))
+        inventario = cursor.fetchall()
+        
+        results = {
+            "lojas": [{"id": l[1], "titulo": l[2], "descricao": l[3], "status": l[4]} for l in lojas],
+            "circuitos": [{"id": c[1], "titulo": c[2], "descricao": c[3], "status": c[4]} for c in circuitos],
+            "inventario": [{"id": i[1], "titulo": i[2], "descricao": i[3], "status": i[4]} for i in inventario]
+        }
+        
+        return results
+
 @app.get("/api/search/unified", response_model=ApiResponse)
 async def unified_search_api(q: str = Query(..., min_length=1)):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Buscar em lojas
-            cursor.execute("""
-                SELECT 'loja' as tipo, id, nome as titulo, endereco as descricao, status
-                FROM lojas 
-                WHERE nome LIKE ? OR endereco LIKE ? OR people_code LIKE ? OR peop_code LIKE ?
-            """, (f"%{q}%", f"%{q}%", f"%{q}%", f"%{q}%"))
-            lojas = cursor.fetchall()
-            
-            # Buscar em circuitos
-            cursor.execute("""
-                SELECT 'circuito' as tipo, id, designacao as titulo, operadora as descricao, status
-                FROM circuitos 
-                WHERE designacao LIKE ? OR operadora LIKE ?
-            """, (f"%{q}%", f"%{q}%"))
-            circuitos = cursor.fetchall()
-            
-            # Buscar em inventário
-            cursor.execute("""
-                SELECT 'inventario' as tipo, id, equipamento as titulo, modelo as descricao, status
-                FROM inventario 
-                WHERE equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?
-            """, (f"%{q}%", f"%{q}%", f"%{q}%"))
-            inventario = cursor.fetchall()
-            
-            results = {
-                "lojas": [{"id": l[1], "titulo": l[2], "descricao": l[3], "status": l[4]} for l in lojas],
-                "circuitos": [{"id": c[1], "titulo": c[2], "descricao": c[3], "status": c[4]} for c in circuitos],
-                "inventario": [{"id": i[1], "titulo": i[2], "descricao": i[3], "status": i[4]} for i in inventario]
-            }
-            
-            return ApiResponse(success=True, data=results)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            results = await run_read(_unified_search, q)
+        return ApiResponse(success=True, data=results)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Auditoria
+def _count_audit_logs() -> int:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM audit_log")
+        return cursor.fetchone()[0]
+
 @app.get("/api/audit/logs", response_model=PaginatedResponse)
 async def get_audit_logs_api(
     page: int = Query(1, ge=1),
@@ -418,12 +528,9 @@ async def get_audit_logs_api(
 ):
     try:
         print("INICIANDO AUDITORIA")
-        logs = get_audit_log(limit=limit)
+        logs = await run_read(get_audit_log, limit=limit)
         print("LOGS LIDOS:", logs)
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM audit_log")
-            total = cursor.fetchone()[0]
+        total = await run_read(_count_audit_logs)
         print("TOTAL:", total)
         return PaginatedResponse(
             success=True,
@@ -435,6 +542,8 @@ async def get_audit_logs_api(
                 "pages": (total + limit - 1) // limit
             }
         )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         import traceback
         print("ERRO AO BUSCAR LOGS DE AUDITORIA:")
@@ -445,7 +554,8 @@ async def get_audit_logs_api(
 @app.get("/api/cache/stats", response_model=ApiResponse)
 async def get_cache_stats_api():
     try:
-        stats = get_cache_stats()
+        # Com CACHE_BACKEND=sqlite as estatísticas leem o arquivo do cache
+        stats = await run_read(get_cache_stats)
         return ApiResponse(success=True, data=stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -453,40 +563,86 @@ async def get_cache_stats_api():
 @app.post("/api/cache/clear")
 async def clear_cache_api():
     try:
-        clear_cache()
+        await run_write(clear_cache)
         return ApiResponse(success=True, message="Cache limpo com sucesso")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Diagnóstico
+@app.get("/api/diagnostics/pool", response_model=ApiResponse)
+async def get_pool_stats_api():
+    try:
+        stats = {
+            "read_write": await run_read(get_pool_stats),
+            "read_only": await run_read(get_pool_stats, read_only=True)
+        }
+        return ApiResponse(success=True, data=stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/diagnostics/executors", response_model=ApiResponse)
+async def get_executor_stats_api():
+    try:
+        stats = get_executor_stats()
+        return ApiResponse(success=True, data=stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_api():
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    return PlainTextResponse(get_registry().render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/diagnostics/indexes", response_model=ApiResponse)
+async def get_indexes_api():
+    try:
+        report = await run_read(get_index_report)
+        return ApiResponse(success=True, data=report)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/diagnostics/slow-queries", response_model=ApiResponse)
+async def get_slow_queries_api(limit: int = Query(50, ge=1, le=500)):
+    try:
+        query_log = get_query_log()
+        data = {
+            "threshold_ms": config.PERFORMANCE_CONFIG["slow_query_threshold_ms"],
+            "slow_queries": query_log.get_slow_queries(limit),
+            "top_queries": query_log.get_top_queries(limit)
+        }
+        return ApiResponse(success=True, data=data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Export
+def _export_table(table: str, format: str) -> tuple:
+    extension = "csv" if format == "csv" else "xlsx"
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    filepath = f"temp/{filename}"
+    os.makedirs("temp", exist_ok=True)
+    # Exportação em blocos: a memória não cresce com o tamanho da tabela
+    export_table(table, filepath, format)
+    return filepath, filename
+
 @app.get("/api/export/{table}")
 async def export_data_api(table: str, format: str = Query("csv", regex="^(csv|excel)$")):
     try:
-        with get_connection() as conn:
-            if table not in ["lojas", "circuitos", "inventario"]:
-                raise HTTPException(status_code=400, detail="Tabela inválida")
-            
-            df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-            
-            if format == "csv":
-                filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                filepath = f"temp/{filename}"
-                os.makedirs("temp", exist_ok=True)
-                df.to_csv(filepath, index=False)
-                return FileResponse(filepath, filename=filename)
-            else:
-                filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                filepath = f"temp/{filename}"
-                os.makedirs("temp", exist_ok=True)
-                df.to_excel(filepath, index=False)
-                return FileResponse(filepath, filename=filename)
+        if table not in ["lojas", "circuitos", "inventario"]:
+            raise HTTPException(status_code=400, detail="Tabela inválida")
+        
+        filepath, filename = await run_export(_export_table, table, format)
+        return FileResponse(filepath, filename=filename)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search/people", response_model=ApiResponse)
 async def search_people_api(code: str = Query(..., min_length=1)):
     try:
-        df = unified_search_people(code)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            df = await run_read(unified_search_people, code)
         # Transformar DataFrame em SearchResult (lojas, circuitos, inventario)
         # Para simplificar, vamos colocar tudo em 'lojas' (ajuste conforme necessário)
         lojas = df.to_dict(orient="records")
@@ -496,110 +652,95 @@ async def search_people_api(code: str = Query(..., min_length=1)):
             "inventario": []
         }
         return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/search/people/batch", response_model=ApiResponse)
+async def search_people_batch_api(request: PeopleBatchRequest):
+    max_codes = config.SEARCH_CONFIG["max_batch_codes"]
+    if len(request.codes) > max_codes:
+        raise HTTPException(status_code=400, detail=f"Máximo de {max_codes} códigos por busca")
+    try:
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            results, not_found = await run_read(unified_search_people_many, request.codes)
+        data = {
+            "results": {
+                code: {"lojas": df.to_dict(orient="records"), "circuitos": [], "inventario": []}
+                for code, df in results.items()
+            },
+            "not_found": not_found
+        }
+        return ApiResponse(success=True, data=data)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _search_designation(designation: str) -> Dict[str, Any]:
+    df = search_by_designation(designation)
+    circuitos = []
+    lojas = []
+    lojas_ids = set()
+    for idx, row in df.iterrows():
+        logging.warning(f"Linha {idx}: {row.to_dict()}")
+        loja_id = (
+            row.get("CODIGO") or row.get("CÓDIGO") or row.get("Codigo") or row.get("codigo") or
+            row.get("codigo_loja") or row.get("id") or row.get("ID") or row.get("id_loja")
+        )
+        circuito = {
+            "designacao": row.get("Circuito_Designação") or row.get("Novo_Circuito_Designação"),
+            "operadora": row.get("Operadora"),
+            "tipo": row.get("Tipo", ""),
+            "status": row.get("Status_Loja", "")
+        }
+        circuitos.append(circuito)
+        if loja_id and loja_id not in lojas_ids:
+            loja = {
+                "LOJAS": row.get("LOJAS", ""),
+                "CODIGO": row.get("CODIGO", ""),
+                "Status_Loja": row.get("Status_Loja", "") or row.get("STATUS", ""),
+                "ENDEREÇO": row.get("ENDEREÇO", ""),
+                "BAIRRO": row.get("BAIRRO", ""),
+                "CIDADE": row.get("CIDADE", ""),
+                "UF": row.get("UF", ""),
+                "CEP": row.get("CEP", ""),
+                "TELEFONE1": row.get("TELEFONE1", ""),
+                "TELEFONE2": row.get("TELEFONE2", ""),
+                "CELULAR": row.get("CELULAR", ""),
+                "E_MAIL": row.get("E_MAIL", ""),
+                "VD NOVO": row.get("VD_NOVO", ""),
+                "People/PEOP": row.get("People/PEOP", ""),
+                "STATUS": row.get("Status_Loja", "") or row.get("STATUS", ""),
+                "NOME_GGL": row.get("NOME_GGL", ""),
+                "NOME_GR": row.get("NOME_GR", "")
+            }
+            lojas.append(loja)
+            lojas_ids.add(loja_id)
+    result = {
+        "lojas": lojas,
+        "circuitos": circuitos,
+        "inventario": []
+    }
+    return result
+
 @app.get("/api/search/designation", response_model=ApiResponse)
 async def search_designation_api(designation: str = Query(..., min_length=1)):
     try:
-        df = search_by_designation(designation)
-        circuitos = []
-        lojas = []
-        lojas_ids = set()
-        for idx, row in df.iterrows():
-            logging.warning(f"Linha {idx}: {row.to_dict()}")
-            loja_id = (
-                row.get("CODIGO") or row.get("CÓDIGO") or row.get("Codigo") or row.get("codigo") or
-                row.get("codigo_loja") or row.get("id") or row.get("ID") or row.get("id_loja")
-            )
-            # Fallback: se não houver dados da loja, buscar manualmente
-            loja_vazia = not (row.get("LOJAS") or row.get("ENDEREÇO") or row.get("CIDADE"))
-            loja_data = None
-            if loja_vazia and row.get("People/PEOP"):
-                # Buscar manualmente na tabela de lojas
-                with get_connection() as conn_fallback:
-                    cursor = conn_fallback.cursor()
-                    cursor.execute("SELECT LOJAS, CODIGO, ENDEREÇO, CIDADE, UF, STATUS, PEOP, NOME_GGL, NOME_GR FROM lojas_lojas WHERE PEOP = ?", (row.get("People/PEOP"),))
-                    loja_row = cursor.fetchone()
-                    if loja_row:
-                        loja_data = {
-                            "id": loja_row[1],
-                            "nome": loja_row[0],
-                            "endereco": loja_row[2],
-                            "cidade": loja_row[3],
-                            "uf": loja_row[4],
-                            "status": loja_row[5],
-                            "people_code": loja_row[6],
-                            "peop_code": loja_row[6],
-                            "ggl": loja_row[7],
-                            "gr": loja_row[8]
-                        }
-                        loja_id = loja_row[1]
-            circuito = {
-                "designacao": row.get("Circuito_Designação") or row.get("Novo_Circuito_Designação"),
-                "operadora": row.get("Operadora"),
-                "tipo": row.get("Tipo", ""),
-                "status": row.get("Status_Loja", "")
-            }
-            circuitos.append(circuito)
-            if loja_id and loja_id not in lojas_ids:
-                if loja_data:
-                    # Padronizar campos para o frontend
-                    loja = {
-                        "LOJAS": loja_data.get("LOJAS", ""),
-                        "CODIGO": loja_data.get("CODIGO", ""),
-                        "Status_Loja": loja_data.get("Status_Loja", "") or loja_data.get("STATUS", ""),
-                        "ENDEREÇO": loja_data.get("ENDEREÇO", ""),
-                        "BAIRRO": loja_data.get("BAIRRO", ""),
-                        "CIDADE": loja_data.get("CIDADE", ""),
-                        "UF": loja_data.get("UF", ""),
-                        "CEP": loja_data.get("CEP", ""),
-                        "TELEFONE1": loja_data.get("TELEFONE1", ""),
-                        "TELEFONE2": loja_data.get("TELEFONE2", ""),
-                        "CELULAR": loja_data.get("CELULAR", ""),
-                        "E_MAIL": loja_data.get("E_MAIL", ""),
-                        "VD NOVO": loja_data.get("VD NOVO", ""),
-                        "People/PEOP": loja_data.get("People/PEOP", ""),
-                        "STATUS": loja_data.get("Status_Loja", "") or loja_data.get("STATUS", ""),
-                        "NOME_GGL": loja_data.get("NOME_GGL", ""),
-                        "NOME_GR": loja_data.get("NOME_GR", "")
-                    }
-                    lojas.append(loja)
-                else:
-                    loja = {
-                        "LOJAS": row.get("LOJAS", ""),
-                        "CODIGO": row.get("CODIGO", ""),
-                        "Status_Loja": row.get("Status_Loja", "") or row.get("STATUS", ""),
-                        "ENDEREÇO": row.get("ENDEREÇO", ""),
-                        "BAIRRO": row.get("BAIRRO", ""),
-                        "CIDADE": row.get("CIDADE", ""),
-                        "UF": row.get("UF", ""),
-                        "CEP": row.get("CEP", ""),
-                        "TELEFONE1": row.get("TELEFONE1", ""),
-                        "TELEFONE2": row.get("TELEFONE2", ""),
-                        "CELULAR": row.get("CELULAR", ""),
-                        "E_MAIL": row.get("E_MAIL", ""),
-                        "VD NOVO": row.get("VD_NOVO", ""),
-                        "People/PEOP": row.get("People/PEOP", ""),
-                        "STATUS": row.get("Status_Loja", "") or row.get("STATUS", ""),
-                        "NOME_GGL": row.get("NOME_GGL", ""),
-                        "NOME_GR": row.get("NOME_GR", "")
-                    }
-                    lojas.append(loja)
-                lojas_ids.add(loja_id)
-        result = {
-            "lojas": lojas,
-            "circuitos": circuitos,
-            "inventario": []
-        }
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            result = await run_read(_search_designation, designation)
         return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search/address", response_model=ApiResponse)
 async def search_address_api(address: str = Query(..., min_length=1)):
     try:
-        df = search_by_address(address)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            df = await run_read(search_by_address, address)
         lojas = df.to_dict(orient="records")
         result = {
             "lojas": lojas,
@@ -607,87 +748,66 @@ async def search_address_api(address: str = Query(..., min_length=1)):
             "inventario": []
         }
         return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _search_id_vivo(id_vivo: str) -> Dict[str, Any]:
+    df = search_by_id_vivo(id_vivo)
+    lojas = []
+    lojas_ids = set()
+    for idx, row in df.iterrows():
+        logging.warning(f"Linha {idx}: {row.to_dict()}")
+        loja_id = (
+            row.get("CODIGO") or row.get("CÓDIGO") or row.get("Codigo") or row.get("codigo") or
+            row.get("codigo_loja") or row.get("id") or row.get("ID") or row.get("id_loja")
+        )
+        if loja_id and loja_id not in lojas_ids:
+            loja = {
+                "LOJAS": row.get("LOJAS", ""),
+                "CODIGO": row.get("CODIGO", ""),
+                "ENDEREÇO": row.get("ENDEREÇO", ""),
+                "BAIRRO": row.get("BAIRRO", ""),
+                "CIDADE": row.get("CIDADE", ""),
+                "UF": row.get("UF", ""),
+                "CEP": row.get("CEP", ""),
+                "TELEFONE1": row.get("TELEFONE1", ""),
+                "TELEFONE2": row.get("TELEFONE2", ""),
+                "CELULAR": row.get("CELULAR", ""),
+                "E_MAIL": row.get("E_MAIL", ""),
+                "Status_Loja": row.get("Status_Loja", "") or row.get("STATUS", ""),
+                "People/PEOP": row.get("People/PEOP", ""),
+                "NOME_GGL": row.get("NOME_GGL", ""),
+                "NOME_GR": row.get("NOME_GR", ""),
+                "VD NOVO": row.get("VD_NOVO", ""),
+                "STATUS": row.get("Status_Loja", "") or row.get("STATUS", "")
+            }
+            lojas.append(loja)
+            lojas_ids.add(loja_id)
+    result = {
+        "lojas": lojas,
+        "circuitos": [],
+        "inventario": []
+    }
+    return result
+
 @app.get("/api/search/id-vivo", response_model=ApiResponse)
 async def search_id_vivo_api(id_vivo: str = Query(..., min_length=1)):
     try:
-        df = search_by_id_vivo(id_vivo)
-        lojas = []
-        lojas_ids = set()
-        for idx, row in df.iterrows():
-            logging.warning(f"Linha {idx}: {row.to_dict()}")
-            loja_id = (
-                row.get("CODIGO") or row.get("CÓDIGO") or row.get("Codigo") or row.get("codigo") or
-                row.get("codigo_loja") or row.get("id") or row.get("ID") or row.get("id_loja")
-            )
-            loja_vazia = not (row.get("LOJAS") or row.get("ENDEREÇO") or row.get("CIDADE"))
-            loja_data = None
-            if loja_vazia and row.get("People/PEOP"):
-                with get_connection() as conn_fallback:
-                    cursor = conn_fallback.cursor()
-                    cursor.execute("SELECT LOJAS, CODIGO, ENDEREÇO, BAIRRO, CIDADE, UF, CEP, TELEFONE1, TELEFONE2, CELULAR, E_MAIL, STATUS, PEOP, NOME_GGL, NOME_GR, VD_NOVO FROM lojas_lojas WHERE PEOP = ?", (row.get("People/PEOP"),))
-                    loja_row = cursor.fetchone()
-                    if loja_row:
-                        loja_data = {
-                            "LOJAS": loja_row[0],
-                            "CODIGO": loja_row[1],
-                            "ENDEREÇO": loja_row[2],
-                            "BAIRRO": loja_row[3],
-                            "CIDADE": loja_row[4],
-                            "UF": loja_row[5],
-                            "CEP": loja_row[6],
-                            "TELEFONE1": loja_row[7],
-                            "TELEFONE2": loja_row[8],
-                            "CELULAR": loja_row[9],
-                            "E_MAIL": loja_row[10],
-                            "Status_Loja": row.get("Status_Loja", "") or loja_row[11],
-                            "People/PEOP": loja_row[12],
-                            "NOME_GGL": loja_row[13],
-                            "NOME_GR": loja_row[14],
-                            "VD NOVO": loja_row[15],
-                            "STATUS": row.get("Status_Loja", "") or loja_row[11]
-                        }
-                        loja_id = loja_row[1]
-            if loja_id and loja_id not in lojas_ids:
-                if loja_data:
-                    loja = loja_data
-                else:
-                    loja = {
-                        "LOJAS": row.get("LOJAS", ""),
-                        "CODIGO": row.get("CODIGO", ""),
-                        "ENDEREÇO": row.get("ENDEREÇO", ""),
-                        "BAIRRO": row.get("BAIRRO", ""),
-                        "CIDADE": row.get("CIDADE", ""),
-                        "UF": row.get("UF", ""),
-                        "CEP": row.get("CEP", ""),
-                        "TELEFONE1": row.get("TELEFONE1", ""),
-                        "TELEFONE2": row.get("TELEFONE2", ""),
-                        "CELULAR": row.get("CELULAR", ""),
-                        "E_MAIL": row.get("E_MAIL", ""),
-                        "Status_Loja": row.get("Status_Loja", "") or row.get("STATUS", ""),
-                        "People/PEOP": row.get("People/PEOP", ""),
-                        "NOME_GGL": row.get("NOME_GGL", ""),
-                        "NOME_GR": row.get("NOME_GR", ""),
-                        "VD NOVO": row.get("VD_NOVO", ""),
-                        "STATUS": row.get("Status_Loja", "") or row.get("STATUS", "")
-                    }
-                lojas.append(loja)
-                lojas_ids.add(loja_id)
-        result = {
-            "lojas": lojas,
-            "circuitos": [],
-            "inventario": []
-        }
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            result = await run_read(_search_id_vivo, id_vivo)
         return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search/ggl-gr", response_model=ApiResponse)
 async def search_ggl_gr_api(ggl_gr: str = Query(..., min_length=1)):
     try:
-        df = search_by_ggl_gr(ggl_gr)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            df = await run_read(search_by_ggl_gr, ggl_gr)
         # Transformar DataFrame em SearchResult
         lojas = df.to_dict(orient="records")
         result = {
@@ -696,74 +816,136 @@ async def search_ggl_gr_api(ggl_gr: str = Query(..., min_length=1)):
             "inventario": []
         }
         return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _search_lojas(q: str) -> List[Dict[str, Any]]:
+    keys = ("id", "codigo", "nome", "endereco", "cidade", "uf", "status")
+    return [{key: loja[key] for key in keys} for loja in suggest_stores(q, limit=20)]
+
 @app.get("/api/search/lojas", response_model=ApiResponse)
 async def search_lojas_api(q: str = Query(..., min_length=1)):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT l.CODIGO as id, l.PEOP as codigo, l.LOJAS as nome, l.ENDEREÇO as endereco, l.CIDADE as cidade, l.UF as uf, l.STATUS as status
-                FROM lojas_lojas l
-                WHERE l.LOJAS LIKE ? OR l.PEOP LIKE ? OR l.CODIGO LIKE ?
-                ORDER BY l.LOJAS
-                LIMIT 20
-            """, (f"%{q}%", f"%{q}%", f"%{q}%"))
-            
-            lojas = []
-            for row in cursor.fetchall():
-                lojas.append({
-                    "id": row[0],
-                    "codigo": row[1],
-                    "nome": row[2],
-                    "endereco": row[3],
-                    "cidade": row[4],
-                    "uf": row[5],
-                    "status": row[6]
-                })
-            
-            return ApiResponse(success=True, data=lojas)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            lojas = await run_read(_search_lojas, q)
+        return ApiResponse(success=True, data=lojas)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _fetch_operadoras_by_loja(loja_id: str) -> List[str]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT i.Operadora
+            FROM inventario_planilha1 i
+            JOIN lojas_lojas l ON i.People = l.PEOP
+            WHERE l.PEOP = ? OR l.CODIGO = ?
+            ORDER BY i.Operadora
+        """, (loja_id, loja_id))
+        
+        operadoras = [row[0] for row in cursor.fetchall()]
+        return operadoras
+
 @app.get("/api/lojas/{loja_id}/operadoras", response_model=ApiResponse)
 async def get_operadoras_by_loja(loja_id: str):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT i.Operadora
-                FROM inventario_planilha1 i
-                JOIN lojas_lojas l ON i.People = l.PEOP
-                WHERE l.PEOP = ? OR l.CODIGO = ?
-                ORDER BY i.Operadora
-            """, (loja_id, loja_id))
-            
-            operadoras = [row[0] for row in cursor.fetchall()]
-            return ApiResponse(success=True, data=operadoras)
+        operadoras = await run_read(_fetch_operadoras_by_loja, loja_id)
+        return ApiResponse(success=True, data=operadoras)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _fetch_circuitos_by_loja_operadora(loja_id: str, operadora: str) -> List[str]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT i.Circuito_Designação
+            FROM inventario_planilha1 i
+            JOIN lojas_lojas l ON i.People = l.PEOP
+            WHERE (l.PEOP = ? OR l.CODIGO = ?) AND i.Operadora = ?
+            ORDER BY i.Circuito_Designação
+        """, (loja_id, loja_id, operadora))
+        
+        circuitos = [row[0] for row in cursor.fetchall()]
+        return circuitos
+
 @app.get("/api/lojas/{loja_id}/operadoras/{operadora}/circuitos", response_model=ApiResponse)
 async def get_circuitos_by_loja_operadora(loja_id: str, operadora: str):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT i.Circuito_Designação
-                FROM inventario_planilha1 i
-                JOIN lojas_lojas l ON i.People = l.PEOP
-                WHERE (l.PEOP = ? OR l.CODIGO = ?) AND i.Operadora = ?
-                ORDER BY i.Circuito_Designação
-            """, (loja_id, loja_id, operadora))
-            
-            circuitos = [row[0] for row in cursor.fetchall()]
-            return ApiResponse(success=True, data=circuitos)
+        circuitos = await run_read(_fetch_circuitos_by_loja_operadora, loja_id, operadora)
+        return ApiResponse(success=True, data=circuitos)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _search_loja_operadora_circuito(loja_id: str, operadora: str, circuito: str) -> Dict[str, Any]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 
+                l.CODIGO as loja_id,
+                l.PEOP as people_code,
+                l.LOJAS as loja_nome,
+                l.ENDEREÇO as endereco,
+                l.BAIRRO as bairro,
+                l.CIDADE as cidade,
+                l.UF as uf,
+                l.CEP as cep,
+                l.TELEFONE1 as telefone1,
+                l.TELEFONE2 as telefone2,
+                l.CELULAR as celular,
+                l."E_MAIL" as email,
+                l.STATUS as loja_status,
+                l.NOME_GGL as nome_ggl,
+                l.NOME_GR as nome_gr,
+                l.VD_NOVO as vd_novo,
+                i.Operadora,
+                i.Circuito_Designação as designacao,
+                i.Novo_Circuito_Designação as novo_designacao,
+                i.Velocidade,
+                i.Serviço as servico,
+                i.Status_Serviço as circuito_status
+            FROM lojas_lojas l
+            JOIN inventario_planilha1 i ON l.PEOP = i.People
+            WHERE (l.PEOP = ? OR l.CODIGO = ?) 
+              AND i.Operadora = ? 
+              AND (i.Circuito_Designação = ? OR i.Novo_Circuito_Designação = ?)
+        """, (loja_id, loja_id, operadora, circuito, circuito))
+        results = []
+        for row in cursor.fetchall():
+            loja = {
+                "LOJAS": row[2],
+                "CODIGO": row[0],
+                "Status_Loja": row[12],
+                "ENDEREÇO": row[3],
+                "BAIRRO": row[4],
+                "CIDADE": row[5],
+                "UF": row[6],
+                "CEP": row[7],
+                "TELEFONE1": row[8],
+                "TELEFONE2": row[9],
+                "CELULAR": row[10],
+                "E_MAIL": row[11],
+                "People/PEOP": row[1],
+                "NOME_GGL": row[13],
+                "NOME_GR": row[14],
+                "VD NOVO": row[15],
+                "STATUS": row[12]
+            }
+            results.append(loja)
+        result = {
+            "lojas": results,
+            "circuitos": [],
+            "inventario": []
+        }
+        return result
+
 @app.get("/api/search/loja-operadora-circuito", response_model=ApiResponse)
 async def search_loja_operadora_circuito(
     loja_id: str = Query(..., description="ID da loja"),
@@ -771,169 +953,143 @@ async def search_loja_operadora_circuito(
     circuito: str = Query(..., description="Designação do circuito")
 ):
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    l.CODIGO as loja_id,
-                    l.PEOP as people_code,
-                    l.LOJAS as loja_nome,
-                    l.ENDEREÇO as endereco,
-                    l.BAIRRO as bairro,
-                    l.CIDADE as cidade,
-                    l.UF as uf,
-                    l.CEP as cep,
-                    l.TELEFONE1 as telefone1,
-                    l.TELEFONE2 as telefone2,
-                    l.CELULAR as celular,
-                    l."E_MAIL" as email,
-                    l.STATUS as loja_status,
-                    l.NOME_GGL as nome_ggl,
-                    l.NOME_GR as nome_gr,
-                    l.VD_NOVO as vd_novo,
-                    i.Operadora,
-                    i.Circuito_Designação as designacao,
-                    i.Novo_Circuito_Designação as novo_designacao,
-                    i.Velocidade,
-                    i.Serviço as servico,
-                    i.Status_Serviço as circuito_status
-                FROM lojas_lojas l
-                JOIN inventario_planilha1 i ON l.PEOP = i.People
-                WHERE (l.PEOP = ? OR l.CODIGO = ?) 
-                  AND i.Operadora = ? 
-                  AND (i.Circuito_Designação = ? OR i.Novo_Circuito_Designação = ?)
-            """, (loja_id, loja_id, operadora, circuito, circuito))
-            results = []
-            for row in cursor.fetchall():
-                loja = {
-                    "LOJAS": row[2],
-                    "CODIGO": row[0],
-                    "Status_Loja": row[12],
-                    "ENDEREÇO": row[3],
-                    "BAIRRO": row[4],
-                    "CIDADE": row[5],
-                    "UF": row[6],
-                    "CEP": row[7],
-                    "TELEFONE1": row[8],
-                    "TELEFONE2": row[9],
-                    "CELULAR": row[10],
-                    "E_MAIL": row[11],
-                    "People/PEOP": row[1],
-                    "NOME_GGL": row[13],
-                    "NOME_GR": row[14],
-                    "VD NOVO": row[15],
-                    "STATUS": row[12]
-                }
-                results.append(loja)
-            result = {
-                "lojas": results,
-                "circuitos": [],
-                "inventario": []
-            }
-            return ApiResponse(success=True, data=result)
+        with query_deadline(config.SEARCH_CONFIG["search_timeout"]):
+            result = await run_read(_search_loja_operadora_circuito, loja_id, operadora, circuito)
+        return ApiResponse(success=True, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _execute_select(query: str) -> Dict[str, Any]:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+    return {"columns": columns, "data": [dict(zip(columns, row)) for row in rows]}
+
 @app.post('/api/sql/execute')
 async def execute_sql(request: SQLRequest):
     query = request.query.strip()
     if not query.lower().startswith('select'):
         raise HTTPException(status_code=400, detail='Apenas SELECT permitido')
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-        return {"columns": columns, "data": [dict(zip(columns, row)) for row in rows]}
+        return await run_read(_execute_select, query)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/tables", response_model=ApiResponse)
 async def list_tables():
     try:
-        tables = get_tables()
+        tables = await run_read(get_tables)
         return ApiResponse(success=True, data=tables)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/table/{table_name}", response_model=ApiResponse)
-async def get_table_data(table_name: str, limit: int = 100, offset: int = 0, search: Optional[str] = None, orderBy: Optional[str] = None, orderDir: Optional[str] = 'asc'):
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            # Buscar colunas de texto
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns_info = cursor.fetchall()
-            text_columns = [col[1] for col in columns_info if col[2] in ("TEXT", "VARCHAR", "CHAR")]
-            all_columns = [col[1] for col in columns_info]
-            # Montar filtro de busca
-            where = ""
-            params = []
-            if search and text_columns:
-                like_expr = " OR ".join([f"{col} LIKE ?" for col in text_columns])
-                where = f"WHERE {like_expr}"
-                params = [f"%{search}%"] * len(text_columns)
-            # Buscar total
-            count_query = f"SELECT COUNT(*) FROM {table_name} {where}"
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
-            # Montar ordenação
-            order_clause = ""
-            if orderBy and orderBy in all_columns:
-                order_dir = 'DESC' if (orderDir and orderDir.lower() == 'desc') else 'ASC'
-                order_clause = f"ORDER BY {orderBy} {order_dir}"
-            # Buscar dados paginados
-            data_query = f"SELECT * FROM {table_name} {where} {order_clause} LIMIT ? OFFSET ?"
-            cursor.execute(data_query, params + [limit, offset])
-            rows = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            data = [dict(zip(columns, row)) for row in rows]
-        return ApiResponse(success=True, data={"columns": columns, "rows": data, "total": total})
+async def get_table_data(table_name: str, limit: int = 100, offset: int = 0, search: Optional[str] = None, orderBy: Optional[str] = None, orderDir: Optional[str] = 'asc', cursor: Optional[str] = None, include_total: bool = True):
+    try:
+        result = await run_read(
+            load_table_page, table_name, limit=limit, offset=offset, cursor=cursor,
+            order_by=orderBy, order_dir=orderDir, search=search, include_total=include_total
+        )
+        return ApiResponse(success=True, data=result)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/table/{table_name}", response_model=ApiResponse)
 async def insert_table_row(table_name: str, data: dict = Body(...)):
     try:
-        rowid = insert_row(table_name, data)
+        rowid = await run_write(insert_row, table_name, data)
         return ApiResponse(success=True, data={"id": rowid})
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/table/{table_name}/bulk", response_model=ApiResponse)
+async def bulk_write_table_rows(table_name: str, request: BulkWriteRequest):
+    try:
+        result = await run_write(
+            bulk_write, table_name,
+            inserts=request.insert,
+            updates=[(item.id, item.data) for item in request.update],
+            deletes=request.delete
+        )
+        return ApiResponse(success=result['error'] == 0, data=result)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _update_table_row(table_name: str, row_id: int, data: dict) -> int:
+    pk_col = get_primary_key_column(table_name)
+    return update_row(table_name, pk_col, row_id, data)
+
 @app.put("/api/table/{table_name}/{row_id}", response_model=ApiResponse)
 async def update_table_row(table_name: str, row_id: int, data: dict = Body(...)):
     try:
-        pk_col = get_primary_key_column(table_name)
-        affected = update_row(table_name, pk_col, row_id, data)
+        affected = await run_write(_update_table_row, table_name, row_id, data)
         return ApiResponse(success=True, data={"updated": affected})
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _delete_table_row(table_name: str, row_id: int) -> int:
+    pk_col = get_primary_key_column(table_name)
+    return delete_row(table_name, pk_col, row_id)
+
 @app.delete("/api/table/{table_name}/{row_id}", response_model=ApiResponse)
 async def delete_table_row(table_name: str, row_id: int):
     try:
-        pk_col = get_primary_key_column(table_name)
-        affected = delete_row(table_name, pk_col, row_id)
+        affected = await run_write(_delete_table_row, table_name, row_id)
         return ApiResponse(success=True, data={"deleted": affected})
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _fetch_templates(query: str, params: list) -> list:
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def _insert_template(template: TemplateCreate, now: str) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO templates (tipo, nome, conteudo, criado_em) VALUES (?, ?, ?, ?)",
+            (template.tipo, template.nome, json.dumps(template.conteudo), now)
+        )
+        return cursor.lastrowid
+
+def _delete_template(template_id: int) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+        return cursor.rowcount
+
 @app.get("/api/templates", response_model=List[TemplateOut])
 async def list_templates(tipo: Optional[str] = None):
     try:
-        from src.database.connection import get_connection
-        conn = get_connection()
-        cursor = conn.cursor()
         query = "SELECT id, tipo, nome, conteudo, criado_em FROM templates"
         params = []
         if tipo:
             query += " WHERE tipo = ?"
             params.append(tipo)
         query += " ORDER BY criado_em DESC"
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        rows = await run_read(_fetch_templates, query, params)
         result = []
         for row in rows:
             result.append(TemplateOut(
@@ -944,40 +1100,31 @@ async def list_templates(tipo: Optional[str] = None):
                 criado_em=row[4],
             ))
         return result
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/templates", response_model=TemplateOut)
 async def create_template(template: TemplateCreate):
     try:
-        from src.database.connection import get_connection
-        conn = get_connection()
-        cursor = conn.cursor()
         now = datetime.now().isoformat()
-        cursor.execute(
-            "INSERT INTO templates (tipo, nome, conteudo, criado_em) VALUES (?, ?, ?, ?)",
-            (template.tipo, template.nome, json.dumps(template.conteudo), now)
-        )
-        template_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        template_id = await run_write(_insert_template, template, now)
         return TemplateOut(id=template_id, tipo=template.tipo, nome=template.nome, conteudo=template.conteudo, criado_em=now)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/templates/{template_id}")
 async def delete_template(template_id: int):
     try:
-        from src.database.connection import get_connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM templates WHERE id = ?", (template_id,))
-        affected = cursor.rowcount
-        conn.commit()
-        conn.close()
+        affected = await run_write(_delete_template, template_id)
         if affected == 0:
             raise HTTPException(status_code=404, detail="Template não encontrado")
         return {"success": True, "message": "Template removido"}
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -16,7 +16,7 @@ sys.path.insert(0, str(src_path))
 
 # Importar módulos SEM try/except
 from src.database import (
-    get_connection, get_tables, load_table,
+    get_connection, get_tables, load_table, export_table,
     unified_search_people, search_by_designation, 
     search_by_id_vivo, search_by_address, search_by_ggl_gr,
     get_dashboard_stats
@@ -603,6 +603,25 @@ def show_table_viewer():
                         else:
                             st.dataframe(df, use_container_width=True)
                             export_dataframe(df, selected_table)
+        
+        # Exportação da tabela inteira, lida e gravada em blocos
+        with st.expander("⬇️ Exportar tabela completa"):
+            export_format = st.radio("Formato:", ["csv", "excel"], horizontal=True)
+            if st.button("📦 Gerar arquivo"):
+                extension = "csv" if export_format == "csv" else "xlsx"
+                filename = f"{selected_table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+                filepath = os.path.join("temp", filename)
+                os.makedirs("temp", exist_ok=True)
+                with st.spinner("Exportando tabela..."):
+                    total = export_table(selected_table, filepath, export_format)
+                with open(filepath, "rb") as f:
+                    st.download_button(
+                        label=f"📥 Baixar {total} registros",
+                        data=f,
+                        file_name=filename,
+                        mime="text/csv" if export_format == "csv" else
+                             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
 
 def show_sql_query():
     """Exibe a consulta SQL customizada"""
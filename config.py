@@ -9,7 +9,16 @@ DATABASE_CONFIG = {
     "path": "data/consulta_vd.db",  # Atualizado para nova estrutura
     "backup_path": "data/backup/",
     "max_connections": 10,
-    "timeout": 30
+    "timeout": 30,
+    # Perfil aplicado a cada nova conexão (PRAGMAs do SQLite)
+    "connection_profile": {
+        "journal_mode": "WAL",        # leitores não bloqueiam o escritor
+        "synchronous": "NORMAL",      # seguro com WAL e com menos fsyncs
+        "cache_size": -20000,         # negativo = KiB (~20 MB por conexão)
+        "mmap_size": 268435456,       # 256 MB de leitura via mmap
+        "temp_store": "MEMORY",
+        "busy_timeout_ms": 5000       # espera por locks antes de "database is locked"
+    }
 }
 
 # Configurações das planilhas
@@ -69,6 +78,8 @@ UI_CONFIG = {
 SEARCH_CONFIG = {
     "max_results": 100,
     "fuzzy_search": True,
+    "fuzzy_max_results": 5,
+    "max_batch_codes": 1000,
     "search_timeout": 30
 }
 
@@ -122,7 +133,10 @@ REPORT_CONFIG = {
 CACHE_CONFIG = {
     "enable_cache": True,
     "cache_ttl_seconds": 300,
-    "max_cache_size_mb": 100
+    "max_cache_size_mb": 100,
+    # "memory" = um cache por processo; "sqlite" = arquivo compartilhado pelos workers do host
+    "backend": os.getenv("CACHE_BACKEND", "memory"),
+    "shared_path": os.getenv("CACHE_SHARED_PATH", "data/cache/shared_cache.db")
 }
 
 # Configurações de API (futuro)
@@ -144,7 +158,8 @@ INTEGRATION_CONFIG = {
 MONITORING_CONFIG = {
     "enable_metrics": True,
     "metrics_interval_seconds": 60,
-    "alert_threshold": 0.9
+    "alert_threshold": 0.9,
+    "max_statements_per_request": 50   # acima disso a requisição é sinalizada (N+1)
 }
 
 # Configurações de localização
@@ -167,7 +182,17 @@ PERFORMANCE_CONFIG = {
     "enable_lazy_loading": True,
     "batch_size": 1000,
     "connection_pool_size": 10,
-    "query_timeout_seconds": 30
+    "query_timeout_seconds": 30,
+    "export_timeout_seconds": 1800,   # prazo das exportações em blocos (0 = sem prazo)
+    "db_read_workers": 10,   # threads para leituras bloqueantes da API
+    "db_write_workers": 2,   # SQLite admite um escritor por vez
+    "count_cache_ttl": 300,           # segundos que um total de paginação fica em cache
+    "count_cache_max_entries": 2000,  # totais mantidos por banco (LRU)
+    "exact_count_max_rows": 200000,   # acima disso (sqlite_stat1) o total é estimado
+    "count_sample_rows": 10000,       # amostra usada para estimar totais filtrados
+    "slow_query_threshold_ms": 200,   # acima disso o EXPLAIN QUERY PLAN é capturado
+    "slow_query_log_size": 100,       # consultas lentas mantidas em memória
+    "query_log_max_fingerprints": 1000  # fingerprints com estatísticas mantidos em memória
 }
 
 # Configurações de logs
@@ -14,7 +14,15 @@ DATABASE_CONFIG = {
     "path": os.getenv("DATABASE_PATH", "data/consulta_vd.db"),
     "backup_path": os.getenv("BACKUP_PATH", "data/backup/"),
     "max_connections": int(os.getenv("DB_MAX_CONNECTIONS", "20")),
-    "timeout": int(os.getenv("DB_TIMEOUT", "30"))
+    "timeout": int(os.getenv("DB_TIMEOUT", "30")),
+    "connection_profile": {
+        "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+        "cache_size": int(os.getenv("DB_CACHE_SIZE", "-20000")),
+        "mmap_size": int(os.getenv("DB_MMAP_SIZE", "268435456")),
+        "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY"),
+        "busy_timeout_ms": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    }
 }
 
 # Configurações de segurança
@@ -29,7 +37,10 @@ SECURITY_CONFIG = {
 CACHE_CONFIG = {
     "enable_cache": os.getenv("ENABLE_CACHE", "true").lower() == "true",
     "cache_ttl_seconds": int(os.getenv("CACHE_TTL_SECONDS", "300")),
-    "max_cache_size_mb": int(os.getenv("MAX_CACHE_SIZE_MB", "100"))
+    "max_cache_size_mb": int(os.getenv("MAX_CACHE_SIZE_MB", "100")),
+    # Vários workers por host: o cache em arquivo é compartilhado entre eles
+    "backend": os.getenv("CACHE_BACKEND", "sqlite"),
+    "shared_path": os.getenv("CACHE_SHARED_PATH", "data/cache/shared_cache.db")
 }
 
 # Configurações de logging
@@ -46,14 +57,25 @@ PERFORMANCE_CONFIG = {
     "enable_lazy_loading": True,
     "batch_size": int(os.getenv("BATCH_SIZE", "1000")),
     "connection_pool_size": int(os.getenv("CONNECTION_POOL_SIZE", "10")),
-    "query_timeout_seconds": int(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+    "query_timeout_seconds": int(os.getenv("QUERY_TIMEOUT_SECONDS", "30")),
+    "export_timeout_seconds": int(os.getenv("EXPORT_TIMEOUT_SECONDS", "1800")),
+    "db_read_workers": int(os.getenv("DB_READ_WORKERS", "10")),
+    "db_write_workers": int(os.getenv("DB_WRITE_WORKERS", "2")),
+    "count_cache_ttl": int(os.getenv("COUNT_CACHE_TTL", "300")),
+    "count_cache_max_entries": int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "2000")),
+    "exact_count_max_rows": int(os.getenv("EXACT_COUNT_MAX_ROWS", "200000")),
+    "count_sample_rows": int(os.getenv("COUNT_SAMPLE_ROWS", "10000")),
+    "slow_query_threshold_ms": int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200")),
+    "slow_query_log_size": int(os.getenv("SLOW_QUERY_LOG_SIZE", "100")),
+    "query_log_max_fingerprints": int(os.getenv("QUERY_LOG_MAX_FINGERPRINTS", "1000"))
 }
 
 # Configurações de monitoramento
 MONITORING_CONFIG = {
     "enable_metrics": os.getenv("ENABLE_METRICS", "true").lower() == "true",
     "metrics_interval_seconds": int(os.getenv("METRICS_INTERVAL_SECONDS", "60")),
-    "alert_threshold": float(os.getenv("ALERT_THRESHOLD", "0.9"))
+    "alert_threshold": float(os.getenv("ALERT_THRESHOLD", "0.9")),
+    "max_statements_per_request": int(os.getenv("MAX_STATEMENTS_PER_REQUEST", "50"))
 }
 
 # Configurações de backup
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do MemoryCache: custo de set/get e do despejo por tamanho do cache
+
+Enche um cache de N entradas (1 mil a 1 milhão por padrão) e mede o custo
+médio de get com acerto, de set de uma chave existente e de set de uma
+chave nova com o cache cheio (que despeja a entrada menos usada). Com o
+despejo LRU O(1), os tempos devem ficar estáveis entre os tamanhos.
+
+Uso:
+    python scripts/benchmarks/bench_cache.py [--sizes 1000 10000 100000 1000000] [--ops 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.cache.memory_cache import MemoryCache
+
+def per_op_us(func, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--ops", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'entradas':>10} {'get µs':>9} {'set µs':>9} {'set+despejo µs':>15}")
+    for size in args.sizes:
+        cache = MemoryCache(max_size=size, default_ttl=3600)
+        for i in range(size):
+            cache.set(f"k{i}", i)
+        existing = [f"k{random.randrange(size)}" for _ in range(args.ops)]
+        new = [f"n{i}" for i in range(args.ops)]
+
+        get_us = per_op_us(cache.get, existing)
+        set_us = per_op_us(lambda key: cache.set(key, 0), existing)
+        evict_us = per_op_us(lambda key: cache.set(key, 0), new)
+        assert cache.get_stats()['current_size'] == size
+        print(f"{size:>10} {get_us:>9.2f} {set_us:>9.2f} {evict_us:>15.2f}")
+
+if __name__ == "__main__":
+    main()
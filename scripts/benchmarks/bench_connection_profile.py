@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark do perfil de conexão SQLite (WAL, mmap, cache, busy timeout)
+
+Mede a latência de leitura por PEOP enquanto escritores atualizam a
+tabela de lojas, comparando os padrões do SQLite com o perfil de
+DATABASE_CONFIG["connection_profile"].
+
+Uso:
+    python scripts/benchmarks/bench_connection_profile.py [--rows 50000] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import config
+from src.database.connection import apply_connection_profile
+
+# Perfil equivalente ao comportamento anterior: journal de rollback, sem mmap
+# e sem busy timeout (o leitor falha com "database is locked")
+DEFAULT_PROFILE = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout_ms": 0
+}
+
+def create_database(path: str, rows: int):
+    """Cria uma tabela lojas_lojas sintética"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, LOJAS TEXT, "ENDEREÇO" TEXT, CIDADE TEXT, UF TEXT, STATUS TEXT)')
+    conn.executemany(
+        "INSERT INTO lojas_lojas VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"P{i:06d}", f"Loja {i}", f"Rua {i}, {i % 900}", f"Cidade {i % 300}", "SP", "ATIVA")
+         for i in range(rows))
+    )
+    conn.execute("CREATE INDEX idx_bench_peop ON lojas_lojas(PEOP)")
+    conn.commit()
+    conn.close()
+
+def open_connection(path: str, profile: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    apply_connection_profile(conn, profile)
+    return conn
+
+def run(path: str, profile: dict, rows: int, seconds: float, readers: int, writers: int) -> dict:
+    """Executa leitores e escritores concorrentes e coleta latências"""
+    stop = threading.Event()
+    latencies = []
+    errors = {'reads': 0, 'writes': 0}
+    writes = [0]
+    lock = threading.Lock()
+
+    def reader():
+        conn = open_connection(path, profile)
+        local, failed = [], 0
+        while not stop.is_set():
+            peop = f"P{random.randrange(rows):06d}"
+            start = time.perf_counter()
+            try:
+                conn.execute("SELECT * FROM lojas_lojas WHERE PEOP = ?", (peop,)).fetchall()
+                local.append((time.perf_counter() - start) * 1000)
+            except sqlite3.OperationalError:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors['reads'] += failed
+
+    def writer():
+        conn = open_connection(path, profile)
+        done, failed = 0, 0
+        while not stop.is_set():
+            try:
+                with conn:
+                    for _ in range(20):
+                        conn.execute(
+                            "UPDATE lojas_lojas SET STATUS = ? WHERE PEOP = ?",
+                            (random.choice(["ATIVA", "INATIVA"]), f"P{random.randrange(rows):06d}")
+                        )
+                done += 1
+            except sqlite3.OperationalError:
+                failed += 1
+        conn.close()
+        with lock:
+            writes[0] += done
+            errors['writes'] += failed
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0
+    return {
+        'reads': len(latencies),
+        'read_errors': errors['reads'],
+        'write_txns': writes[0],
+        'write_errors': errors['writes'],
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'mean_ms': statistics.mean(latencies) if latencies else 0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=1)
+    args = parser.parse_args()
+
+    profiles = [
+        ("padrão SQLite", DEFAULT_PROFILE),
+        ("perfil configurado", config.DATABASE_CONFIG["connection_profile"]),
+    ]
+    print(f"{args.rows} lojas, {args.readers} leitores, {args.writers} escritor(es), {args.seconds}s por cenário\n")
+    print(f"{'cenário':<20} {'leituras':>9} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'txns escrita':>13}")
+    for name, profile in profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            create_database(path, args.rows)
+            r = run(path, profile, args.rows, args.seconds, args.readers, args.writers)
+        print(f"{name:<20} {r['reads']:>9} {r['read_errors']:>6} {r['p50_ms']:>8.3f} "
+              f"{r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['write_txns']:>13}")
+
+if __name__ == "__main__":
+    main()
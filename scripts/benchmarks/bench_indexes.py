@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark das buscas com e sem o registro de índices
+
+Gera lojas_lojas e inventario_planilha1 sintéticos e mede a latência das
+funções de busca (src/database/queries.py e busca guiada da API) antes e
+depois de aplicar src/database/indexes.INDEX_REGISTRY.
+
+Uso:
+    python scripts/benchmarks/bench_indexes.py [--lojas 20000] [--circuitos 60000] [--runs 50]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import config
+from src.cache.memory_cache import disable_cache
+from src.database.connection import close_pools, ensure_indexes
+from src.database.queries import unified_search_people, search_by_designation, get_dashboard_stats
+import api_backend
+
+OPERADORAS = ["VIVO", "CLARO", "OI", "TIM", "EMBRATEL"]
+UFS = ["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "SC"]
+
+def create_database(path: str, lojas: int, circuitos: int):
+    """Cria as tabelas sintéticas sem índices, como faz excel_to_sqlite.py"""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, CODIGO TEXT, LOJAS TEXT, "ENDEREÇO" TEXT, BAIRRO TEXT, '
+                 'CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, E_MAIL TEXT, '
+                 '"2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, NOME_GGL TEXT, NOME_GR TEXT, '
+                 'STATUS TEXT)')
+    conn.executemany(
+        "INSERT INTO lojas_lojas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ((f"P{i:06d}", f"L{i:05d}", f"Loja {i}", f"Rua {i}", f"Bairro {i % 500}", f"Cidade {i % 300}",
+          UFS[i % len(UFS)], f"{i:08d}", "1100000000", "", "", f"loja{i}@exemplo.com", "8-18", "8-12", "",
+          "", "", f"GGL {i % 40}", f"GR {i % 10}", "ATIVA" if i % 7 else "INATIVA")
+         for i in range(lojas))
+    )
+    conn.execute('CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, "Circuito_Designação" TEXT, '
+                 '"Novo_Circuito_Designação" TEXT, Operadora TEXT, ID_VIVO TEXT, Novo_ID_Vivo TEXT, '
+                 'Velocidade TEXT, "Serviço" TEXT, "Status_Serviço" TEXT)')
+    conn.executemany(
+        "INSERT INTO inventario_planilha1 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ((f"P{i % lojas:06d}", "ATIVA", f"DES-{i:07d}", "", OPERADORAS[i % len(OPERADORAS)], f"V{i:07d}",
+          "", "100M", "LINK", "ATIVO")
+         for i in range(circuitos))
+    )
+    conn.commit()
+    conn.close()
+
+def measure(func, args_factory, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        args = args_factory()
+        start = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'mean_ms': statistics.mean(latencies)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lojas", type=int, default=20000)
+    parser.add_argument("--circuitos", type=int, default=60000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    peop = lambda: (f"P{random.randrange(args.lojas):06d}",)
+    cases = [
+        ("unified_search_people", unified_search_people, peop),
+        ("search_by_designation", search_by_designation, lambda: (f"DES-{random.randrange(args.circuitos):07d}",)),
+        ("operadoras da loja", api_backend._fetch_operadoras_by_loja, peop),
+        ("circuitos loja+operadora", api_backend._fetch_circuitos_by_loja_operadora,
+         lambda: (peop()[0], random.choice(OPERADORAS))),
+        ("get_dashboard_stats", get_dashboard_stats, lambda: ()),
+    ]
+
+    # Sem cache: cada chamada vai ao banco
+    disable_cache()
+    print(f"{args.lojas} lojas, {args.circuitos} circuitos, {args.runs} execuções por busca\n")
+    print(f"{'busca':<26} {'índices':<8} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        create_database(path, args.lojas, args.circuitos)
+        config.DATABASE_CONFIG["path"] = path
+        results = {}
+        for label in ("não", "sim"):
+            if label == "sim":
+                close_pools()
+                ensure_indexes()
+            for name, func, args_factory in cases:
+                results[(name, label)] = measure(func, args_factory, args.runs)
+        close_pools()
+
+    for name, _, _ in cases:
+        for label in ("não", "sim"):
+            r = results[(name, label)]
+            print(f"{name:<26} {label:<8} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['mean_ms']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
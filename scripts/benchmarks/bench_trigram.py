@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca por substring em designações e IDs Vivo (trigramas x LIKE)
+
+Gera um inventário sintético (500 mil circuitos por padrão) e mede
+search_by_designation e search_by_id_vivo com trechos colados pelo
+operador, antes e depois de criar o índice inventario_planilha1_trgm.
+Com o índice, o tempo acompanha o número de resultados e não o tamanho
+da tabela.
+
+Uso:
+    python scripts/benchmarks/bench_trigram.py [--circuitos 500000] [--runs 30]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import config
+from src.cache.memory_cache import disable_cache
+from src.database.connection import close_pools, ensure_indexes
+from src.database.queries import search_by_designation, search_by_id_vivo
+from bench_indexes import create_database, measure
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--circuitos", type=int, default=500000)
+    parser.add_argument("--lojas", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    # Trechos do meio do identificador, como os colados pelos operadores
+    def designation():
+        return (f"{random.randrange(args.circuitos):07d}"[1:6],)
+    def id_vivo():
+        return (f"V{random.randrange(args.circuitos):07d}"[:7],)
+    cases = [
+        ("search_by_designation", search_by_designation, designation),
+        ("search_by_id_vivo", search_by_id_vivo, id_vivo),
+    ]
+
+    disable_cache()
+    print(f"{args.circuitos} circuitos, {args.runs} execuções por busca\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        create_database(path, args.lojas, args.circuitos)
+        config.DATABASE_CONFIG["path"] = path
+        results = {}
+        for label in ("LIKE", "trigramas"):
+            if label == "trigramas":
+                close_pools()
+                start = time.perf_counter()
+                ensure_indexes()
+                print(f"Índices criados em {time.perf_counter() - start:.1f}s\n")
+            for name, func, args_factory in cases:
+                results[(name, label)] = measure(func, args_factory, args.runs)
+        close_pools()
+
+    print(f"{'busca':<24} {'filtro':<10} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+    for name, _, _ in cases:
+        for label in ("LIKE", "trigramas"):
+            r = results[(name, label)]
+            print(f"{name:<24} {label:<10} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['mean_ms']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import pandas as pd
 import sqlite3
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.indexes import ensure_indexes
+
 def excel_to_sqlite():
     """
     Converte planilhas Excel para um banco SQLite
@@ -52,7 +57,12 @@ def excel_to_sqlite():
                 df.to_sql(table_name, conn, if_exists='replace', index=False)
                 print(f"    ✓ Tabela '{table_name}' criada com {len(df)} registros")
         
-        # 3. Mostrar informações do banco criado
+        # 3. Recriar os índices (to_sql com 'replace' descarta os existentes)
+        result = ensure_indexes(conn)
+        print(f"\nÍndices criados: {len(result['created'])}, já existentes: {len(result['existing'])}, "
+              f"ignorados: {len(result['skipped'])}")
+        
+        # 4. Mostrar informações do banco criado
         print(f"\n✓ Banco SQLite '{db_name}' criado com sucesso!")
         
         # Listar todas as tabelas criadas
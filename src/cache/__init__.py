@@ -1,15 +1,18 @@
 # Módulo de cache
 from .memory_cache import (
-    get_cached_data, set_cached_data, clear_cache,
+    get_cached_data, set_cached_data, clear_cache, invalidate_cached_tables,
     get_cache_stats, is_cache_enabled, enable_cache, disable_cache
 )
+from .single_flight import single_flight
 
 __all__ = [
     'get_cached_data',
     'set_cached_data', 
     'clear_cache',
+    'invalidate_cached_tables',
     'get_cache_stats',
     'is_cache_enabled',
     'enable_cache',
-    'disable_cache'
+    'disable_cache',
+    'single_flight'
 ] 
\ No newline at end of file
@@ -1,26 +1,93 @@
 """
 Sistema de cache em memória para ConsultaVD
 """
+import sys
 import time
 import threading
-from typing import Any, Dict, Optional
+import heapq
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import hashlib
 import json
 
+import pandas as pd
+
+import config
+from src.cache.single_flight import get_single_flight
+
+# Invalidações recentes lembradas para descartar valores calculados antes delas
+_INVALIDATION_LOG_SIZE = 10000
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimativa do tamanho em bytes de um valor em cache
+    
+    DataFrames usam memory_usage(deep=True); dicionários, listas e tuplas
+    somam os elementos (até alguns níveis); os demais usam sys.getsizeof.
+    
+    Args:
+        value (Any): Valor a medir
+        
+    Returns:
+        int: Bytes aproximados
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
 class MemoryCache:
-    """Cache em memória com TTL e estatísticas"""
+    """
+    Cache em memória com TTL, despejo LRU, limite de memória e estatísticas
+    
+    As entradas ficam em um OrderedDict na ordem de uso (a menos usada
+    primeiro): get, set e o despejo são O(1). Um heap de expiração permite
+    descartar as entradas vencidas antes de despejar entradas válidas. Além
+    do número de entradas, o cache respeita um orçamento de bytes
+    (estimate_size), contabilizado também por namespace.
     
-    def __init__(self, max_size: int = 1000, default_ttl: int = 300):
+    Cada entrada pode declarar as tabelas de que depende (e, opcionalmente,
+    as chaves PEOP/People das linhas lidas); invalidate() descarta apenas
+    as entradas afetadas por uma escrita.
+
+    Cada invalidação (e cada clear()) incrementa a geração do cache. Quem calcula um valor
+    após um miss passa a geração daquele momento em set(since=...); se uma
+    escrita nas tabelas/chaves do valor aconteceu nesse meio-tempo, o valor
+    (possivelmente lido antes da escrita) é descartado.
+    """
+    
+    def __init__(self, max_size: int = 1000, default_ttl: int = 300, max_bytes: Optional[int] = None):
         """
         Inicializa o cache
         
         Args:
             max_size (int): Tamanho máximo do cache
             default_ttl (int): TTL padrão em segundos
+            max_bytes (int, optional): Orçamento de memória em bytes (None = sem limite)
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (expires_at, key) de cada set; entradas substituídas ficam até saírem do topo
+        self._expirations: List[Tuple[float, str]] = []
         self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._namespace_bytes: Dict[str, int] = {}
+        # tabela -> chave da linha (None = tabela inteira) -> chaves do cache
+        self._dependencies: Dict[str, Dict[Optional[str], Set[str]]] = {}
+        # (geração, tabela, chaves escritas ou None) das últimas invalidações;
+        # tabela None registra um clear(), que torna obsoleta qualquer leitura anterior
+        self._generation = 0
+        self._invalidations: deque = deque(maxlen=_INVALIDATION_LOG_SIZE)
         self._default_ttl = default_ttl
         self._lock = threading.RLock()
         self._stats = {
@@ -28,6 +95,9 @@ class MemoryCache:
             'misses': 0,
             'sets': 0,
             'evictions': 0,
+            'rejected': 0,
+            'invalidations': 0,
+            'stale': 0,
             'created_at': datetime.now()
         }
         self._enabled = True
@@ -65,14 +135,18 @@ class MemoryCache:
             
             # Verificar se expirou
             if time.time() > item['expires_at']:
-                del self._cache[key]
+                self._remove(key)
                 self._stats['misses'] += 1
                 return None
             
+            # Marca como usada mais recentemente
+            self._cache.move_to_end(key)
             self._stats['hits'] += 1
             return item['value']
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, namespace: Optional[str] = None,
+            tables: Optional[Iterable[str]] = None, keys: Optional[Iterable[Any]] = None,
+            since: Optional[int] = None) -> bool:
         """
         Armazena valor no cache
         
@@ -80,45 +154,167 @@ class MemoryCache:
             key (str): Chave do cache
             value (Any): Valor a armazenar
             ttl (int, optional): TTL em segundos
+            namespace (str, optional): Grupo para a contabilidade de bytes (ex: nome da consulta)
+            tables (Iterable[str], optional): Tabelas lidas para produzir o valor
+            keys (Iterable, optional): Chaves das linhas lidas nessas tabelas
+                (ex: códigos PEOP); sem chaves, qualquer escrita na tabela invalida
+            since (int, optional): Geração (generation()) de quando a leitura começou
             
         Returns:
-            bool: True se armazenado com sucesso
+            bool: True se armazenado com sucesso (False se desabilitado, se o
+            valor sozinho excede o orçamento de memória ou se ficou obsoleto)
         """
         if not self._enabled:
             return False
         
         ttl = ttl or self._default_ttl
         expires_at = time.time() + ttl
+        size = estimate_size(value)
+        row_keys = [str(k) for k in keys] if keys else [None]
+        dependencies = [(table, row_key) for table in (tables or ()) for row_key in row_keys]
         
         with self._lock:
-            # Verificar se precisa evictar
-            if len(self._cache) >= self._max_size and key not in self._cache:
-                self._evict_oldest()
+            if since is not None and self._written_since(since, tables or (), row_keys if keys else None):
+                self._stats['stale'] += 1
+                return False
+            if self._max_bytes is not None and size > self._max_bytes:
+                self._stats['rejected'] += 1
+                return False
+            if key in self._cache:
+                self._remove(key)
+            
+            # Verificar se precisa evictar (entradas vencidas saem primeiro)
+            if self._over_budget(size):
+                self._purge_expired()
+                while self._cache and self._over_budget(size):
+                    self._evict_oldest()
             
             self._cache[key] = {
                 'value': value,
                 'expires_at': expires_at,
                 'created_at': time.time(),
-                'ttl': ttl
+                'ttl': ttl,
+                'size': size,
+                'namespace': namespace or 'default',
+                'dependencies': dependencies
             }
+            self._account(self._cache[key], 1)
+            for table, row_key in dependencies:
+                self._dependencies.setdefault(table, {}).setdefault(row_key, set()).add(key)
+            heapq.heappush(self._expirations, (expires_at, key))
+            if len(self._expirations) > 2 * self._max_size:
+                self._rebuild_expirations()
             
             self._stats['sets'] += 1
             return True
     
+    def generation(self) -> int:
+        """Geração atual: número de invalidações e clear() feitos até agora"""
+        with self._lock:
+            return self._generation
+    
+    def _written_since(self, since: int, tables: Iterable[str], row_keys: Optional[List[str]]) -> bool:
+        """Indica se algum clear() ou invalidação após `since` atinge as tabelas/chaves informadas"""
+        tables = set(tables)
+        if since < self._generation - len(self._invalidations):
+            # Invalidações já esquecidas: não há como saber, descarta por segurança
+            return True
+        for generation, table, written in reversed(self._invalidations):
+            if generation <= since:
+                break
+            if table is None:
+                return True
+            if table in tables and (written is None or row_keys is None or not written.isdisjoint(row_keys)):
+                return True
+        return False
+    
+    def _over_budget(self, incoming: int) -> bool:
+        """Indica se uma nova entrada de `incoming` bytes excederia algum limite"""
+        if len(self._cache) >= self._max_size:
+            return True
+        return self._max_bytes is not None and self._bytes + incoming > self._max_bytes
+    
+    def _account(self, item: Dict[str, Any], sign: int):
+        """Soma (sign=1) ou subtrai (sign=-1) o tamanho da entrada dos totais"""
+        self._bytes += sign * item['size']
+        namespace = item['namespace']
+        self._namespace_bytes[namespace] = self._namespace_bytes.get(namespace, 0) + sign * item['size']
+        if not self._namespace_bytes[namespace]:
+            del self._namespace_bytes[namespace]
+    
+    def _remove(self, key: str):
+        """Remove uma entrada, desconta seu tamanho e a tira do índice de dependências"""
+        item = self._cache.pop(key)
+        self._account(item, -1)
+        for table, row_key in item['dependencies']:
+            by_key = self._dependencies[table]
+            by_key[row_key].discard(key)
+            if not by_key[row_key]:
+                del by_key[row_key]
+                if not by_key:
+                    del self._dependencies[table]
+    
     def _evict_oldest(self):
-        """Remove o item mais antigo do cache"""
+        """Remove o item usado há mais tempo (LRU)"""
         if not self._cache:
             return
         
-        oldest_key = min(self._cache.keys(), 
-                        key=lambda k: self._cache[k]['created_at'])
-        del self._cache[oldest_key]
+        self._remove(next(iter(self._cache)))
         self._stats['evictions'] += 1
     
+    def _purge_expired(self):
+        """Remove as entradas vencidas (não contam como evictions)"""
+        now = time.time()
+        while self._expirations and self._expirations[0][0] < now:
+            expires_at, key = heapq.heappop(self._expirations)
+            item = self._cache.get(key)
+            # A chave pode ter sido regravada com outro prazo
+            if item is not None and item['expires_at'] == expires_at:
+                self._remove(key)
+    
+    def _rebuild_expirations(self):
+        """Refaz o heap só com os prazos das entradas atuais"""
+        self._expirations = [(item['expires_at'], key) for key, item in self._cache.items()]
+        heapq.heapify(self._expirations)
+    
+    def invalidate(self, table: str, keys: Optional[Iterable[Any]] = None) -> int:
+        """
+        Descarta as entradas que dependem de uma tabela alterada
+        
+        Args:
+            table (str): Tabela escrita
+            keys (Iterable, optional): Chaves das linhas escritas; com chaves,
+                entradas restritas a outras chaves são mantidas
+                
+        Returns:
+            int: Número de entradas descartadas
+        """
+        with self._lock:
+            written = None if keys is None else frozenset(str(k) for k in keys)
+            if written is None or written:
+                self._generation += 1
+                self._invalidations.append((self._generation, table, written))
+            by_key = self._dependencies.get(table, {})
+            if keys is None:
+                groups = list(by_key.values())
+            else:
+                groups = [by_key.get(row_key, ()) for row_key in [None] + [str(k) for k in keys]]
+            stale = set().union(*groups) if groups else set()
+            for key in stale:
+                self._remove(key)
+            self._stats['invalidations'] += len(stale)
+            return len(stale)
+    
     def clear(self):
         """Limpa todo o cache"""
         with self._lock:
             self._cache.clear()
+            self._expirations.clear()
+            self._bytes = 0
+            self._namespace_bytes.clear()
+            self._dependencies.clear()
+            self._generation += 1
+            self._invalidations.append((self._generation, None, None))
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
@@ -126,11 +322,15 @@ class MemoryCache:
             stats = self._stats.copy()
             stats['current_size'] = len(self._cache)
             stats['max_size'] = self._max_size
+            stats['current_bytes'] = self._bytes
+            stats['max_bytes'] = self._max_bytes
+            stats['bytes_by_namespace'] = dict(self._namespace_bytes)
             stats['hit_rate'] = (
                 stats['hits'] / (stats['hits'] + stats['misses'])
                 if (stats['hits'] + stats['misses']) > 0 else 0
             )
             stats['enabled'] = self._enabled
+            stats['backend'] = 'memory'
             return stats
     
     def enable(self):
@@ -145,8 +345,31 @@ class MemoryCache:
         """Verifica se o cache está habilitado"""
         return self._enabled
 
+def create_cache(cache_config: Optional[Dict[str, Any]] = None):
+    """
+    Cria o cache conforme CACHE_CONFIG["backend"]
+    
+    "memory" (padrão) mantém um cache por processo; "sqlite" usa o arquivo
+    CACHE_CONFIG["shared_path"], compartilhado por todos os workers do host.
+    
+    Args:
+        cache_config (dict, optional): Configuração (padrão: config.CACHE_CONFIG)
+        
+    Returns:
+        MemoryCache ou SharedCache: Cache com a interface de MemoryCache
+    """
+    cache_config = cache_config or config.CACHE_CONFIG
+    max_bytes = cache_config["max_cache_size_mb"] * 1024 * 1024
+    backend = cache_config.get("backend", "memory")
+    if backend == "memory":
+        return MemoryCache(max_bytes=max_bytes)
+    if backend == "sqlite":
+        from src.cache.shared_cache import SharedCache
+        return SharedCache(cache_config["shared_path"], max_bytes=max_bytes)
+    raise ValueError(f"Backend de cache inválido: {backend}")
+
 # Instância global do cache
-_cache_instance = MemoryCache()
+_cache_instance = create_cache()
 
 # ============================================================================
 # FUNÇÕES PARA API BACKEND
@@ -164,18 +387,41 @@ def clear_cache():
     """Limpa todo o cache"""
     _cache_instance.clear()
 
+def invalidate_cached_tables(table: str, keys: Optional[Iterable[Any]] = None) -> int:
+    """
+    Descarta os resultados em cache afetados por uma escrita (ver MemoryCache.invalidate)
+    
+    Args:
+        table (str): Tabela escrita
+        keys (Iterable, optional): Chaves (PEOP/People) das linhas escritas; None = tabela inteira
+        
+    Returns:
+        int: Número de entradas descartadas
+    """
+    return _cache_instance.invalidate(table, keys)
+
 def get_cache_stats() -> Dict[str, Any]:
-    """Retorna estatísticas do cache"""
-    return _cache_instance.get_stats()
+    """Retorna estatísticas do cache (com as chamadas coalescidas deste processo)"""
+    stats = _cache_instance.get_stats()
+    flights = get_single_flight().get_stats()
+    stats['coalesced'] = flights['coalesced']
+    stats['in_flight'] = flights['in_flight']
+    return stats
 
 # ============================================================================
 # FUNÇÕES ORIGINAIS DO MÓDULO
 # ============================================================================
 
+# Geração do cache no momento de cada miss do contexto atual (chave -> geração)
+_miss_generations: ContextVar[Optional[Dict[str, int]]] = ContextVar("cache_miss_generations", default=None)
+
 def get_cached_data(*args, **kwargs) -> Optional[Any]:
     """
     Obtém dados do cache baseado nos parâmetros
     
+    Em um miss, guarda a geração atual do cache: o set_cached_data
+    correspondente descarta o valor se houver escrita antes dele.
+    
     Args:
         *args: Argumentos posicionais
         **kwargs: Argumentos nomeados
@@ -184,23 +430,40 @@ def get_cached_data(*args, **kwargs) -> Optional[Any]:
         Any: Dados em cache ou None
     """
     key = _cache_instance._generate_key(*args, **kwargs)
-    return _cache_instance.get(key)
+    value = _cache_instance.get(key)
+    if value is None:
+        generation = _cache_instance.generation()
+        if generation is not None:
+            _miss_generations.set({**(_miss_generations.get() or {}), key: generation})
+    return value
 
-def set_cached_data(value: Any, ttl: Optional[int] = None, *args, **kwargs) -> bool:
+def set_cached_data(value: Any, ttl: Optional[int] = None, *args, tables: Optional[Iterable[str]] = None,
+                    keys: Optional[Iterable[Any]] = None, **kwargs) -> bool:
     """
     Armazena dados no cache
     
+    Se get_cached_data registrou um miss desta chave no contexto atual e
+    desde então houve escrita nas tabelas/chaves do valor, ele é descartado.
+    
     Args:
         value (Any): Valor a armazenar
         ttl (int, optional): TTL em segundos
         *args: Argumentos posicionais para gerar chave
+        tables (Iterable[str], optional): Tabelas de que o valor depende
+        keys (Iterable, optional): Chaves PEOP/People das linhas de que o valor depende
         **kwargs: Argumentos nomeados para gerar chave
         
     Returns:
-        bool: True se armazenado com sucesso
+        bool: True se armazenado com sucesso (False se descartado)
     """
     key = _cache_instance._generate_key(*args, **kwargs)
-    return _cache_instance.set(key, value, ttl)
+    # O primeiro argumento é o nome da consulta: vira o namespace das estatísticas
+    namespace = args[0] if args and isinstance(args[0], str) else None
+    misses = _miss_generations.get() or {}
+    since = misses.get(key)
+    if since is not None:
+        _miss_generations.set({k: v for k, v in misses.items() if k != key})
+    return _cache_instance.set(key, value, ttl, namespace, tables, keys, since=since)
 
 def is_cache_enabled() -> bool:
     """Verifica se o cache está habilitado"""
@@ -0,0 +1,454 @@
+"""
+Cache compartilhado entre processos (workers do uvicorn) em um arquivo SQLite local
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.cache.memory_cache import _INVALIDATION_LOG_SIZE, MemoryCache
+
+# Intervalo (segundos) para gravar contadores e horários de uso acumulados no processo
+_FLUSH_SECONDS = 1.0
+
+# Entradas removidas por vez ao despejar
+_EVICT_BATCH = 32
+
+# Versão do formato das entradas (arquivos de versões anteriores são esvaziados)
+_FORMAT_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    namespace TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries (expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_last_used ON cache_entries (last_used);
+CREATE TABLE IF NOT EXISTS cache_dependencies (
+    key TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    row_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cache_dependencies_tbl ON cache_dependencies (tbl, row_key);
+CREATE INDEX IF NOT EXISTS idx_cache_dependencies_key ON cache_dependencies (key);
+CREATE TRIGGER IF NOT EXISTS cache_entries_ad AFTER DELETE ON cache_entries BEGIN
+    DELETE FROM cache_dependencies WHERE key = old.key;
+END;
+-- tbl = '*' registra um clear()
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    generation INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    row_key TEXT
+);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_COUNTERS = ('hits', 'misses', 'sets', 'evictions', 'rejected', 'invalidations', 'stale', 'errors')
+
+
+def _encode(value: Any) -> Any:
+    """Converte um valor em estrutura JSON com marcação de tipo (dict, tuple, DataFrame)"""
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return value
+    if hasattr(value, 'item') and not isinstance(value, (pd.DataFrame, pd.Series)):
+        # Escalares numpy (contagens, médias)
+        return _encode(value.item())
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {'tuple': [_encode(item) for item in value]}
+    if isinstance(value, dict):
+        # Pares em vez de objeto JSON: chaves não-texto (None, int) são preservadas
+        return {'dict': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, pd.DataFrame):
+        split = json.loads(value.to_json(orient='split', date_format='iso', date_unit='ns'))
+        return {'dataframe': split, 'dtypes': [str(dtype) for dtype in value.dtypes],
+                'attrs': _encode(dict(value.attrs))}
+    raise TypeError(f"Tipo não suportado pelo cache compartilhado: {type(value).__name__}")
+
+def _decode(value: Any) -> Any:
+    """Inverso de _encode"""
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 'tuple' in value:
+        return tuple(_decode(item) for item in value['tuple'])
+    if 'dict' in value:
+        return {_decode(k): _decode(v) for k, v in value['dict']}
+    split = value['dataframe']
+    df = pd.DataFrame(split['data'], index=split['index'], columns=split['columns'])
+    for i, dtype in enumerate(value['dtypes']):
+        # Por posição: resultados de JOIN podem repetir nomes de colunas
+        if str(df.dtypes.iloc[i]) != dtype:
+            df.isetitem(i, df.iloc[:, i].astype(dtype))
+    df.attrs.update(_decode(value['attrs']))
+    return df
+
+def dumps(value: Any) -> bytes:
+    """
+    Serializa um valor do cache em JSON (sem pickle: ler o arquivo não executa código)
+
+    Args:
+        value (Any): None, bool, números, texto, listas, tuplas, dicts e DataFrames
+
+    Returns:
+        bytes: JSON em UTF-8
+
+    Raises:
+        TypeError: Para tipos não suportados
+    """
+    return json.dumps(_encode(value), separators=(',', ':'), allow_nan=True).encode('utf-8')
+
+def loads(blob: bytes) -> Any:
+    """Desserializa um valor gravado por dumps"""
+    return _decode(json.loads(blob))
+
+
+_GENERATION_SQL = "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'cache_invalidations'"
+
+def _create_private(path: str):
+    """Cria o diretório (0700) e o arquivo (0600) do cache, acessíveis só ao usuário atual"""
+    directory = Path(path).parent
+    if not directory.exists():
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    os.close(fd)
+    try:
+        os.chmod(path, 0o600)
+    except OSError:
+        # Arquivo de outro usuário: o SQLite decide se consegue abrir
+        pass
+
+
+class SharedCache:
+    """
+    Cache com a mesma interface do MemoryCache, guardado em um arquivo SQLite
+
+    Todos os processos do host que abrem o mesmo arquivo compartilham as
+    entradas (serializadas em JSON por dumps), as invalidações, o clear() e
+    as estatísticas. O diretório e o arquivo são criados só para o usuário
+    do processo (0700/0600); o SQLite cria o -wal e o -shm com as mesmas
+    permissões do arquivo. Acertos e horários de uso são acumulados no processo e
+    gravados no máximo uma vez por segundo, para que leituras não disputem
+    o lock de escrita; o despejo é LRU aproximado por esses horários.
+    As invalidações ficam registradas no arquivo (cache_invalidations) para
+    que set(since=...) descarte valores lidos antes de uma escrita feita
+    por qualquer processo.
+
+    Falhas do arquivo (ex: lock ocupado além do timeout) não propagam: a
+    leitura vira miss, a escrita é descartada e o contador 'errors' sobe.
+    """
+
+    _generate_key = MemoryCache._generate_key
+
+    def __init__(self, path: str, max_size: int = 1000, default_ttl: int = 300,
+                 max_bytes: Optional[int] = None, timeout: float = 5.0):
+        """
+        Inicializa o cache
+
+        Args:
+            path (str): Arquivo SQLite compartilhado (criado se não existir)
+            max_size (int): Tamanho máximo do cache
+            default_ttl (int): TTL padrão em segundos
+            max_bytes (int, optional): Orçamento em bytes serializados (None = sem limite)
+            timeout (float): Espera máxima pelo lock de escrita, em segundos
+        """
+        self._path = str(path)
+        self._max_size = max_size
+        self._default_ttl = default_ttl
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._pending: Counter = Counter()
+        self._touched: Dict[str, float] = {}
+        self._last_flush = time.time()
+        self._enabled = True
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão do processo atual (reaberta após um fork)"""
+        if self._conn is None or self._pid != os.getpid():
+            _create_private(self._path)
+            conn = sqlite3.connect(self._path, timeout=self._timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _FORMAT_VERSION:
+                # Entradas de outro formato (ex: pickle) não são lidas: descarta
+                conn.execute("DELETE FROM cache_entries")
+                conn.execute(f"PRAGMA user_version = {_FORMAT_VERSION}")
+            conn.execute("INSERT OR IGNORE INTO cache_stats VALUES ('created_at', ?)", (int(time.time()),))
+            self._conn, self._pid = conn, os.getpid()
+            self._pending.clear()
+            self._touched.clear()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obtém valor do cache
+
+        Args:
+            key (str): Chave do cache
+
+        Returns:
+            Any: Valor armazenado ou None se não encontrado/expirado
+        """
+        if not self._enabled:
+            self._count('misses')
+            return None
+
+        with self._lock:
+            now = time.time()
+            try:
+                row = self._connection().execute(
+                    "SELECT value FROM cache_entries WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                value = loads(row[0]) if row else None
+            except (sqlite3.Error, ValueError, KeyError, TypeError):
+                self._count('errors')
+                row = value = None
+            if row is None:
+                self._count('misses')
+                return None
+            self._touched[key] = now
+            self._count('hits')
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, namespace: Optional[str] = None,
+            tables: Optional[Iterable[str]] = None, keys: Optional[Iterable[Any]] = None,
+            since: Optional[int] = None) -> bool:
+        """
+        Armazena valor no cache (mesmos argumentos de MemoryCache.set)
+
+        Returns:
+            bool: True se armazenado com sucesso
+        """
+        if not self._enabled:
+            return False
+
+        ttl = ttl or self._default_ttl
+        try:
+            blob = dumps(value)
+        except (TypeError, ValueError):
+            # Valor sem representação JSON: fica fora do cache
+            self._count('rejected')
+            return False
+        size = len(blob)
+        tables = list(tables or ())
+        row_keys = [str(k) for k in keys] if keys else [None]
+        dependencies = [(key, table, row_key) for table in tables for row_key in row_keys]
+
+        with self._lock:
+            if self._max_bytes is not None and size > self._max_bytes:
+                self._count('rejected')
+                return False
+            now = time.time()
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if since is not None and self._written_since(conn, since, tables, row_keys if keys else None):
+                        conn.execute("ROLLBACK")
+                        self._count('stale')
+                        return False
+                    conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    self._make_room(conn, size, now)
+                    conn.execute("INSERT INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, blob, now + ttl, now, size, namespace or 'default'))
+                    conn.executemany("INSERT INTO cache_dependencies VALUES (?, ?, ?)", dependencies)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error:
+                self._count('errors')
+                return False
+            self._count('sets')
+            return True
+
+    def _make_room(self, conn: sqlite3.Connection, incoming: int, now: float):
+        """Descarta entradas vencidas e depois as menos usadas até caber `incoming` bytes"""
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        if not self._over_budget(count, total, incoming):
+            return
+        # Vencidas não contam como evictions
+        conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        while count and self._over_budget(count, total, incoming):
+            victims = conn.execute("SELECT key, size FROM cache_entries ORDER BY last_used LIMIT ?",
+                                   (_EVICT_BATCH,)).fetchall()
+            for victim, victim_size in victims:
+                if not self._over_budget(count, total, incoming):
+                    break
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (victim,))
+                self._touched.pop(victim, None)
+                count, total = count - 1, total - victim_size
+                self._pending['evictions'] += 1
+
+    def generation(self) -> Optional[int]:
+        """Geração atual (última invalidação registrada), ou None se o arquivo falhar"""
+        with self._lock:
+            try:
+                return self._connection().execute(_GENERATION_SQL).fetchone()[0]
+            except sqlite3.Error:
+                self._count('errors')
+                return None
+
+    def _written_since(self, conn: sqlite3.Connection, since: int, tables: List[str],
+                       row_keys: Optional[List[str]]) -> bool:
+        """Indica se algum clear() ou invalidação após `since` atinge as tabelas/chaves informadas"""
+        if since < conn.execute(_GENERATION_SQL).fetchone()[0] - _INVALIDATION_LOG_SIZE:
+            # Invalidações já esquecidas: descarta por segurança
+            return True
+        return conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM cache_invalidations WHERE generation > ? AND (tbl = '*' "
+            "OR (tbl IN (SELECT value FROM json_each(?)) AND (row_key IS NULL OR ? IS NULL "
+            "OR row_key IN (SELECT value FROM json_each(?))))))",
+            (since, json.dumps(tables), None if row_keys is None else 1, json.dumps(row_keys or []))
+        ).fetchone()[0] == 1
+
+    def _over_budget(self, count: int, total: int, incoming: int) -> bool:
+        if count >= self._max_size:
+            return True
+        return self._max_bytes is not None and total + incoming > self._max_bytes
+
+    def invalidate(self, table: str, keys: Optional[Iterable[Any]] = None) -> int:
+        """
+        Descarta, em todos os processos, as entradas que dependem de uma tabela alterada
+
+        Args:
+            table (str): Tabela escrita
+            keys (Iterable, optional): Chaves das linhas escritas (ver MemoryCache.invalidate)
+
+        Returns:
+            int: Número de entradas descartadas
+        """
+        if keys is None:
+            where, params = "tbl = ?", (table,)
+        else:
+            where = "tbl = ? AND (row_key IS NULL OR row_key IN (SELECT value FROM json_each(?)))"
+            params = (table, json.dumps([str(k) for k in keys]))
+        written = [None] if keys is None else [str(k) for k in keys]
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("INSERT INTO cache_invalidations (tbl, row_key) VALUES (?, ?)",
+                                     [(table, row_key) for row_key in written])
+                    conn.execute(f"DELETE FROM cache_invalidations WHERE generation <= ({_GENERATION_SQL}) - ?",
+                                 (_INVALIDATION_LOG_SIZE,))
+                    removed = conn.execute(
+                        f"DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_dependencies WHERE {where})",
+                        params
+                    ).rowcount
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error:
+                self._count('errors')
+                return 0
+            self._count('invalidations', removed)
+            return removed
+
+    def clear(self):
+        """Limpa todo o cache (de todos os processos)"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute("DELETE FROM cache_dependencies")
+                    conn.execute("DELETE FROM cache_entries")
+                    conn.execute("INSERT INTO cache_invalidations (tbl, row_key) VALUES ('*', NULL)")
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error:
+                self._count('errors')
+            self._touched.clear()
+
+    def _count(self, name: str, amount: int = 1):
+        """Acumula um contador e grava os pendentes se o intervalo passou"""
+        self._pending[name] += amount
+        if time.time() - self._last_flush >= _FLUSH_SECONDS:
+            self._flush()
+
+    def _flush(self):
+        """Grava no arquivo os contadores e horários de uso acumulados no processo"""
+        pending, touched = self._pending, self._touched
+        self._pending, self._touched = Counter(), {}
+        self._last_flush = time.time()
+        if not pending and not touched:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO cache_stats VALUES (?, ?) "
+                             "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                             [(name, amount) for name, amount in pending.items() if amount])
+            conn.executemany("UPDATE cache_entries SET last_used = ? WHERE key = ? AND last_used < ?",
+                             [(used, key, used) for key, used in touched.items()])
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            # Contadores perdidos não afetam os valores em cache
+            if self._conn is not None and self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache somadas de todos os processos do host"""
+        with self._lock:
+            self._flush()
+            conn = self._connection()
+            stats = {name: 0 for name in _COUNTERS}
+            stats.update(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+            stats['created_at'] = datetime.fromtimestamp(stats['created_at'])
+            stats['current_size'], stats['current_bytes'] = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+            stats['bytes_by_namespace'] = dict(conn.execute(
+                "SELECT namespace, SUM(size) FROM cache_entries GROUP BY namespace").fetchall())
+        stats['max_size'] = self._max_size
+        stats['max_bytes'] = self._max_bytes
+        stats['hit_rate'] = (
+            stats['hits'] / (stats['hits'] + stats['misses'])
+            if (stats['hits'] + stats['misses']) > 0 else 0
+        )
+        stats['enabled'] = self._enabled
+        stats['backend'] = 'sqlite'
+        return stats
+
+    def enable(self):
+        """Habilita o cache (neste processo)"""
+        self._enabled = True
+
+    def disable(self):
+        """Desabilita o cache (neste processo)"""
+        self._enabled = False
+
+    def is_enabled(self) -> bool:
+        """Verifica se o cache está habilitado"""
+        return self._enabled
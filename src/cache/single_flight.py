@@ -0,0 +1,145 @@
+"""
+Coalescência de chamadas concorrentes (single-flight) para cache misses
+"""
+import functools
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+# Intervalo (segundos) em que quem espera confere o próprio prazo e cancelamento
+_WAIT_SLICE = 0.1
+
+
+class _Call:
+    """Execução em andamento de uma chave: os demais chamadores esperam por ela"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # A execução foi interrompida pelo prazo/desconexão de quem a conduzia
+        self.interrupted = False
+
+
+class SingleFlight:
+    """
+    Garante uma única execução por chave entre chamadas concorrentes
+
+    A primeira chamada de uma chave executa a função; as que chegam antes
+    dela terminar esperam e recebem o mesmo resultado (ou a mesma exceção).
+    Chamadas posteriores executam de novo — o cache é quem evita isso.
+    Vale para as threads de um processo.
+
+    O prazo e o cancelamento (src.database.timeouts) são de cada chamador:
+    quem espera desiste no seu próprio prazo ou desconexão, e se a execução
+    for interrompida pelo prazo/desconexão de quem a conduzia, os que
+    esperavam não recebem esse erro — um deles passa a executar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {'executions': 0, 'coalesced': 0, 'retried': 0}
+
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa func(*args, **kwargs) ou aguarda a execução em andamento da mesma chave
+
+        Args:
+            key (str): Chave que identifica chamadas equivalentes
+            func (Callable): Função a executar
+
+        Returns:
+            Any: Resultado da execução (compartilhado entre os chamadores)
+
+        Raises:
+            QueryTimeoutError: Se o prazo de quem espera expirar
+            QueryCancelledError: Se o cliente de quem espera desconectar
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._stats['executions'] += 1
+                else:
+                    self._stats['coalesced'] += 1
+            if leader:
+                return self._lead(key, call, func, args, kwargs)
+            _wait(call)
+            if not call.interrupted:
+                break
+            with self._lock:
+                self._stats['retried'] += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _lead(self, key: str, call: _Call, func: Callable, args: tuple, kwargs: dict) -> Any:
+        # Import local: src.database importa src.cache
+        from src.database.timeouts import QueryInterruptedError, translate_interrupt
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            # Avaliado no contexto de quem conduzia: o prazo/desconexão eram dele
+            call.interrupted = isinstance(translate_interrupt(e), QueryInterruptedError)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retorna execuções, chamadas coalescidas, novas tentativas e chaves em andamento"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats['in_flight'] = len(self._calls)
+            return stats
+
+
+def _wait(call: _Call):
+    """Espera a execução respeitando o prazo e o cancelamento do chamador"""
+    from src.database.timeouts import (
+        QueryCancelledError, QueryTimeoutError, query_cancelled, remaining_time
+    )
+    while True:
+        remaining = remaining_time()
+        if call.done.wait(_WAIT_SLICE if remaining is None else min(_WAIT_SLICE, remaining)):
+            return
+        if query_cancelled():
+            raise QueryCancelledError("Consulta cancelada: o cliente desconectou")
+        if remaining is not None and remaining_time() <= 0:
+            raise QueryTimeoutError("Consulta interrompida: prazo excedido")
+
+
+_group = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    """Retorna o grupo single-flight global (usado pelo decorador)"""
+    return _group
+
+def single_flight(name: Optional[str] = None):
+    """
+    Decorador que coalesce chamadas concorrentes com os mesmos argumentos
+
+    Usado nas consultas com cache: quando várias requisições erram o cache
+    ao mesmo tempo, apenas uma vai ao banco e as demais recebem o resultado.
+
+    Args:
+        name (str, optional): Nome da consulta na chave (padrão: nome da função)
+    """
+    def decorator(func):
+        query_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key_str = json.dumps({'name': query_name, 'args': args, 'kwargs': sorted(kwargs.items())},
+                                 sort_keys=True, default=str)
+            return _group.do(hashlib.md5(key_str.encode()).hexdigest(), func, *args, **kwargs)
+        return wrapper
+    return decorator
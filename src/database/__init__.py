@@ -1,12 +1,25 @@
 # Módulo de banco de dados
-from .connection import get_connection, get_tables, load_table
-from .queries import unified_search_people, search_by_designation, search_by_id_vivo, search_by_address, search_by_ggl_gr, get_dashboard_stats
+from .connection import (
+    get_connection, get_read_connection, get_tables, load_table, load_table_page, get_pool_stats,
+    iter_query_rows, iter_query_chunks, iter_table_chunks, export_table, get_table_schema, bulk_write
+)
+from .queries import unified_search_people, unified_search_people_many, search_by_designation, search_by_id_vivo, search_by_address, search_by_ggl_gr, get_dashboard_stats
 
 __all__ = [
     'get_connection',
+    'get_read_connection',
     'get_tables', 
     'load_table',
+    'load_table_page',
+    'get_pool_stats',
+    'iter_query_rows',
+    'iter_query_chunks',
+    'iter_table_chunks',
+    'export_table',
+    'get_table_schema',
+    'bulk_write',
     'unified_search_people',
+    'unified_search_people_many',
     'search_by_designation',
     'search_by_id_vivo',
     'search_by_address',
@@ -1,21 +1,238 @@
 """
 Módulo de conexão com banco de dados SQLite
 """
+import os
 import sqlite3
+import threading
 import pandas as pd
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from pathlib import Path
 import config
+from src.database.pool import ConnectionPool, PooledConnection
+from src.database.schema import SchemaCatalog, get_catalog
+from src.database.counts import get_count_cache, invalidate_counts
+from src.cache import invalidate_cached_tables
+from src.database.timeouts import install_progress_handler
+from src.database.normalize import install_sql_functions, sync_pending_normalization
+from src.database import indexes
+from src.database.pagination import (
+    InvalidCursorError, decode_cursor, encode_cursor, keyset_predicate, quote_identifier
+)
+
+# Pools de conexões por (arquivo de banco, somente leitura)
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# Valores aceitos para os PRAGMAs textuais do perfil de conexão
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORE_MODES = {"DEFAULT", "FILE", "MEMORY"}
+
+def _pragma_choice(name: str, value: Any, allowed: set) -> str:
+    value = str(value).upper()
+    if value not in allowed:
+        raise ValueError(f"Valor inválido para PRAGMA {name}: {value}")
+    return value
+
+def apply_connection_profile(conn: sqlite3.Connection, profile: Optional[Dict[str, Any]] = None):
+    """
+    Aplica o perfil de conexão (PRAGMAs) a uma conexão recém-criada
+    
+    Chaves ausentes ou None mantêm o padrão do SQLite.
+    
+    Args:
+        conn (sqlite3.Connection): Conexão a configurar
+        profile (dict, optional): Perfil (padrão: DATABASE_CONFIG["connection_profile"])
+    """
+    if profile is None:
+        profile = config.DATABASE_CONFIG.get("connection_profile", {})
+    
+    # busy_timeout primeiro para que a troca de journal_mode espere por locks
+    if profile.get("busy_timeout_ms") is not None:
+        conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout_ms'])}")
+    if profile.get("journal_mode"):
+        mode = _pragma_choice("journal_mode", profile["journal_mode"], _JOURNAL_MODES)
+        conn.execute(f"PRAGMA journal_mode = {mode}")
+    if profile.get("synchronous"):
+        mode = _pragma_choice("synchronous", profile["synchronous"], _SYNCHRONOUS_MODES)
+        conn.execute(f"PRAGMA synchronous = {mode}")
+    if profile.get("cache_size") is not None:
+        conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+    if profile.get("mmap_size") is not None:
+        conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+    if profile.get("temp_store"):
+        mode = _pragma_choice("temp_store", profile["temp_store"], _TEMP_STORE_MODES)
+        conn.execute(f"PRAGMA temp_store = {mode}")
+
+def _create_connection(db_path: str) -> PooledConnection:
+    """Abre uma nova conexão física para o pool, já com o perfil aplicado, o controle de prazo e as funções SQL"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, factory=PooledConnection)
+    try:
+        apply_connection_profile(conn)
+        install_progress_handler(conn)
+        install_sql_functions(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def _create_read_connection(db_path: str) -> PooledConnection:
+    """
+    Abre uma conexão somente leitura (`mode=ro` + `query_only`)
+    
+    O journal_mode não é alterado aqui: ele é persistido no arquivo pelas
+    conexões de escrita.
+    """
+    uri = f"{Path(db_path).as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=PooledConnection)
+    try:
+        profile = dict(config.DATABASE_CONFIG.get("connection_profile", {}))
+        profile.pop("journal_mode", None)
+        apply_connection_profile(conn, profile)
+        conn.execute("PRAGMA query_only = ON")
+        install_progress_handler(conn)
+        install_sql_functions(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def get_pool(db_path: Optional[str] = None, read_only: bool = False) -> ConnectionPool:
+    """
+    Obtém (criando se necessário) o pool de conexões do banco
+    
+    Args:
+        db_path (str, optional): Caminho do banco (padrão: configuração)
+        read_only (bool): Se True, retorna o pool de conexões somente leitura
+        
+    Returns:
+        ConnectionPool: Pool de conexões do banco
+    """
+    db_path = os.path.abspath(db_path or config.get_config("database", "path"))
+    key = (db_path, read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            factory = _create_read_connection if read_only else _create_connection
+            pool = ConnectionPool(
+                lambda: factory(db_path),
+                max_size=config.DATABASE_CONFIG["max_connections"],
+                max_idle=config.PERFORMANCE_CONFIG["connection_pool_size"],
+                timeout=config.DATABASE_CONFIG["timeout"]
+            )
+            _pools[key] = pool
+        return pool
 
 def get_connection():
     """
-    Obtém conexão com o banco de dados
+    Obtém conexão com o banco de dados a partir do pool
+    
+    `conn.close()` (ou o fim de um bloco `with conn:`) devolve a conexão
+    ao pool para reutilização.
     
     Returns:
         sqlite3.Connection: Conexão com o banco
     """
-    db_path = config.get_config("database", "path")
-    return sqlite3.connect(db_path)
+    return get_pool().acquire()
+
+def get_read_connection():
+    """
+    Obtém conexão somente leitura a partir do pool de leitura
+    
+    Usada pelas buscas e consultas: nunca adquire locks de escrita e
+    qualquer tentativa de escrita falha com sqlite3.OperationalError.
+    
+    Returns:
+        sqlite3.Connection: Conexão somente leitura
+    """
+    return get_pool(read_only=True).acquire()
+
+def get_pool_stats(read_only: bool = False) -> Dict[str, Any]:
+    """
+    Retorna estatísticas do pool de conexões
+    
+    Args:
+        read_only (bool): Se True, retorna as estatísticas do pool de leitura
+        
+    Returns:
+        dict: Conexões abertas, em uso, ociosas e tempos de espera
+    """
+    return get_pool(read_only=read_only).get_stats()
+
+def close_pools():
+    """Fecha todas as conexões ociosas dos pools e descarta os pools"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+def get_schema_catalog(db_path: Optional[str] = None) -> SchemaCatalog:
+    """
+    Obtém o catálogo de metadados (colunas, PK, índices) do banco
+    
+    Args:
+        db_path (str, optional): Caminho do banco (padrão: configuração)
+        
+    Returns:
+        SchemaCatalog: Catálogo invalidado automaticamente pelo PRAGMA schema_version
+    """
+    return get_catalog(os.path.abspath(db_path or config.get_config("database", "path")))
+
+def get_table_schema(table: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna os metadados em cache de uma tabela
+    
+    Args:
+        table (str): Nome da tabela
+        
+    Returns:
+        dict: Metadados da tabela (ver SchemaCatalog.get_table) ou None
+    """
+    with get_read_connection() as conn:
+        return get_schema_catalog().get_table(conn, table)
+
+def count_rows(table: str, where: str = "", params: Sequence[Any] = ()) -> Tuple[int, bool]:
+    """
+    Conta registros para paginação usando o cache de contagens
+    
+    Args:
+        table (str): Nome da tabela
+        where (str): Cláusula WHERE completa (ou vazia)
+        params (Sequence): Parâmetros do filtro
+        
+    Returns:
+        tuple: (total, exato) — exato=False quando o total foi estimado
+    """
+    with get_read_connection() as conn:
+        return _count_cache().count(conn, table, where, params)
+
+def get_count_stats() -> Dict[str, Any]:
+    """Retorna estatísticas do cache de contagens do banco"""
+    return _count_cache().get_stats()
+
+def _count_cache():
+    return get_count_cache(os.path.abspath(config.get_config("database", "path")))
+
+def ensure_indexes() -> Dict[str, List[str]]:
+    """
+    Aplica o registro de índices (ver indexes.INDEX_REGISTRY) ao banco
+    
+    Returns:
+        dict: Nomes dos índices em 'created', 'existing' e 'skipped'
+    """
+    with get_connection() as conn:
+        return indexes.ensure_indexes(conn)
+
+def get_index_report() -> List[Dict[str, Any]]:
+    """
+    Retorna os índices do banco e se as consultas executadas os usam
+    
+    Returns:
+        list: Um item por índice (ver indexes.get_index_report)
+    """
+    with get_read_connection() as conn:
+        return indexes.get_index_report(conn)
 
 def get_tables() -> List[str]:
     """
@@ -24,14 +241,14 @@ def get_tables() -> List[str]:
     Returns:
         List[str]: Lista de nomes das tabelas
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [table[0] for table in cursor.fetchall()]
-    conn.close()
-    return tables
+    with get_read_connection() as conn:
+        tables = list(get_schema_catalog().get_tables(conn))
+    # Tabelas internas do SQLite e as mantidas pelos índices de busca não são dados do usuário
+    return [table for table in tables
+            if not table.startswith("sqlite_") and not indexes.is_derived_table(table)]
 
-def load_table(table: str, limit: int = 100, offset: int = 0) -> pd.DataFrame:
+def load_table(table: str, limit: int = 100, offset: int = 0,
+               cursor: Optional[str] = None) -> pd.DataFrame:
     """
     Carrega dados de uma tabela específica
     
@@ -39,37 +256,259 @@ def load_table(table: str, limit: int = 100, offset: int = 0) -> pd.DataFrame:
         table (str): Nome da tabela
         limit (int): Limite de registros a carregar
         offset (int): Offset inicial
+        cursor (str, optional): Token de paginação (ignora offset quando informado)
         
     Returns:
-        pd.DataFrame: DataFrame com os dados da tabela
+        pd.DataFrame: DataFrame com os dados da tabela; com cursor, os tokens
+        da próxima página e da anterior ficam em df.attrs
     """
-    conn = get_connection()
-    df = pd.read_sql_query(f"SELECT * FROM {table} LIMIT {limit} OFFSET {offset}", conn)
-    conn.close()
+    if cursor is None:
+        with get_read_connection() as conn:
+            df = pd.read_sql_query(f"SELECT * FROM {table} LIMIT {limit} OFFSET {offset}", conn)
+        return df
+    
+    page = load_table_page(table, limit=limit, cursor=cursor)
+    df = pd.DataFrame(page['rows'], columns=page['columns'])
+    df.attrs['next_cursor'] = page['next_cursor']
+    df.attrs['prev_cursor'] = page['prev_cursor']
     return df
 
-def get_table_info(table: str) -> dict:
+def load_table_page(table: str, limit: int = 100, offset: int = 0, cursor: Optional[str] = None,
+                    order_by: Optional[str] = None, order_dir: Optional[str] = 'asc',
+                    search: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
     """
-    Retorna informações sobre uma tabela específica
+    Carrega uma página de uma tabela com paginação por cursor (keyset)
+    
+    A ordenação é sempre (order_by, rowid), então cada página custa o mesmo
+    independente da profundidade. O modo offset continua disponível para
+    compatibilidade e também devolve tokens para seguir por cursor.
     
     Args:
         table (str): Nome da tabela
+        limit (int): Registros por página
+        offset (int): Offset inicial (usado apenas sem cursor)
+        cursor (str, optional): Token next_cursor/prev_cursor de uma página anterior
+        order_by (str, optional): Coluna de ordenação
+        order_dir (str, optional): 'asc' ou 'desc'
+        search (str, optional): Texto buscado nas colunas de texto
+        include_total (bool): Se False, não calcula o total (total=None)
         
     Returns:
-        dict: Informações da tabela (colunas, tipos, etc.)
+        dict: columns, rows, total, total_exact, next_cursor e prev_cursor
+    
+    Raises:
+        InvalidCursorError: Se o cursor for inválido ou de outra ordenação
+    """
+    with get_read_connection() as conn:
+        db_cursor = conn.cursor()
+        schema = get_schema_catalog().get_table(conn, table)
+        all_columns = schema['column_names'] if schema else []
+        text_columns = schema['text_columns'] if schema else []
+        
+        order_col = order_by if order_by in all_columns else None
+        descending = bool(order_dir and order_dir.lower() == 'desc')
+        
+        # Filtro de busca
+        conditions = []
+        params = []
+        if search and text_columns:
+            conditions.append("(" + " OR ".join(f"{quote_identifier(col)} LIKE ?" for col in text_columns) + ")")
+            params.extend([f"%{search}%"] * len(text_columns))
+        
+        total = total_exact = None
+        if include_total:
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            total, total_exact = _count_cache().count(conn, table, where, params)
+        
+        # Posição do cursor
+        backward = False
+        if cursor:
+            state = decode_cursor(cursor)
+            if state.get('o') != order_col or bool(state.get('d')) != descending:
+                raise InvalidCursorError("Cursor de paginação não corresponde à ordenação informada")
+            backward = bool(state.get('b'))
+            predicate, predicate_params = keyset_predicate(
+                order_col, state.get('v'), state['r'], after=not backward, descending=descending
+            )
+            conditions.append(predicate)
+            params.extend(predicate_params)
+        
+        # Página anterior: percorre na ordem inversa e reverte o resultado
+        scan_dir = 'DESC' if descending != backward else 'ASC'
+        order_clause = f"ORDER BY rowid {scan_dir}"
+        if order_col is not None:
+            order_clause = f"ORDER BY {quote_identifier(order_col)} {scan_dir}, rowid {scan_dir}"
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT *, rowid AS __cursor_rowid__ FROM {quote_identifier(table)} {where} {order_clause} LIMIT ?"
+        query_params = params + [limit + 1]
+        if offset and not cursor:
+            query += " OFFSET ?"
+            query_params.append(offset)
+        db_cursor.execute(query, query_params)
+        rows = db_cursor.fetchall()
+        columns = [desc[0] for desc in db_cursor.description][:-1]
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+    
+    def token(row, before: bool) -> str:
+        state = {'o': order_col, 'd': descending, 'r': row[-1], 'b': before}
+        if order_col is not None:
+            state['v'] = row[all_columns.index(order_col)]
+        return encode_cursor(state)
+    
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backward:
+            next_cursor = token(rows[-1], before=False)
+        if (backward and has_more) or (not backward and (cursor or offset)):
+            prev_cursor = token(rows[0], before=True)
+    
+    return {
+        'columns': columns,
+        'rows': [dict(zip(columns, row[:-1])) for row in rows],
+        'total': total,
+        'total_exact': total_exact,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor
+    }
+
+def iter_query_rows(query: str, params: Optional[tuple] = None,
+                    batch_size: Optional[int] = None) -> Iterator[Tuple[List[str], List[tuple]]]:
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    Executa uma query e entrega o resultado em lotes, sem materializá-lo
     
-    # Informações das colunas
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = cursor.fetchall()
+    A conexão de leitura fica retirada do pool enquanto o gerador estiver
+    ativo e é devolvida ao final (ou quando o gerador for fechado).
     
-    # Contagem de registros
-    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-    count = cursor.fetchone()[0]
+    Args:
+        query (str): Query SQL a ser executada
+        params (tuple, optional): Parâmetros da query
+        batch_size (int, optional): Linhas por lote (padrão: PERFORMANCE_CONFIG["batch_size"])
+        
+    Yields:
+        tuple: (nomes das colunas, lista de linhas do lote)
+    """
+    batch_size = batch_size or config.PERFORMANCE_CONFIG["batch_size"]
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params or ())
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finally:
+            cursor.close()
+
+def iter_query_chunks(query: str, params: Optional[tuple] = None,
+                      batch_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Executa uma query e entrega o resultado em DataFrames de até batch_size linhas
     
-    conn.close()
+    Args:
+        query (str): Query SQL a ser executada
+        params (tuple, optional): Parâmetros da query
+        batch_size (int, optional): Linhas por bloco (padrão: PERFORMANCE_CONFIG["batch_size"])
+        
+    Yields:
+        pd.DataFrame: Bloco do resultado
+    """
+    for columns, rows in iter_query_rows(query, params, batch_size):
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+def iter_table_chunks(table: str, batch_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Percorre uma tabela inteira em blocos de DataFrame
+    
+    Args:
+        table (str): Nome da tabela
+        batch_size (int, optional): Linhas por bloco (padrão: PERFORMANCE_CONFIG["batch_size"])
+        
+    Yields:
+        pd.DataFrame: Bloco da tabela
+    """
+    return iter_query_chunks(f"SELECT * FROM {quote_identifier(table)}", batch_size=batch_size)
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+_EXCEL_MAX_ROWS = 1048576
+
+def export_table(table: str, filepath: str, file_format: str = "csv",
+                 batch_size: Optional[int] = None) -> int:
+    """
+    Exporta uma tabela inteira para CSV ou Excel com memória constante
+    
+    Os dados são lidos e gravados bloco a bloco; no Excel a planilha é
+    escrita em modo write-only e continua em uma nova aba ao atingir o
+    limite de linhas.
+    
+    Args:
+        table (str): Nome da tabela
+        filepath (str): Caminho do arquivo de saída
+        file_format (str): 'csv' ou 'excel'
+        batch_size (int, optional): Linhas por bloco
+        
+    Returns:
+        int: Número de registros exportados
+    """
+    if file_format not in ("csv", "excel"):
+        raise ValueError(f"Formato de exportação inválido: {file_format}")
+    
+    query = f"SELECT * FROM {quote_identifier(table)}"
+    with get_read_connection() as conn:
+        columns = [desc[0] for desc in conn.execute(f"{query} LIMIT 0").description]
+    total = 0
+    
+    if file_format == "csv":
+        pd.DataFrame(columns=columns).to_csv(filepath, index=False)
+        for chunk in iter_query_chunks(query, batch_size=batch_size):
+            chunk.to_csv(filepath, mode='a', header=False, index=False)
+            total += len(chunk)
+        return total
+    
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(table[:31])
+    sheet.append(columns)
+    sheet_rows = 1
+    for _, rows in iter_query_rows(query, batch_size=batch_size):
+        for row in rows:
+            if sheet_rows >= _EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"{table[:27]}_{len(workbook.worksheets) + 1}")
+                sheet.append(columns)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        total += len(rows)
+    workbook.save(filepath)
+    return total
+
+def get_table_info(table: str) -> dict:
+    """
+    Retorna informações sobre uma tabela específica
+    
+    Args:
+        table (str): Nome da tabela
+        
+    Returns:
+        dict: Informações da tabela (colunas, tipos, etc.)
+    """
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Informações das colunas (catálogo em cache)
+        schema = get_schema_catalog().get_table(conn, table)
+        columns = schema['columns'] if schema else []
+        
+        # Contagem de registros
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        count = cursor.fetchone()[0]
     
     return {
         'name': table,
@@ -88,74 +527,221 @@ def execute_query(query: str, params: Optional[tuple] = None) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Resultado da query
     """
-    conn = get_connection()
-    try:
+    with get_read_connection() as conn:
         if params:
             df = pd.read_sql_query(query, conn, params=params)
         else:
             df = pd.read_sql_query(query, conn)
         return df
-    finally:
-        conn.close()
 
 def insert_row(table: str, data: dict) -> int:
     """
     Insere um registro na tabela e retorna o id inserido
     """
-    conn = get_connection()
-    cursor = conn.cursor()
     columns = ', '.join(data.keys())
     placeholders = ', '.join(['?'] * len(data))
     values = tuple(data.values())
     sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-    cursor.execute(sql, values)
-    conn.commit()
-    rowid = cursor.lastrowid
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, values)
+        rowid = cursor.lastrowid
+        sync_pending_normalization(conn, [table])
+    invalidate_counts(table)
+    invalidate_cached_tables(table)
     return rowid
 
 def update_row(table: str, pk_col: str, pk_value: any, data: dict) -> int:
     """
     Atualiza um registro na tabela pela chave primária
     """
-    conn = get_connection()
-    cursor = conn.cursor()
     set_clause = ', '.join([f"{k}=?" for k in data.keys()])
     values = tuple(data.values()) + (pk_value,)
     sql = f"UPDATE {table} SET {set_clause} WHERE {pk_col} = ?"
-    cursor.execute(sql, values)
-    conn.commit()
-    affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, values)
+        affected = cursor.rowcount
+        sync_pending_normalization(conn, [table])
+    invalidate_counts(table)
+    invalidate_cached_tables(table)
     return affected
 
 def delete_row(table: str, pk_col: str, pk_value: any) -> int:
     """
     Remove um registro da tabela pela chave primária
     """
-    conn = get_connection()
-    cursor = conn.cursor()
     sql = f"DELETE FROM {table} WHERE {pk_col} = ?"
-    cursor.execute(sql, (pk_value,))
-    conn.commit()
-    affected = cursor.rowcount
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, (pk_value,))
+        affected = cursor.rowcount
+        sync_pending_normalization(conn, [table])
+    invalidate_counts(table)
+    invalidate_cached_tables(table)
     return affected
 
+# Linhas por consulta de existência (limite de variáveis do SQLite: 999)
+_BULK_LOOKUP_CHUNK = 400
+
+def bulk_write(table: str, inserts: Optional[List[dict]] = None,
+               updates: Optional[List[Tuple[Any, dict]]] = None,
+               deletes: Optional[List[Any]] = None,
+               pk_col: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aplica inserções, atualizações e exclusões em lote numa única transação
+    
+    Linhas com o mesmo conjunto de colunas são enviadas juntas com
+    executemany(); se um lote falhar, ele é refeito linha a linha (com
+    SAVEPOINT) para apontar quais registros falharam sem perder os demais.
+    
+    Args:
+        table (str): Nome da tabela
+        inserts (list, optional): Registros a inserir (dicionários coluna -> valor)
+        updates (list, optional): Pares (valor da PK, dicionário de alterações)
+        deletes (list, optional): Valores de PK a remover
+        pk_col (str, optional): Coluna de chave primária (padrão: a da tabela)
+        
+    Returns:
+        dict: Totais por status e 'results' com o resultado de cada linha
+        (operation, index, status e, em caso de falha, error)
+    """
+    inserts = inserts or []
+    updates = updates or []
+    deletes = deletes or []
+    if (updates or deletes) and pk_col is None:
+        pk_col = get_primary_key_column(table)
+    
+    quoted_table = quote_identifier(table)
+    results = []
+    
+    with get_connection() as conn:
+        # Reserva o lock de escrita já no início para não disputá-lo no meio do lote
+        conn.execute("BEGIN IMMEDIATE")
+        
+        # Inserções, agrupadas pelo conjunto de colunas
+        insert_results = [None if row else {'status': 'error', 'error': 'Registro vazio'} for row in inserts]
+        for columns, indexes in _group_by_columns(inserts).items():
+            sql = (f"INSERT INTO {quoted_table} ({', '.join(quote_identifier(c) for c in columns)}) "
+                   f"VALUES ({', '.join(['?'] * len(columns))})")
+            params = [tuple(inserts[i][c] for c in columns) for i in indexes]
+            _executemany_rows(conn, sql, params, indexes, insert_results, 'inserted')
+        results.extend(_with_operation('insert', insert_results))
+        
+        # Atualizações: apenas PKs existentes; as demais viram not_found
+        update_results = [None] * len(updates)
+        existing = _existing_keys(conn, quoted_table, pk_col, [pk for pk, _ in updates])
+        patches = [dict(patch) for _, patch in updates]
+        for i in range(len(updates)):
+            if i not in existing:
+                update_results[i] = {'status': 'not_found'}
+            elif not patches[i]:
+                update_results[i] = {'status': 'error', 'error': 'Nenhum campo para atualizar'}
+        pending = [patches[i] if update_results[i] is None else {} for i in range(len(updates))]
+        for columns, indexes in _group_by_columns(pending).items():
+            set_clause = ', '.join(f"{quote_identifier(c)} = ?" for c in columns)
+            sql = f"UPDATE {quoted_table} SET {set_clause} WHERE {quote_identifier(pk_col)} = ?"
+            params = [tuple(patches[i][c] for c in columns) + (updates[i][0],) for i in indexes]
+            _executemany_rows(conn, sql, params, indexes, update_results, 'updated')
+        results.extend(_with_operation('update', update_results))
+        
+        # Exclusões
+        delete_results = [None] * len(deletes)
+        existing = _existing_keys(conn, quoted_table, pk_col, deletes)
+        indexes = [i for i in range(len(deletes)) if i in existing]
+        for i in range(len(deletes)):
+            if i not in existing:
+                delete_results[i] = {'status': 'not_found'}
+        if indexes:
+            sql = f"DELETE FROM {quoted_table} WHERE {quote_identifier(pk_col)} = ?"
+            _executemany_rows(conn, sql, [(deletes[i],) for i in indexes], indexes, delete_results, 'deleted')
+        results.extend(_with_operation('delete', delete_results))
+        sync_pending_normalization(conn, [table])
+    
+    invalidate_counts(table)
+    invalidate_cached_tables(table)
+    
+    summary = {'total': len(results)}
+    for status in ('inserted', 'updated', 'deleted', 'not_found', 'error'):
+        summary[status] = sum(1 for result in results if result['status'] == status)
+    summary['results'] = results
+    return summary
+
+def bulk_insert_rows(table: str, rows: List[dict]) -> Dict[str, Any]:
+    """
+    Insere vários registros numa única transação (ver bulk_write)
+    """
+    return bulk_write(table, inserts=rows)
+
+def bulk_update_rows(table: str, pk_col: str, updates: List[Tuple[Any, dict]]) -> Dict[str, Any]:
+    """
+    Atualiza vários registros pela chave primária numa única transação (ver bulk_write)
+    """
+    return bulk_write(table, updates=updates, pk_col=pk_col)
+
+def bulk_delete_rows(table: str, pk_col: str, pk_values: List[Any]) -> Dict[str, Any]:
+    """
+    Remove vários registros pela chave primária numa única transação (ver bulk_write)
+    """
+    return bulk_write(table, deletes=pk_values, pk_col=pk_col)
+
+def _group_by_columns(rows: List[dict]) -> Dict[Tuple[str, ...], List[int]]:
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, row in enumerate(rows):
+        if row:
+            groups.setdefault(tuple(row.keys()), []).append(index)
+    return groups
+
+def _existing_keys(conn: sqlite3.Connection, quoted_table: str, pk_col: str,
+                   pk_values: List[Any]) -> set:
+    """Retorna os índices de pk_values que existem na tabela"""
+    found = set()
+    for start in range(0, len(pk_values), _BULK_LOOKUP_CHUNK):
+        chunk = pk_values[start:start + _BULK_LOOKUP_CHUNK]
+        values = ', '.join(['(?, ?)'] * len(chunk))
+        params = [p for i, pk in enumerate(chunk, start) for p in (i, pk)]
+        # A comparação usa a afinidade da coluna da PK (ex.: "10" casa com 10)
+        rows = conn.execute(
+            f"SELECT v.column1 FROM (VALUES {values}) AS v "
+            f"JOIN {quoted_table} t ON t.{quote_identifier(pk_col)} = v.column2",
+            params
+        ).fetchall()
+        found.update(row[0] for row in rows)
+    return found
+
+def _executemany_rows(conn: sqlite3.Connection, sql: str, params: List[tuple],
+                      indexes: List[int], results: list, status: str):
+    """Executa um lote; em caso de erro refaz linha a linha para isolar as falhas"""
+    conn.execute("SAVEPOINT bulk_batch")
+    try:
+        conn.executemany(sql, params)
+        conn.execute("RELEASE bulk_batch")
+        for index in indexes:
+            results[index] = {'status': status}
+        return
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO bulk_batch")
+        conn.execute("RELEASE bulk_batch")
+    
+    for index, row_params in zip(indexes, params):
+        conn.execute("SAVEPOINT bulk_row")
+        try:
+            conn.execute(sql, row_params)
+            results[index] = {'status': status}
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO bulk_row")
+            results[index] = {'status': 'error', 'error': str(e)}
+        conn.execute("RELEASE bulk_row")
+
+def _with_operation(operation: str, results: list) -> List[Dict[str, Any]]:
+    return [{'operation': operation, 'index': index, **result} for index, result in enumerate(results)]
+
 def get_primary_key_column(table: str) -> str:
     """
     Retorna o nome da coluna de chave primária da tabela
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = cursor.fetchall()
-    pk_col = None
-    for col in columns:
-        if col[5] == 1:  # 6a coluna = pk
-            pk_col = col[1]
-            break
-    conn.close()
+    schema = get_table_schema(table)
+    pk_col = schema['primary_key'][0] if schema and schema['primary_key'] else None
     if not pk_col:
         raise Exception(f"Tabela {table} não possui chave primária")
     return pk_col 
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Serviço de contagem de registros para paginação (totais em cache ou estimados)
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+import config
+
+from src.database.pagination import quote_identifier
+
+
+class CountCache:
+    """
+    Totais de COUNT(*) por (tabela, filtro) de um banco
+
+    Totais exatos ficam em cache até uma escrita na tabela (invalidate) ou
+    até o TTL expirar (escritas feitas por outros processos). Em tabelas
+    maiores que PERFORMANCE_CONFIG["exact_count_max_rows"] — segundo o
+    sqlite_stat1 — o total é estimado em vez de contado.
+
+    Filtros distintos geram entradas distintas, então o cache é LRU limitado
+    a PERFORMANCE_CONFIG["count_cache_max_entries"]. A contagem roda fora do
+    lock; um contador de geração por tabela impede que um total calculado
+    antes de uma invalidação seja gravado depois dela.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[int, bool, float]]" = OrderedDict()
+        # Gerações por tabela e global (invalidate(None)), incrementadas a cada invalidação
+        self._generations: Dict[str, int] = {}
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'estimated': 0, 'invalidations': 0,
+                       'evictions': 0, 'discarded': 0}
+
+    def count(self, conn: sqlite3.Connection, table: str, where: str = "",
+              params: Sequence[Any] = ()) -> Tuple[int, bool]:
+        """
+        Conta os registros de uma tabela que atendem a um filtro
+
+        Args:
+            conn (sqlite3.Connection): Conexão usada em caso de cache miss
+            table (str): Nome da tabela
+            where (str): Cláusula WHERE completa (ou vazia)
+            params (Sequence): Parâmetros do filtro
+
+        Returns:
+            tuple: (total, exato) — exato=False quando o total foi estimado
+        """
+        key = (table, where, tuple(params))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0], entry[1]
+            self._stats['misses'] += 1
+            generation = self._generation_of(table)
+
+        total, exact = self._compute(conn, table, where, params)
+
+        ttl = config.PERFORMANCE_CONFIG["count_cache_ttl"]
+        with self._lock:
+            if not exact:
+                self._stats['estimated'] += 1
+            if self._generation_of(table) != generation:
+                # Houve escrita durante a contagem: o total pode estar desatualizado
+                self._stats['discarded'] += 1
+                return total, exact
+            self._entries[key] = (total, exact, now + ttl)
+            self._entries.move_to_end(key)
+            self._evict(now)
+        return total, exact
+
+    def _generation_of(self, table: str) -> Tuple[int, int]:
+        return self._generation, self._generations.get(table, 0)
+
+    def _evict(self, now: float):
+        """Remove os totais vencidos e, acima do limite, os menos usados"""
+        max_entries = config.PERFORMANCE_CONFIG["count_cache_max_entries"]
+        if len(self._entries) <= max_entries:
+            return
+        for key in [key for key, entry in self._entries.items() if entry[2] <= now]:
+            del self._entries[key]
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, table: Optional[str] = None):
+        """
+        Descarta os totais de uma tabela (ou de todas)
+
+        Args:
+            table (str, optional): Nome da tabela; None descarta tudo
+        """
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._generation += 1
+            else:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in [key for key in self._entries if key[0] == table]:
+                    del self._entries[key]
+            self._stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache de contagens"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats['entries'] = len(self._entries)
+            return stats
+
+    def _compute(self, conn: sqlite3.Connection, table: str, where: str,
+                 params: Sequence[Any]) -> Tuple[int, bool]:
+        quoted = quote_identifier(table)
+        estimated_rows = estimate_table_rows(conn, table)
+        if estimated_rows is None or estimated_rows <= config.PERFORMANCE_CONFIG["exact_count_max_rows"]:
+            total = conn.execute(f"SELECT COUNT(*) FROM {quoted} {where}", list(params)).fetchone()[0]
+            return total, True
+
+        if not where:
+            return estimated_rows, False
+
+        # Seletividade do filtro medida em uma amostra e aplicada ao total estimado
+        sample_size = config.PERFORMANCE_CONFIG["count_sample_rows"]
+        sampled, matched = conn.execute(
+            f"SELECT (SELECT COUNT(*) FROM (SELECT 1 FROM {quoted} LIMIT ?)), "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM {quoted} LIMIT ?) {where})",
+            [sample_size, sample_size] + list(params)
+        ).fetchone()
+        if not sampled:
+            return 0, False
+        return int(round(matched * estimated_rows / sampled)), False
+
+
+def estimate_table_rows(conn: sqlite3.Connection, table: str) -> Optional[int]:
+    """
+    Lê o número de linhas da tabela registrado pelo ANALYZE (sqlite_stat1)
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        table (str): Nome da tabela
+
+    Returns:
+        int: Número estimado de linhas, ou None se não houver estatísticas
+    """
+    try:
+        rows = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ?", (table,)).fetchall()
+    except sqlite3.OperationalError:
+        # ANALYZE nunca foi executado: sqlite_stat1 não existe
+        return None
+    estimates = [int(match.group()) for (stat,) in rows
+                 if stat and (match := re.match(r"\d+", stat))]
+    return max(estimates) if estimates else None
+
+
+# Um cache de contagens por arquivo de banco
+_caches: Dict[str, CountCache] = {}
+_caches_lock = threading.Lock()
+
+def get_count_cache(db_path: str) -> CountCache:
+    """
+    Obtém (criando se necessário) o cache de contagens de um banco
+
+    Args:
+        db_path (str): Caminho absoluto do banco
+
+    Returns:
+        CountCache: Cache de contagens do banco
+    """
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = CountCache()
+            _caches[db_path] = cache
+        return cache
+
+def invalidate_counts(table: Optional[str] = None):
+    """
+    Descarta os totais em cache de uma tabela após uma escrita
+
+    Args:
+        table (str, optional): Tabela alterada; None descarta todos os totais
+    """
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.invalidate(table)
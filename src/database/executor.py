@@ -0,0 +1,227 @@
+"""
+Executores dedicados para o acesso bloqueante ao banco a partir de código async
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import config
+from src.database.timeouts import (
+    get_disconnect_waiter, query_cancellation, query_deadline, translate_interrupt
+)
+
+
+class DatabaseExecutor:
+    """Pool de threads limitado para chamadas bloqueantes (sqlite3/pandas)"""
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Inicializa o executor
+
+        Args:
+            name (str): Nome do executor (usado nas métricas e nas threads)
+            max_workers (int): Número máximo de threads
+        """
+        self.name = name
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix=f"db-{name}")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'max_queue_depth': 0,
+            'queue_wait_total_ms': 0.0,
+            'queue_wait_max_ms': 0.0,
+            'run_time_total_ms': 0.0
+        }
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Agenda uma chamada bloqueante no executor
+
+        O contexto (contextvars) de quem chamou é propagado para a thread.
+
+        Returns:
+            Future: Future com o resultado da chamada
+        """
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._stats['submitted'] += 1
+            if self._queued > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = self._queued
+
+        def task():
+            started_at = time.perf_counter()
+            waited_ms = (started_at - enqueued_at) * 1000
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._stats['queue_wait_total_ms'] += waited_ms
+                if waited_ms > self._stats['queue_wait_max_ms']:
+                    self._stats['queue_wait_max_ms'] = waited_ms
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._stats['completed'] += 1
+                    if failed:
+                        self._stats['failed'] += 1
+                    self._stats['run_time_total_ms'] += (time.perf_counter() - started_at) * 1000
+
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, task)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        # Tarefas canceladas antes de iniciar nunca executam task()
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa uma chamada bloqueante sem bloquear o event loop
+
+        Returns:
+            Any: Resultado de func(*args, **kwargs)
+        """
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do executor"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats['name'] = self.name
+            stats['max_workers'] = self._max_workers
+            stats['queue_depth'] = self._queued
+            stats['active'] = self._active
+            stats['queue_wait_avg_ms'] = (
+                stats['queue_wait_total_ms'] / (stats['completed'] + self._active)
+                if (stats['completed'] + self._active) > 0 else 0
+            )
+            return stats
+
+    def shutdown(self, wait: bool = True):
+        """Encerra as threads do executor"""
+        self._executor.shutdown(wait=wait)
+
+
+# Executores globais: leituras escalam com as threads; escritas são poucas
+# porque o SQLite admite um único escritor por vez
+_executors: Dict[str, DatabaseExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> DatabaseExecutor:
+    """
+    Obtém (criando se necessário) o executor 'read' ou 'write'
+
+    Args:
+        name (str): Nome do executor ('read' ou 'write')
+
+    Returns:
+        DatabaseExecutor: Executor solicitado
+    """
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            workers = config.PERFORMANCE_CONFIG[f"db_{name}_workers"]
+            executor = DatabaseExecutor(name, workers)
+            _executors[name] = executor
+        return executor
+
+async def run_read(func: Callable, *args, **kwargs) -> Any:
+    """Executa uma leitura bloqueante no executor de leitura (com prazo e cancelamento)"""
+    return await _run_with_deadline(get_executor("read"), func, args, kwargs)
+
+async def run_write(func: Callable, *args, **kwargs) -> Any:
+    """Executa uma escrita bloqueante no executor de escrita (com prazo e cancelamento)"""
+    return await _run_with_deadline(get_executor("write"), func, args, kwargs)
+
+async def run_export(func: Callable, *args, **kwargs) -> Any:
+    """
+    Executa uma exportação no executor de leitura
+
+    Exportações em blocos duram o quanto a tabela exigir: usam o prazo
+    próprio PERFORMANCE_CONFIG["export_timeout_seconds"] (0 = sem prazo) em
+    vez do prazo das consultas. O cancelamento por desconexão continua valendo.
+    """
+    return await _run_with_deadline(get_executor("read"), func, args, kwargs,
+                                    config.PERFORMANCE_CONFIG["export_timeout_seconds"])
+
+async def _run_with_deadline(executor: DatabaseExecutor, func: Callable, args: tuple, kwargs: dict,
+                             timeout: Optional[float] = None) -> Any:
+    """
+    Executa a chamada com o prazo `timeout` (padrão: PERFORMANCE_CONFIG["query_timeout_seconds"])
+    
+    Prazos mais curtos definidos pelo chamador (query_deadline) prevalecem. Se
+    o cliente HTTP desconectar, a consulta em andamento é interrompida.
+    
+    Raises:
+        QueryTimeoutError: Se a consulta exceder o prazo
+        QueryCancelledError: Se o cliente desconectar durante a consulta
+    """
+    cancel_event = threading.Event()
+    if timeout is None:
+        timeout = config.PERFORMANCE_CONFIG["query_timeout_seconds"]
+    with query_deadline(timeout), query_cancellation(cancel_event):
+        future = asyncio.wrap_future(executor.submit(_call_with_interrupts, func, args, kwargs))
+    
+    waiter = get_disconnect_waiter()
+    watcher = asyncio.ensure_future(waiter()) if waiter is not None else None
+    try:
+        if watcher is not None:
+            await asyncio.wait({future, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not future.done():
+                # Cliente desconectou: interrompe a consulta e espera a thread liberar a conexão
+                cancel_event.set()
+        return await future
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+def _call_with_interrupts(func: Callable, args: tuple, kwargs: dict) -> Any:
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        translated = translate_interrupt(e)
+        if translated is e:
+            raise
+        raise translated from e
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna estatísticas (incluindo profundidade da fila) de cada executor
+
+    Returns:
+        dict: Estatísticas por executor
+    """
+    return {name: get_executor(name).get_stats() for name in ("read", "write")}
+
+def shutdown_executors(wait: bool = True):
+    """Encerra todos os executores"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
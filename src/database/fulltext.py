@@ -0,0 +1,142 @@
+"""
+Índices de texto completo (FTS5) mantidos por triggers sobre as tabelas de origem
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from src.database.pagination import quote_identifier
+
+# Endereço das lojas: busca por prefixo de palavra, sem distinção de acentos
+ADDRESS_FTS = {
+    "name": "lojas_lojas_fts",
+    "table": "lojas_lojas",
+    "columns": ["ENDEREÇO", "BAIRRO", "CIDADE", "UF", "CEP"],
+    "tokenize": "unicode61 remove_diacritics 2",
+    "prefix": "2 3",
+}
+
+# Designações e IDs Vivo dos circuitos: busca por substring (trigramas)
+CIRCUIT_TRIGRAM_FTS = {
+    "name": "inventario_planilha1_trgm",
+    "table": "inventario_planilha1",
+    "columns": ["Circuito_Designação", "Novo_Circuito_Designação", "ID_VIVO", "Novo_ID_Vivo"],
+    "tokenize": "trigram",
+}
+
+FULLTEXT_REGISTRY: List[Dict[str, Any]] = [ADDRESS_FTS, CIRCUIT_TRIGRAM_FTS]
+
+_WORD = re.compile(r"\w+")
+
+
+def ensure_fulltext_index(conn: sqlite3.Connection, spec: Dict[str, Any]) -> Optional[bool]:
+    """
+    Cria o índice FTS5 (external content) e os triggers que o sincronizam
+
+    O conteúdo é reconstruído quando o índice é criado ou quando os
+    triggers não existem — caso da tabela recriada por to_sql(if_exists='replace').
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+        spec (dict): name, table, columns, tokenize e prefix (opcional)
+
+    Returns:
+        bool: True se criou/reconstruiu, False se já estava em dia,
+        None se a tabela ou as colunas não existem
+    """
+    name, table = spec["name"], spec["table"]
+    existing_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+    if not existing_columns or not set(spec["columns"]) <= set(existing_columns):
+        return None
+
+    fts = quote_identifier(name)
+    source = quote_identifier(table)
+    columns = ", ".join(quote_identifier(col) for col in spec["columns"])
+    new_values = ", ".join(f"new.{quote_identifier(col)}" for col in spec["columns"])
+    old_values = ", ".join(f"old.{quote_identifier(col)}" for col in spec["columns"])
+    triggers = {
+        f"{name}_ai": f"AFTER INSERT ON {source} BEGIN "
+                      f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END",
+        f"{name}_ad": f"AFTER DELETE ON {source} BEGIN "
+                      f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"{name}_au": f"AFTER UPDATE OF {columns} ON {source} BEGIN "
+                      f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values}); "
+                      f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.rowid, {new_values}); END",
+    }
+
+    objects = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name = ? OR (type = 'trigger' AND tbl_name = ?)", (name, table))}
+    if name in objects and all(trigger in objects for trigger in triggers):
+        return False
+
+    options = [f"content={quote_identifier(table)}", "content_rowid='rowid'",
+               f"tokenize='{spec['tokenize']}'"]
+    if spec.get("prefix"):
+        options.append(f"prefix='{spec['prefix']}'")
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, {', '.join(options)})")
+    for trigger, body in triggers.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {quote_identifier(trigger)}")
+        conn.execute(f"CREATE TRIGGER {quote_identifier(trigger)} {body}")
+    conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return True
+
+def ensure_fulltext_indexes(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    Aplica todos os índices de FULLTEXT_REGISTRY
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+
+    Returns:
+        dict: Nomes dos índices em 'created', 'existing' e 'skipped'
+    """
+    result = {'created': [], 'existing': [], 'skipped': []}
+    for spec in FULLTEXT_REGISTRY:
+        status = ensure_fulltext_index(conn, spec)
+        key = 'skipped' if status is None else 'created' if status else 'existing'
+        result[key].append(spec["name"])
+    conn.commit()
+    return result
+
+def fulltext_available(conn: sqlite3.Connection, spec: Dict[str, Any]) -> bool:
+    """Indica se o índice FTS5 de `spec` existe no banco"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (spec["name"],)).fetchone() is not None
+
+def prefix_match_query(text: str) -> Optional[str]:
+    """
+    Monta uma expressão MATCH em que cada palavra digitada é um prefixo
+
+    "av paul" vira '"av"* "paul"*' (todas as palavras precisam aparecer).
+
+    Args:
+        text (str): Texto digitado pelo usuário
+
+    Returns:
+        str: Expressão MATCH do FTS5, ou None se não houver palavras
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def substring_match_query(text: str, columns: List[str]) -> Optional[str]:
+    """
+    Monta uma expressão MATCH de substring para um índice de trigramas
+
+    Equivale a `col LIKE '%texto%'` em qualquer das colunas, sem distinção
+    de maiúsculas. Textos com menos de 3 caracteres não formam um trigrama.
+
+    Args:
+        text (str): Trecho digitado pelo usuário
+        columns (list): Colunas do índice em que o trecho deve aparecer
+
+    Returns:
+        str: Expressão MATCH do FTS5, ou None se o texto for curto demais
+    """
+    text = text.strip()
+    if len(text) < 3:
+        return None
+    column_filter = " ".join(quote_identifier(col) for col in columns)
+    phrase = text.replace('"', '""')
+    return f'{{{column_filter}}} : "{phrase}"'
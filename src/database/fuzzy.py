@@ -0,0 +1,196 @@
+"""
+Busca aproximada (tolerante a erros de digitação) por nomes de lojas, GGL/GR e cidades
+"""
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from src.database.normalize import normalize_search_text
+from src.database.pagination import quote_identifier
+from src.database.versions import VersionedValue
+
+# Colunas cujos valores distintos formam o dicionário da busca aproximada
+FUZZY_COLUMNS: Dict[str, List[str]] = {
+    "lojas_lojas": ["LOJAS", "NOME_GGL", "NOME_GR", "CIDADE"],
+}
+
+# Palavras de até este tamanho só casam exatamente
+_EXACT_WORD_LENGTH = 2
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distância de edição (Damerau-Levenshtein restrita) com corte
+
+    Args:
+        a (str): Primeiro texto
+        b (str): Segundo texto
+        max_distance (int): Distância a partir da qual o cálculo é interrompido
+
+    Returns:
+        int: Distância, ou max_distance + 1 se ela passar do limite
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+    return current[-1]
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Variações de `word` com até max_distance caracteres removidos (SymSpell)"""
+    result, frontier = {word}, {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+class FuzzyIndex:
+    """
+    Dicionário de remoções (SymSpell) sobre as palavras dos valores indexados
+
+    A consulta gera as remoções de cada palavra digitada e as procura no
+    dicionário, então o custo não depende do número de valores. Um valor
+    casa quando todas as palavras digitadas casam com alguma de suas palavras.
+    """
+
+    def __init__(self, values: Iterable[Tuple[str, Any]], max_distance: int = 2):
+        """
+        Constrói o índice
+
+        Args:
+            values (Iterable): Pares (coluna, valor original)
+            max_distance (int): Maior distância de edição por palavra
+        """
+        self.max_distance = max_distance
+        self._values: List[Tuple[str, Any, List[str]]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        seen = set()
+        for column, value in values:
+            words = normalize_search_text(value).split()
+            if not words or (column, value) in seen:
+                continue
+            seen.add((column, value))
+            position = len(self._values)
+            self._values.append((column, value, words))
+            for word in words:
+                if word not in self._postings:
+                    self._postings[word] = set()
+                    depth = 0 if len(word) <= _EXACT_WORD_LENGTH else max_distance
+                    for variant in _deletes(word, depth):
+                        self._deletes.setdefault(variant, set()).add(word)
+                self._postings[word].add(position)
+
+    def _word_distance(self, word: str) -> int:
+        # Palavras curtas toleram menos erros: "rio" não deve virar "sao"
+        if len(word) <= _EXACT_WORD_LENGTH:
+            return 0
+        return min(self.max_distance, 1) if len(word) <= 4 else self.max_distance
+
+    def lookup_word(self, word: str) -> Dict[str, int]:
+        """
+        Palavras do dicionário próximas de `word`
+
+        Args:
+            word (str): Palavra normalizada
+
+        Returns:
+            dict: Palavra do dicionário -> distância de edição
+        """
+        limit = self._word_distance(word)
+        matches = {}
+        for variant in _deletes(word, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate not in matches:
+                    distance = edit_distance(word, candidate, limit)
+                    if distance <= limit:
+                        matches[candidate] = distance
+        return matches
+
+    def search(self, text: str, columns: Optional[Sequence[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Valores mais próximos do texto digitado
+
+        Args:
+            text (str): Texto digitado
+            columns (Sequence, optional): Restringe às colunas informadas
+            limit (int): Máximo de valores
+
+        Returns:
+            list: Dicionários column, value e distance, dos mais próximos aos
+            mais distantes (empate: valores com menos palavras primeiro)
+        """
+        words = normalize_search_text(text).split()
+        if not words:
+            return []
+        distances: Optional[Dict[int, int]] = None
+        for word in words:
+            word_matches: Dict[int, int] = {}
+            for candidate, distance in self.lookup_word(word).items():
+                for position in self._postings[candidate]:
+                    if distance < word_matches.get(position, distance + 1):
+                        word_matches[position] = distance
+            if distances is None:
+                distances = word_matches
+            else:
+                distances = {p: d + word_matches[p] for p, d in distances.items() if p in word_matches}
+            if not distances:
+                return []
+
+        results = []
+        for position, distance in distances.items():
+            column, value, value_words = self._values[position]
+            if columns is None or column in columns:
+                results.append((distance, len(value_words), str(value), column, value))
+        results.sort(key=lambda item: item[:3])
+        return [{"column": column, "value": value, "distance": distance}
+                for distance, _, _, column, value in results[:limit]]
+
+
+def load_fuzzy_values(conn: sqlite3.Connection) -> List[Tuple[str, Any]]:
+    """
+    Lê os valores distintos das colunas de FUZZY_COLUMNS
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+
+    Returns:
+        list: Pares (coluna, valor); tabelas ou colunas ausentes são ignoradas
+    """
+    values = []
+    for table, columns in FUZZY_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+        for column in columns:
+            if column not in existing:
+                continue
+            rows = conn.execute(f"SELECT DISTINCT {quote_identifier(column)} FROM {quote_identifier(table)} "
+                                f"WHERE {quote_identifier(column)} IS NOT NULL")
+            values.extend((column, row[0]) for row in rows)
+    return values
+
+
+_fuzzy_index = VersionedValue(list(FUZZY_COLUMNS), lambda conn: FuzzyIndex(load_fuzzy_values(conn)))
+
+def get_fuzzy_index(conn: sqlite3.Connection) -> FuzzyIndex:
+    """
+    Obtém o índice de busca aproximada, reconstruindo-o se os dados mudaram
+
+    Args:
+        conn (sqlite3.Connection): Conexão usada para checar a versão e recarregar
+
+    Returns:
+        FuzzyIndex: Índice compartilhado pelo processo
+    """
+    return _fuzzy_index.get(conn)
+
+def reset_fuzzy_index():
+    """Descarta o índice de busca aproximada (recarregado na próxima busca)"""
+    _fuzzy_index.reset()
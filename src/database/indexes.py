@@ -0,0 +1,140 @@
+"""
+Registro declarativo dos índices do banco (chaves de junção e colunas de filtro)
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from src.database.fulltext import FULLTEXT_REGISTRY, ensure_fulltext_indexes
+from src.database.normalize import NORMALIZED_REGISTRY, ensure_normalized_tables, normalized_table_name
+from src.database.pagination import quote_identifier
+from src.database.query_log import get_query_log
+from src.database.read_model import READ_MODEL_TABLE, ensure_read_models
+from src.database.versions import VERSIONS_TABLE, ensure_data_versions
+
+# Índices esperados pelas consultas de src/database/queries.py e pela busca
+# guiada da API. Buscas com LIKE '%termo%' não usam índice B-tree; estes
+# atendem às junções (People = PEOP) e aos filtros por igualdade.
+INDEX_REGISTRY: List[Dict[str, Any]] = [
+    {"name": "idx_lojas_lojas_peop", "table": "lojas_lojas", "columns": ["PEOP"]},
+    {"name": "idx_lojas_lojas_codigo", "table": "lojas_lojas", "columns": ["CODIGO"]},
+    {"name": "idx_lojas_lojas_uf", "table": "lojas_lojas", "columns": ["UF"]},
+    {"name": "idx_lojas_lojas_status", "table": "lojas_lojas", "columns": ["STATUS"]},
+    {"name": "idx_inventario_planilha1_people", "table": "inventario_planilha1", "columns": ["People"]},
+    {"name": "idx_inventario_planilha1_operadora", "table": "inventario_planilha1", "columns": ["Operadora"]},
+    {"name": "idx_inventario_planilha1_designacao", "table": "inventario_planilha1",
+     "columns": ["Circuito_Designação"]},
+    {"name": "idx_inventario_planilha1_id_vivo", "table": "inventario_planilha1", "columns": ["ID_VIVO"]},
+]
+
+_INDEX_IN_PLAN = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+
+
+def ensure_indexes(conn: sqlite3.Connection, registry: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[str]]:
+    """
+    Cria (se ainda não existirem) os índices do registro
+
+    Idempotente: pode rodar após cada ingestão e a cada inicialização.
+    Índices de tabelas ou colunas ausentes são ignorados. As tabelas que
+    ganharam índices são analisadas (ANALYZE) para o planejador usá-los.
+    As tabelas normalizadas (normalize.NORMALIZED_REGISTRY) e os índices de
+    texto completo (fulltext.FULLTEXT_REGISTRY) também são aplicados, além do
+    modelo de leitura inventário x lojas (read_model.READ_MODEL_TABLE), assim
+    como os contadores de versão dos dados (versions.VERSIONED_TABLES), que
+    não entram no relatório.
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+        registry (list, optional): Índices a aplicar (padrão: INDEX_REGISTRY)
+
+    Returns:
+        dict: Nomes dos índices em 'created', 'existing' e 'skipped'
+    """
+    registry = INDEX_REGISTRY if registry is None else registry
+    result = {'created': [], 'existing': [], 'skipped': []}
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    analyze = set()
+
+    for spec in registry:
+        name, table = spec["name"], spec["table"]
+        if name in existing:
+            result['existing'].append(name)
+            continue
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+        if not columns or not set(spec["columns"]) <= columns:
+            result['skipped'].append(name)
+            continue
+        unique = "UNIQUE " if spec.get("unique") else ""
+        column_list = ", ".join(quote_identifier(col) for col in spec["columns"])
+        conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS {quote_identifier(name)} "
+                     f"ON {quote_identifier(table)} ({column_list})")
+        result['created'].append(name)
+        analyze.add(table)
+
+    for table in sorted(analyze):
+        conn.execute(f"ANALYZE {quote_identifier(table)}")
+    conn.commit()
+
+    # Tabelas normalizadas, índices de texto completo (FTS5) e o modelo de leitura entram no mesmo relatório
+    for derived in (ensure_normalized_tables(conn), ensure_fulltext_indexes(conn), ensure_read_models(conn)):
+        for key, names in derived.items():
+            result[key].extend(names)
+    ensure_data_versions(conn)
+    return result
+
+def is_derived_table(table: str) -> bool:
+    """
+    Indica se a tabela é mantida pelos índices de busca (FTS5, tabela normalizada,
+    modelo de leitura ou versões)
+
+    Essas tabelas não são dados do usuário e ficam fora da listagem de tabelas.
+
+    Args:
+        table (str): Nome da tabela
+
+    Returns:
+        bool: True para tabelas derivadas (inclusive as internas do FTS5)
+    """
+    derived = [spec["name"] for spec in FULLTEXT_REGISTRY]
+    derived += [normalized_table_name(source) for source in NORMALIZED_REGISTRY]
+    derived += [READ_MODEL_TABLE, VERSIONS_TABLE]
+    return any(table == name or table.startswith(f"{name}_") for name in derived)
+
+def get_index_report(conn: sqlite3.Connection, registry: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Lista os índices do banco e do registro, indicando quais as consultas usam
+
+    O uso vem dos planos (EXPLAIN QUERY PLAN) registrados pelo QueryLog
+    para cada fingerprint executado neste processo.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        registry (list, optional): Registro de referência (padrão: INDEX_REGISTRY)
+
+    Returns:
+        list: name, table, columns, registered, exists e used_by (fingerprints) por índice
+    """
+    registry = INDEX_REGISTRY if registry is None else registry
+    used_by: Dict[str, List[str]] = {}
+    for query in get_query_log().get_top_queries(limit=None):
+        for line in query.get('plan') or []:
+            match = _INDEX_IN_PLAN.search(line)
+            if match and query['fingerprint'] not in used_by.setdefault(match.group(1), []):
+                used_by[match.group(1)].append(query['fingerprint'])
+
+    report = {}
+    for spec in registry:
+        report[spec["name"]] = {'name': spec["name"], 'table': spec["table"], 'columns': list(spec["columns"]),
+                                'registered': True, 'exists': False}
+    rows = conn.execute("SELECT name, tbl_name FROM sqlite_master "
+                        "WHERE type = 'index' AND name NOT LIKE 'sqlite_autoindex_%'").fetchall()
+    for name, table in rows:
+        entry = report.setdefault(name, {'name': name, 'table': table, 'registered': False})
+        entry['columns'] = [col[2] for col in sorted(
+            conn.execute(f"PRAGMA index_info({quote_identifier(name)})").fetchall())]
+        entry['exists'] = True
+
+    for entry in report.values():
+        entry['used_by'] = used_by.get(entry['name'], [])
+        entry['used'] = bool(entry['used_by'])
+    return list(report.values())
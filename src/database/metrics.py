@@ -0,0 +1,278 @@
+"""
+Métricas de SQL por requisição HTTP e por consulta nomeada (formato Prometheus)
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+import config
+
+# Limites (le) fixos dos histogramas: iguais em todos os workers, então as
+# séries podem ser somadas no Prometheus (histogram_quantile sobre sum by le)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Nome -> (tipo Prometheus, descrição)
+METRICS = {
+    "consultavd_sql_statements_total": ("counter", "Statements SQL executados"),
+    "consultavd_sql_rows_total": ("counter", "Linhas retornadas ou afetadas pelos statements"),
+    "consultavd_sql_statement_duration_seconds": ("histogram", "Latência por statement SQL (execução + leitura)"),
+    "consultavd_http_requests_total": ("counter", "Requisições HTTP atendidas"),
+    "consultavd_http_request_duration_seconds": ("histogram", "Latência das requisições HTTP"),
+    "consultavd_http_request_statements": ("histogram", "Statements SQL por requisição HTTP"),
+    "consultavd_http_sql_seconds_total": ("counter", "Tempo em SQL das requisições HTTP"),
+    "consultavd_http_requests_flagged_total": ("counter", "Requisições acima do limite de statements"),
+    "consultavd_query_calls_total": ("counter", "Chamadas das consultas nomeadas"),
+    "consultavd_query_duration_seconds": ("histogram", "Latência das consultas nomeadas"),
+    "consultavd_query_statements_total": ("counter", "Statements SQL das consultas nomeadas"),
+    "consultavd_query_rows_total": ("counter", "Linhas lidas pelas consultas nomeadas"),
+}
+
+# Limites de cada histograma (padrão: DURATION_BUCKETS)
+HISTOGRAM_BUCKETS = {
+    "consultavd_http_request_statements": STATEMENT_BUCKETS,
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class StatementCounter:
+    """Statements, linhas e tempo em SQL acumulados por uma requisição ou consulta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def add(self, rows: int, seconds: float):
+        with self._lock:
+            self.statements += 1
+            self.rows += rows
+            self.seconds += seconds
+
+
+class _Histogram:
+    """Contagem, soma e observações por faixa de limites fixos"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.count = 0
+        self.sum = 0.0
+        # Observações por faixa (não cumulativas); acima do último limite só entram em count
+        self.counts = [0] * len(buckets)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Pares (limite, observações <= limite), como no _bucket do Prometheus"""
+        result, running = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class MetricsRegistry:
+    """Contadores e histogramas de latência indexados por nome e labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """Incrementa um contador"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Registra uma observação em um histograma"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = _Histogram(HISTOGRAM_BUCKETS.get(name, DURATION_BUCKETS))
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        """Retorna o valor atual de um contador"""
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def get_histogram(self, name: str, **labels: str) -> Optional[Dict[str, Any]]:
+        """Retorna count, sum e as contagens cumulativas por limite ('buckets') de um histograma"""
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            if histogram is None:
+                return None
+            return {'count': histogram.count, 'sum': histogram.sum, 'buckets': dict(histogram.cumulative())}
+
+    def render(self) -> str:
+        """
+        Gera o texto de exposição do Prometheus (formato 0.0.4)
+
+        Returns:
+            str: Métricas no formato texto do Prometheus
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.count, h.sum, h.cumulative()) for key, h in self._histograms.items()}
+
+        lines: List[str] = []
+        for name, (kind, help_text) in METRICS.items():
+            if kind == "counter":
+                series = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+            else:
+                series = sorted((labels, value) for (metric, labels), value in histograms.items() if metric == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                count, total, buckets = value
+                for bound, cumulative in buckets + [("+Inf", count)]:
+                    le = bound if isinstance(bound, str) else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Descarta todas as métricas"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+_request_counter: ContextVar[Optional[StatementCounter]] = ContextVar("metrics_request", default=None)
+_query_counter: ContextVar[Optional[StatementCounter]] = ContextVar("metrics_query", default=None)
+
+def get_registry() -> MetricsRegistry:
+    """Obtém (criando se necessário) o registro global de métricas"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+def metrics_enabled() -> bool:
+    """Indica se a coleta de métricas está ligada (MONITORING_CONFIG["enable_metrics"])"""
+    return config.MONITORING_CONFIG["enable_metrics"]
+
+def record_statement(rows: int, seconds: float):
+    """
+    Contabiliza um statement SQL na requisição e na consulta nomeada em andamento
+
+    Chamado pelo cursor instrumentado (query_log.InstrumentedCursor).
+
+    Args:
+        rows (int): Linhas retornadas ou afetadas
+        seconds (float): Tempo do statement (execução + leitura)
+    """
+    if not metrics_enabled():
+        return
+    registry = get_registry()
+    registry.inc("consultavd_sql_statements_total")
+    registry.inc("consultavd_sql_rows_total", rows)
+    registry.observe("consultavd_sql_statement_duration_seconds", seconds)
+    for counter in (_request_counter.get(), _query_counter.get()):
+        if counter is not None:
+            counter.add(rows, seconds)
+
+@contextmanager
+def track_request():
+    """
+    Conta os statements SQL executados dentro do bloco (uma requisição HTTP)
+
+    O contador é propagado para os executores do banco via contextvars.
+
+    Yields:
+        StatementCounter: Contador da requisição
+    """
+    counter = StatementCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+def record_request(route: str, seconds: float, counter: StatementCounter) -> bool:
+    """
+    Registra uma requisição HTTP concluída
+
+    Args:
+        route (str): Rota (template do caminho, ex: /api/lojas/{loja_id})
+        seconds (float): Latência da requisição
+        counter (StatementCounter): Contador preenchido em track_request
+
+    Returns:
+        bool: True se a requisição passou de MONITORING_CONFIG["max_statements_per_request"]
+    """
+    if not metrics_enabled():
+        return False
+    registry = get_registry()
+    registry.inc("consultavd_http_requests_total", route=route)
+    registry.observe("consultavd_http_request_duration_seconds", seconds, route=route)
+    registry.observe("consultavd_http_request_statements", counter.statements, route=route)
+    registry.inc("consultavd_http_sql_seconds_total", counter.seconds, route=route)
+    flagged = counter.statements > config.MONITORING_CONFIG["max_statements_per_request"]
+    if flagged:
+        registry.inc("consultavd_http_requests_flagged_total", route=route)
+    return flagged
+
+def track_query(name: Optional[str] = None):
+    """
+    Decorador que mede uma consulta nomeada (latência, statements e linhas)
+
+    Args:
+        name (str, optional): Nome da consulta (padrão: nome da função)
+    """
+    def decorator(func):
+        query_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics_enabled():
+                return func(*args, **kwargs)
+            counter = StatementCounter()
+            token = _query_counter.set(counter)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _query_counter.reset(token)
+                registry = get_registry()
+                registry.inc("consultavd_query_calls_total", query=query_name)
+                registry.observe("consultavd_query_duration_seconds", elapsed, query=query_name)
+                registry.inc("consultavd_query_statements_total", counter.statements, query=query_name)
+                registry.inc("consultavd_query_rows_total", counter.rows, query=query_name)
+        return wrapper
+    return decorator
@@ -0,0 +1,277 @@
+"""
+Normalização de texto para buscas e tabelas-sombra com as colunas normalizadas
+"""
+import json
+import re
+import sqlite3
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from src.database.pagination import quote_identifier
+
+# Colunas normalizadas por tabela: (coluna, compacta). Colunas compactas
+# (designações, IDs) perdem também espaços e pontuação: "SPO-IP 001" -> "spoip001"
+NORMALIZED_REGISTRY: Dict[str, List[tuple]] = {
+    "lojas_lojas": [
+        ("LOJAS", False), ("ENDEREÇO", False), ("BAIRRO", False), ("CIDADE", False),
+        ("NOME_GGL", False), ("NOME_GR", False),
+    ],
+    "inventario_planilha1": [
+        ("Operadora", False),
+        ("Circuito_Designação", True), ("Novo_Circuito_Designação", True),
+        ("ID_VIVO", True), ("Novo_ID_Vivo", True),
+    ],
+}
+
+# Nome da função SQL de normalização (conveniência para consultas ad hoc; o
+# esquema persistente não depende dela)
+SQL_FUNCTION = "vd_normalize"
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_search_text(value: Any, compact: bool = False) -> str:
+    """
+    Normaliza um texto para comparação: sem acentos, minúsculo e sem pontuação
+
+    É a mesma função usada nas tabelas-sombra e nas consultas, então
+    "São Paulo", "SAO PAULO" e "sao  paulo" viram "sao paulo".
+
+    Args:
+        value (Any): Texto (ou número vindo da planilha)
+        compact (bool): Remove também os espaços (designações e IDs)
+
+    Returns:
+        str: Texto normalizado ("" para None)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Códigos numéricos lidos do Excel chegam como float (123.0)
+        value = int(value)
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    words = [word for word in _SEPARATORS.split(text) if word]
+    return ("" if compact else " ").join(words)
+
+def install_sql_functions(conn: sqlite3.Connection):
+    """
+    Registra na conexão a função SQL vd_normalize(valor, compacta)
+
+    Útil em consultas ad hoc; triggers e tabelas não a usam, então conexões
+    sem ela (CLI do sqlite3, scripts) continuam escrevendo normalmente.
+
+    Args:
+        conn (sqlite3.Connection): Conexão recém-criada
+    """
+    conn.create_function(SQL_FUNCTION, 2, _normalize_sql, deterministic=True)
+
+def _normalize_sql(value: Any, compact: int) -> Optional[str]:
+    return None if value is None else normalize_search_text(value, bool(compact))
+
+def normalized_terms(value: Any, compact: bool = False) -> List[str]:
+    """
+    Termos indexados de um valor: o texto normalizado a partir de cada palavra
+
+    "Márcia Souza" -> ["marcia souza", "souza"], então a busca por prefixo
+    encontra o valor por qualquer palavra ("souza", "marcia sou"). Colunas
+    compactas geram um único termo.
+
+    Args:
+        value (Any): Valor da coluna de origem
+        compact (bool): Normalização compacta (designações e IDs)
+
+    Returns:
+        list: Termos (vazio para valores sem letras nem dígitos)
+    """
+    normalized = normalize_search_text(value, compact)
+    if not normalized:
+        return []
+    if compact:
+        return [normalized]
+    words = normalized.split(" ")
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words))))
+
+def normalized_table_name(table: str) -> str:
+    """Nome da tabela-sombra normalizada de `table`"""
+    return f"{table}_norm"
+
+def dirty_table_name(table: str) -> str:
+    """Nome da fila de linhas de `table` ainda não normalizadas"""
+    return f"{table}_norm_dirty"
+
+def _fill_shadow(conn: sqlite3.Connection, table: str, columns: List[tuple], rowids: Optional[List[int]] = None):
+    """Grava na tabela-sombra os termos das linhas de origem (todas, ou só `rowids`)"""
+    names = ", ".join(quote_identifier(col) for col, _ in columns)
+    sql = f"SELECT rowid, {names} FROM {quote_identifier(table)}"
+    params: tuple = ()
+    if rowids is not None:
+        sql += " WHERE rowid IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(rowids),)
+    rows = (
+        (row[0], col, term)
+        for row in conn.execute(sql, params)
+        for (col, compact), value in zip(columns, row[1:])
+        for term in normalized_terms(value, compact)
+    )
+    conn.executemany(f"INSERT INTO {quote_identifier(normalized_table_name(table))} "
+                     f"(source_rowid, col, term) VALUES (?, ?, ?)", rows)
+
+def sync_normalized_table(conn: sqlite3.Connection, table: str, columns: List[tuple]) -> int:
+    """
+    Normaliza as linhas marcadas pelos triggers (fila `<tabela>_norm_dirty`)
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita (o commit fica com quem chama)
+        table (str): Tabela de origem
+        columns (list): Pares (coluna, compacta)
+
+    Returns:
+        int: Número de linhas normalizadas
+    """
+    dirty = quote_identifier(dirty_table_name(table))
+    rowids = [row[0] for row in conn.execute(f"SELECT source_rowid FROM {dirty}")]
+    if not rowids:
+        return 0
+    batch = json.dumps(rowids)
+    conn.execute(f"DELETE FROM {quote_identifier(normalized_table_name(table))} "
+                 f"WHERE source_rowid IN (SELECT value FROM json_each(?))", (batch,))
+    _fill_shadow(conn, table, columns, rowids)
+    conn.execute(f"DELETE FROM {dirty} WHERE source_rowid IN (SELECT value FROM json_each(?))", (batch,))
+    return len(rowids)
+
+def sync_pending_normalization(conn: sqlite3.Connection, tables: Optional[List[str]] = None) -> int:
+    """
+    Normaliza as linhas pendentes das tabelas registradas, na transação de quem escreve
+
+    Chamada pelos caminhos de escrita (a busca nunca escreve: linhas ainda
+    na fila são comparadas com LIKE).
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita (o commit fica com quem chama)
+        tables (list, optional): Tabelas escritas (padrão: todas de NORMALIZED_REGISTRY)
+
+    Returns:
+        int: Número de linhas normalizadas
+    """
+    total = 0
+    for table in tables or NORMALIZED_REGISTRY:
+        if table in NORMALIZED_REGISTRY and normalization_pending(conn, table):
+            total += sync_normalized_table(conn, table, NORMALIZED_REGISTRY[table])
+    return total
+
+def normalization_pending(conn: sqlite3.Connection, table: str) -> bool:
+    """Indica se há linhas de `table` aguardando normalização"""
+    try:
+        return conn.execute(f"SELECT EXISTS (SELECT 1 FROM {quote_identifier(dirty_table_name(table))})"
+                            ).fetchone()[0] == 1
+    except sqlite3.OperationalError:
+        return False
+
+def ensure_normalized_table(conn: sqlite3.Connection, table: str, columns: List[tuple]) -> Optional[bool]:
+    """
+    Cria a tabela-sombra normalizada de uma tabela, seus índices e triggers
+
+    A tabela-sombra tem uma linha por termo (normalized_terms) de cada
+    coluna de cada linha de origem, indexada por (coluna, termo) para
+    igualdade e prefixo. A normalização é feita em Python: os triggers usam
+    só SQL nativo — removem os termos antigos e colocam a linha na fila
+    `<tabela>_norm_dirty`, processada por sync_normalized_table. Assim
+    qualquer cliente SQLite consegue escrever nas tabelas de origem.
+    Tudo é preenchido novamente quando a tabela-sombra é criada ou quando
+    os triggers não existem (tabela de origem recriada pela ingestão).
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+        table (str): Tabela de origem
+        columns (list): Pares (coluna, compacta)
+
+    Returns:
+        bool: True se criou/preencheu, False se já estava em dia,
+        None se a tabela ou as colunas não existem
+    """
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+    if not existing or not {col for col, _ in columns} <= existing:
+        return None
+
+    shadow = normalized_table_name(table)
+    quoted_shadow, source = quote_identifier(shadow), quote_identifier(table)
+    dirty = quote_identifier(dirty_table_name(table))
+    names = ", ".join(quote_identifier(col) for col, _ in columns)
+    triggers = {
+        f"{shadow}_ai": f"AFTER INSERT ON {source} BEGIN "
+                        f"INSERT OR IGNORE INTO {dirty} (source_rowid) VALUES (new.rowid); END",
+        f"{shadow}_au": f"AFTER UPDATE OF {names} ON {source} BEGIN "
+                        f"DELETE FROM {quoted_shadow} WHERE source_rowid = old.rowid; "
+                        f"INSERT OR IGNORE INTO {dirty} (source_rowid) VALUES (new.rowid); END",
+        f"{shadow}_ad": f"AFTER DELETE ON {source} BEGIN "
+                        f"DELETE FROM {quoted_shadow} WHERE source_rowid = old.rowid; "
+                        f"DELETE FROM {dirty} WHERE source_rowid = old.rowid; END",
+    }
+
+    shadow_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quoted_shadow})")]
+    dirty_exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                (dirty_table_name(table),)).fetchone() is not None
+    objects = {row[0]: row[1] for row in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))}
+    expected_columns = ["source_rowid", "col", "term"]
+    up_to_date = all(trigger in objects and SQL_FUNCTION not in (objects[trigger] or "") for trigger in triggers)
+    if shadow_columns == expected_columns and dirty_exists and up_to_date:
+        sync_normalized_table(conn, table, columns)
+        return False
+
+    if shadow_columns != expected_columns:
+        # Formato mudou (ou primeira vez): recria a tabela-sombra
+        conn.execute(f"DROP TABLE IF EXISTS {quoted_shadow}")
+        conn.execute(f"CREATE TABLE {quoted_shadow} (source_rowid INTEGER NOT NULL, col TEXT NOT NULL, "
+                     f"term TEXT NOT NULL)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {dirty} (source_rowid INTEGER PRIMARY KEY)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{shadow}_term')} "
+                 f"ON {quoted_shadow} (col, term)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{shadow}_source_rowid')} "
+                 f"ON {quoted_shadow} (source_rowid)")
+    for trigger, body in triggers.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {quote_identifier(trigger)}")
+        conn.execute(f"CREATE TRIGGER {quote_identifier(trigger)} {body}")
+    conn.execute(f"DELETE FROM {quoted_shadow}")
+    conn.execute(f"DELETE FROM {dirty}")
+    _fill_shadow(conn, table, columns)
+    return True
+
+def ensure_normalized_tables(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    Aplica todas as tabelas-sombra de NORMALIZED_REGISTRY
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+
+    Returns:
+        dict: Nomes das tabelas-sombra em 'created', 'existing' e 'skipped'
+    """
+    result = {'created': [], 'existing': [], 'skipped': []}
+    for table, columns in NORMALIZED_REGISTRY.items():
+        status = ensure_normalized_table(conn, table, columns)
+        key = 'skipped' if status is None else 'created' if status else 'existing'
+        result[key].append(normalized_table_name(table))
+    conn.commit()
+    return result
+
+def normalized_available(conn: sqlite3.Connection, table: str) -> bool:
+    """Indica se a tabela-sombra normalizada de `table` existe no banco"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (normalized_table_name(table),)).fetchone() is not None
+
+def prefix_pattern(value: Any, compact: bool = False) -> Optional[str]:
+    """
+    Padrão GLOB de prefixo sobre o texto normalizado (usa o índice da coluna)
+
+    Args:
+        value (Any): Texto digitado pelo usuário
+        compact (bool): Normalização compacta (designações e IDs)
+
+    Returns:
+        str: Padrão 'texto*', ou None se nada sobrar após a normalização
+    """
+    normalized = normalize_search_text(value, compact)
+    # A normalização só deixa letras, dígitos e espaços: nada a escapar no GLOB
+    return f"{normalized}*" if normalized else None
@@ -0,0 +1,96 @@
+"""
+Paginação por cursor (keyset) para o sistema ConsultaVD
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Token de paginação malformado ou incompatível com a consulta"""
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Coloca um identificador SQL entre aspas duplas
+
+    Args:
+        name (str): Nome de tabela ou coluna
+
+    Returns:
+        str: Identificador escapado
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    Gera um token opaco a partir do estado do cursor
+
+    Args:
+        state (dict): Estado (coluna de ordenação, valores da linha, direção)
+
+    Returns:
+        str: Token seguro para URL
+    """
+    raw = json.dumps(state, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Recupera o estado de um token gerado por encode_cursor()
+
+    Args:
+        token (str): Token recebido do cliente
+
+    Returns:
+        dict: Estado do cursor
+
+    Raises:
+        InvalidCursorError: Se o token for inválido
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursorError("Cursor de paginação inválido")
+    if not isinstance(state, dict) or not isinstance(state.get('r'), int):
+        raise InvalidCursorError("Cursor de paginação inválido")
+    return state
+
+def keyset_predicate(column: Optional[str], value: Any, rowid: int,
+                     after: bool, descending: bool) -> Tuple[str, List[Any]]:
+    """
+    Monta o filtro WHERE que posiciona a consulta logo após (ou antes) de uma linha
+
+    A ordenação é sempre (coluna, rowid), com o rowid desempatando valores
+    repetidos. O SQLite ordena NULL antes de qualquer valor em ASC (e depois
+    em DESC), o que é tratado explicitamente.
+
+    Args:
+        column (str, optional): Coluna de ordenação (None = apenas rowid)
+        value (Any): Valor da coluna na linha de referência
+        rowid (int): rowid da linha de referência
+        after (bool): True para linhas seguintes, False para anteriores
+        descending (bool): Se a ordenação é decrescente
+
+    Returns:
+        tuple: (expressão SQL, parâmetros)
+    """
+    # Em ordem decrescente, "depois" equivale a "antes" na ordem crescente
+    greater = after != descending
+    op = '>' if greater else '<'
+
+    if column is None:
+        return f"rowid {op} ?", [rowid]
+
+    col = quote_identifier(column)
+    if value is None:
+        if greater:
+            return f"(({col} IS NULL AND rowid > ?) OR {col} IS NOT NULL)", [rowid]
+        return f"({col} IS NULL AND rowid < ?)", [rowid]
+
+    expr = f"({col} {op} ? OR ({col} = ? AND rowid {op} ?)"
+    if not greater:
+        expr += f" OR {col} IS NULL"
+    return expr + ")", [value, value, rowid]
@@ -0,0 +1,277 @@
+"""
+Pool de conexões SQLite para o sistema ConsultaVD
+"""
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from src.database.query_log import InstrumentedCursor
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Nenhuma conexão do pool ficou disponível dentro do tempo limite"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexão SQLite gerenciada por um ConnectionPool.
+
+    `close()` devolve a conexão ao pool em vez de fechá-la, e o bloco
+    `with conn:` faz commit/rollback e em seguida também a devolve.
+    """
+
+    _pool = None
+    _checked_out = False
+
+    def cursor(self, factory=None):
+        """Cria um cursor instrumentado (tempos e consultas lentas; ver query_log)"""
+        if factory is None:
+            # PRAGMAs de abertura (antes de entrar no pool) não são contabilizados
+            factory = InstrumentedCursor if self._pool is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # O atalho nativo não passa por cursor(): garante o cursor instrumentado
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        """Devolve a conexão ao pool (ou fecha se não pertencer a um pool)"""
+        pool = self._pool
+        if pool is not None:
+            pool.release(self)
+        else:
+            super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        result = super().__exit__(exc_type, exc_value, traceback)
+        self.close()
+        return result
+
+    def __del__(self):
+        # Conexão perdida sem close(): libera a vaga para não esgotar o pool
+        pool = self._pool
+        if pool is not None and self._checked_out:
+            pool._forget(self)
+
+    def _close_physical(self):
+        """Fecha de fato a conexão com o banco"""
+        self._pool = None
+        try:
+            sqlite3.Connection.close(self)
+        except sqlite3.Error:
+            pass
+
+
+class ConnectionPool:
+    """Pool limitado e thread-safe de conexões SQLite"""
+
+    def __init__(self, connect: Callable[[], PooledConnection], max_size: int = 10,
+                 max_idle: Optional[int] = None, timeout: float = 30.0):
+        """
+        Inicializa o pool
+
+        Args:
+            connect (Callable): Função que cria uma nova PooledConnection
+            max_size (int): Máximo de conexões abertas simultaneamente
+            max_idle (int, optional): Máximo de conexões ociosas mantidas
+            timeout (float): Tempo máximo de espera por uma conexão (segundos)
+        """
+        if max_size < 1:
+            raise ValueError("max_size deve ser maior que zero")
+        self._connect = connect
+        self._max_size = max_size
+        self._max_idle = max_size if max_idle is None else max(0, min(max_idle, max_size))
+        self._timeout = timeout
+        self._idle = deque()
+        # RLock: __del__ de conexões perdidas pode rodar durante o GC com o lock já adquirido
+        self._cond = threading.Condition(threading.RLock())
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'timeouts': 0,
+            'wait_time_total_ms': 0.0,
+            'wait_time_max_ms': 0.0,
+            'created_at': time.time()
+        }
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Retira uma conexão do pool, aguardando se todas estiverem em uso
+
+        Args:
+            timeout (float, optional): Tempo máximo de espera em segundos
+
+        Returns:
+            PooledConnection: Conexão pronta para uso
+
+        Raises:
+            PoolTimeoutError: Se nenhuma conexão ficar disponível a tempo
+        """
+        timeout = self._timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Pool de conexões encerrado")
+            conn = None
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão disponível após {timeout:.1f}s "
+                        f"({self._in_use}/{self._max_size} em uso)"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                conn._close_physical()
+                conn = None
+                with self._cond:
+                    self._stats['recycled'] += 1
+            if conn is None:
+                conn = self._create()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total_ms'] += waited_ms
+            if waited_ms > self._stats['wait_time_max_ms']:
+                self._stats['wait_time_max_ms'] = waited_ms
+
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """
+        Devolve uma conexão ao pool
+
+        Conexões com transação pendente sofrem rollback; conexões que
+        falharem nesse processo são descartadas e substituídas depois.
+
+        Args:
+            conn (PooledConnection): Conexão retirada com acquire()
+        """
+        if conn._pool is not self or not conn._checked_out:
+            return
+        conn._checked_out = False
+        healthy = self._reset(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            keep = healthy and not self._closed and len(self._idle) < self._max_idle
+            if keep:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                if not healthy:
+                    self._stats['recycled'] += 1
+            self._cond.notify()
+
+        if not keep:
+            conn._close_physical()
+
+    def discard(self, conn: PooledConnection):
+        """
+        Descarta uma conexão retirada do pool (ex.: após erro grave)
+
+        Args:
+            conn (PooledConnection): Conexão a descartar
+        """
+        if conn._pool is not self or not conn._checked_out:
+            return
+        conn._checked_out = False
+        with self._cond:
+            self._in_use -= 1
+            self._size -= 1
+            self._stats['recycled'] += 1
+            self._cond.notify()
+        conn._close_physical()
+
+    def close(self):
+        """Fecha todas as conexões ociosas e impede novas retiradas"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn._close_physical()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do pool"""
+        with self._cond:
+            stats = self._stats.copy()
+            stats['size'] = self._size
+            stats['in_use'] = self._in_use
+            stats['idle'] = len(self._idle)
+            stats['waiting'] = self._waiting
+            stats['max_size'] = self._max_size
+            stats['max_idle'] = self._max_idle
+            stats['wait_time_avg_ms'] = (
+                stats['wait_time_total_ms'] / stats['checkouts']
+                if stats['checkouts'] > 0 else 0
+            )
+            return stats
+
+    def _create(self) -> PooledConnection:
+        conn = self._connect()
+        conn._pool = self
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _forget(self, conn: PooledConnection):
+        """Libera a vaga de uma conexão coletada sem ter sido devolvida"""
+        conn._checked_out = False
+        with self._cond:
+            self._in_use -= 1
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(conn: PooledConnection) -> bool:
+        try:
+            conn.total_changes  # levanta ProgrammingError se a conexão foi fechada
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _reset(conn: PooledConnection) -> bool:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            return True
+        except sqlite3.Error:
+            return False
@@ -1,53 +1,113 @@
 """
 Módulo de queries específicas do sistema ConsultaVD
 """
+import json
 import pandas as pd
-from src.database.connection import get_connection
-from src.cache import get_cached_data, set_cached_data
+import config
+from src.database.connection import get_read_connection
+from src.cache import get_cached_data, set_cached_data, single_flight
+from src.database.metrics import track_query
+from src.database.fulltext import (
+    ADDRESS_FTS, CIRCUIT_TRIGRAM_FTS, fulltext_available, prefix_match_query, substring_match_query
+)
+from src.database.normalize import dirty_table_name, normalized_available, normalized_table_name, prefix_pattern
+from src.database.typeahead import get_store_index
+from src.database.fuzzy import get_fuzzy_index
+from src.database.read_model import read_model_source
 
-def unified_search_people(people_code: str) -> pd.DataFrame:
+# Tabelas de que dependem os resultados em cache (escritas nelas invalidam o cache)
+_STORE_TABLES = ("lojas_lojas",)
+_STORE_CIRCUIT_TABLES = ("lojas_lojas", "inventario_planilha1")
+
+def _normalized_prefix_subquery(conn, table: str, text: str, columns: list, compact: bool) -> tuple:
     """
-    Busca unificada por código People/PEOP em ambas as tabelas
-    
-    Args:
-        people_code (str): Código People/PEOP a ser buscado
-        
-    Returns:
-        pd.DataFrame: Resultados unificados da busca
+    Subconsulta de rowids com uma palavra (ou o valor compacto) começando por `text`, ou (None, ())
+
+    Linhas escritas por fora da aplicação ficam na fila `<tabela>_norm_dirty`
+    até a próxima escrita da aplicação (sync_pending_normalization); enquanto
+    isso são comparadas com LIKE. A busca nunca escreve.
     """
-    # Tentar obter do cache primeiro
-    cached_result = get_cached_data('unified_search_people', people_code)
-    if cached_result is not None:
-        return cached_result
-    
-    conn = get_connection()
-    query = '''
-    SELECT
-        i.People as "People/PEOP",
-        COALESCE(i.Status_Loja, l.STATUS) as Status_Loja,
-        l.LOJAS,
-        l.CODIGO,
-        l."ENDEREÇO",
-        l.BAIRRO,
-        l.CIDADE,
-        l.UF,
-        l.CEP,
-        l.TELEFONE1,
-        l.TELEFONE2,
-        l.CELULAR,
-        l."E_MAIL" as E_MAIL,
-        l."2ª_a_6ª",
-        l.SAB,
-        l.DOM,
-        l."FUNC.",
-        l.VD_NOVO,
-        l.NOME_GGL,
-        l.NOME_GR
-    FROM inventario_planilha1 i
-    LEFT JOIN lojas_lojas l ON i.People = l.PEOP
-    WHERE i.People = ?
-    UNION
-    SELECT
+    pattern = prefix_pattern(text, compact)
+    if pattern is None or not normalized_available(conn, table):
+        return None, ()
+    shadow, dirty = normalized_table_name(table), dirty_table_name(table)
+    placeholders = ", ".join("?" for _ in columns)
+    pending_filter = " OR ".join(f's."{col}" LIKE ?' for col in columns)
+    subquery = (f'SELECT source_rowid FROM "{shadow}" WHERE col IN ({placeholders}) AND term GLOB ? '
+                f'UNION SELECT d.source_rowid FROM "{dirty}" d JOIN "{table}" s ON s.rowid = d.source_rowid '
+                f'WHERE {pending_filter}')
+    return subquery, tuple(columns) + (pattern,) + (f"%{text}%",) * len(columns)
+
+def _text_filter(conn, alias: str, table: str, text: str, columns: list, rowid: str = "rowid") -> tuple:
+    """Busca por prefixo normalizado nas colunas; sem a tabela-sombra, recorre ao LIKE"""
+    subquery, params = _normalized_prefix_subquery(conn, table, text, columns, compact=False)
+    if subquery:
+        return f"{alias}.{rowid} IN ({subquery})", params
+    search_term = f"%{text}%"
+    return " OR ".join(f'{alias}."{col}" LIKE ?' for col in columns), (search_term,) * len(columns)
+
+def _fuzzy_filter(conn, alias: str, text: str, columns: list) -> tuple:
+    """
+    Filtro pelos valores mais próximos do texto (erros de digitação), ou (None, ())
+
+    Usado quando a busca exata não encontra nada e SEARCH_CONFIG["fuzzy_search"]
+    está ativo. Só os valores com a menor distância encontrada entram no filtro.
+    """
+    if not config.SEARCH_CONFIG.get("fuzzy_search"):
+        return None, ()
+    matches = get_fuzzy_index(conn).search(text, columns, config.SEARCH_CONFIG.get("fuzzy_max_results", 5))
+    if not matches:
+        return None, ()
+    best = [match for match in matches if match["distance"] == matches[0]["distance"]]
+    clauses = [f'{alias}."{match["column"]}" = ?' for match in best]
+    return " OR ".join(clauses), tuple(match["value"] for match in best)
+
+def _circuit_filter(conn, text: str, columns: list) -> tuple:
+    """
+    Busca por designação/ID Vivo: prefixo normalizado (ignora traços e espaços)
+    ou trecho no índice de trigramas; sem os índices, recorre ao LIKE
+
+    O filtro é sobre o modelo de leitura (alias `r`, ver read_model_source).
+    """
+    subquery, params = _normalized_prefix_subquery(conn, "inventario_planilha1", text, columns, compact=True)
+    match_query = substring_match_query(text, columns)
+    if match_query and fulltext_available(conn, CIRCUIT_TRIGRAM_FTS):
+        trigram = ("SELECT rowid FROM inventario_planilha1_trgm "
+                   "WHERE inventario_planilha1_trgm MATCH ?")
+        subquery = f"{subquery} UNION {trigram}" if subquery else trigram
+        return f"r.inventario_rowid IN ({subquery})", params + (match_query,)
+    search_term = f"%{text}%"
+    where = " OR ".join(f'r."{col}" LIKE ?' for col in columns)
+    params_like = (search_term,) * len(columns)
+    if subquery:
+        return f"{where} OR r.inventario_rowid IN ({subquery})", params_like + params
+    return where, params_like
+
+# Colunas das buscas sobre o modelo de leitura (inventário com a loja, se houver)
+_STORE_CIRCUIT_COLUMNS = '''
+        r.People as "People/PEOP",
+        r.Status_Loja,
+        r.LOJAS,
+        r.CODIGO,
+        r."ENDEREÇO",
+        r.BAIRRO,
+        r.CIDADE,
+        r.UF,
+        r.CEP,
+        r.TELEFONE1,
+        r.TELEFONE2,
+        r.CELULAR,
+        r."E_MAIL" as E_MAIL,
+        r."2ª_a_6ª",
+        r.SAB,
+        r.DOM,
+        r."FUNC.",
+        r.VD_NOVO,
+        r.NOME_GGL,
+        r.NOME_GR'''
+
+# Lojas sem circuitos no inventário (segunda parte da busca unificada)
+_PEOPLE_LOJAS_COLUMNS = '''
         l.PEOP as "People/PEOP",
         l.STATUS as Status_Loja,
         l.LOJAS,
@@ -67,18 +127,101 @@ def unified_search_people(people_code: str) -> pd.DataFrame:
         l."FUNC.",
         l.VD_NOVO,
         l.NOME_GGL,
-        l.NOME_GR
+        l.NOME_GR'''
+
+@track_query()
+@single_flight()
+def unified_search_people(people_code: str) -> pd.DataFrame:
+    """
+    Busca unificada por código People/PEOP em ambas as tabelas
+    
+    Args:
+        people_code (str): Código People/PEOP a ser buscado
+        
+    Returns:
+        pd.DataFrame: Resultados unificados da busca
+    """
+    # Tentar obter do cache primeiro
+    cached_result = get_cached_data('unified_search_people', people_code)
+    if cached_result is not None:
+        return cached_result
+    
+    query_template = f'''
+    SELECT{_STORE_CIRCUIT_COLUMNS}
+    FROM {{source}}
+    WHERE r.People = ?
+    UNION
+    SELECT{_PEOPLE_LOJAS_COLUMNS}
     FROM lojas_lojas l
     WHERE l.PEOP = ? AND l.PEOP NOT IN (SELECT People FROM inventario_planilha1)
     '''
-    df = pd.read_sql_query(query, conn, params=(people_code, people_code))
-    conn.close()
+    with get_read_connection() as conn:
+        query = query_template.format(source=read_model_source(conn))
+        df = pd.read_sql_query(query, conn, params=(people_code, people_code))
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'unified_search_people', people_code)
+    set_cached_data(df, 300, 'unified_search_people', people_code,
+                    tables=_STORE_CIRCUIT_TABLES, keys=[people_code])
     
     return df
 
+@track_query()
+@single_flight()
+def unified_search_people_many(people_codes: list) -> tuple:
+    """
+    Busca unificada de vários códigos People/PEOP em uma única consulta
+    
+    Os códigos já em cache (de unified_search_people) não vão ao banco; os
+    demais são passados como um array JSON (json_each) e unidos às tabelas,
+    o que funciona também nas conexões somente leitura. Cada resultado é
+    igual ao de unified_search_people para o mesmo código e fica em cache.
+    
+    Args:
+        people_codes (list): Códigos People/PEOP (repetidos e vazios são ignorados)
+        
+    Returns:
+        tuple: (dict código -> pd.DataFrame, lista dos códigos sem resultados)
+    """
+    codes = list(dict.fromkeys(str(code).strip() for code in people_codes if str(code).strip()))
+    results = {}
+    missing = []
+    for code in codes:
+        cached_result = get_cached_data('unified_search_people', code)
+        if cached_result is not None:
+            results[code] = cached_result
+        else:
+            missing.append(code)
+    
+    if missing:
+        query_template = f'''
+        WITH codes(code) AS (SELECT DISTINCT value FROM json_each(?))
+        SELECT c.code as _code,{_STORE_CIRCUIT_COLUMNS}
+        FROM codes c
+        JOIN {{source}} ON r.People = c.code
+        UNION
+        SELECT c.code as _code,{_PEOPLE_LOJAS_COLUMNS}
+        FROM codes c
+        JOIN lojas_lojas l ON l.PEOP = c.code
+        WHERE l.PEOP NOT IN (SELECT People FROM inventario_planilha1)
+        '''
+        with get_read_connection() as conn:
+            query = query_template.format(source=read_model_source(conn))
+            df = pd.read_sql_query(query, conn, params=(json.dumps(missing),))
+        groups = {code: group for code, group in df.groupby("_code", sort=False)}
+        empty = df.iloc[:0].drop(columns="_code")
+        for code in missing:
+            group = groups.get(code)
+            result = empty.copy() if group is None else group.drop(columns="_code").reset_index(drop=True)
+            results[code] = result
+            # Mesmo cache de unified_search_people (5 minutos)
+            set_cached_data(result, 300, 'unified_search_people', code,
+                            tables=_STORE_CIRCUIT_TABLES, keys=[code])
+    
+    not_found = [code for code in codes if results[code].empty]
+    return {code: results[code] for code in codes}, not_found
+
+@track_query()
+@single_flight()
 def search_by_designation(designation: str) -> pd.DataFrame:
     """
     Busca por designação de circuito
@@ -94,46 +237,27 @@ def search_by_designation(designation: str) -> pd.DataFrame:
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
-    query = '''
-    SELECT
-        i.People as "People/PEOP",
-        COALESCE(i.Status_Loja, l.STATUS) as Status_Loja,
-        l.LOJAS,
-        l.CODIGO,
-        l."ENDEREÇO",
-        l.BAIRRO,
-        l.CIDADE,
-        l.UF,
-        l.CEP,
-        l.TELEFONE1,
-        l.TELEFONE2,
-        l.CELULAR,
-        l."E_MAIL" as E_MAIL,
-        l."2ª_a_6ª",
-        l.SAB,
-        l.DOM,
-        l."FUNC.",
-        l.VD_NOVO,
-        l.NOME_GGL,
-        l.NOME_GR,
-        i.Circuito_Designação,
-        i.Novo_Circuito_Designação,
-        i.Operadora
-    FROM inventario_planilha1 i
-    LEFT JOIN lojas_lojas l ON i.People = l.PEOP
-    WHERE i.Circuito_Designação LIKE ? OR i.Novo_Circuito_Designação LIKE ?
-    ORDER BY l.LOJAS
+    query_template = f'''
+    SELECT{_STORE_CIRCUIT_COLUMNS},
+        r.Circuito_Designação,
+        r.Novo_Circuito_Designação,
+        r.Operadora
+    FROM {{source}}
+    WHERE {{where}}
+    ORDER BY r.LOJAS
     '''
-    search_term = f"%{designation}%"
-    df = pd.read_sql_query(query, conn, params=(search_term, search_term))
-    conn.close()
+    with get_read_connection() as conn:
+        where, params = _circuit_filter(conn, designation, ["Circuito_Designação", "Novo_Circuito_Designação"])
+        query = query_template.format(source=read_model_source(conn), where=where)
+        df = pd.read_sql_query(query, conn, params=params)
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'search_by_designation', designation)
+    set_cached_data(df, 300, 'search_by_designation', designation, tables=_STORE_CIRCUIT_TABLES)
     
     return df
 
+@track_query()
+@single_flight()
 def search_by_id_vivo(id_vivo: str) -> pd.DataFrame:
     """
     Busca por ID Vivo
@@ -149,49 +273,35 @@ def search_by_id_vivo(id_vivo: str) -> pd.DataFrame:
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
-    query = '''
-    SELECT
-        i.People as "People/PEOP",
-        COALESCE(i.Status_Loja, l.STATUS) as Status_Loja,
-        l.LOJAS,
-        l.CODIGO,
-        l."ENDEREÇO",
-        l.BAIRRO,
-        l.CIDADE,
-        l.UF,
-        l.CEP,
-        l.TELEFONE1,
-        l.TELEFONE2,
-        l.CELULAR,
-        l."E_MAIL" as E_MAIL,
-        l."2ª_a_6ª",
-        l.SAB,
-        l.DOM,
-        l."FUNC.",
-        l.VD_NOVO,
-        l.NOME_GGL,
-        l.NOME_GR,
-        i.ID_VIVO,
-        i.Novo_ID_Vivo,
-        i.Operadora
-    FROM inventario_planilha1 i
-    LEFT JOIN lojas_lojas l ON i.People = l.PEOP
-    WHERE i.ID_VIVO LIKE ? OR i.Novo_ID_Vivo LIKE ?
-    ORDER BY l.LOJAS
+    query_template = f'''
+    SELECT{_STORE_CIRCUIT_COLUMNS},
+        r.ID_VIVO,
+        r.Novo_ID_Vivo,
+        r.Operadora
+    FROM {{source}}
+    WHERE {{where}}
+    ORDER BY r.LOJAS
     '''
-    search_term = f"%{id_vivo}%"
-    df = pd.read_sql_query(query, conn, params=(search_term, search_term))
-    conn.close()
+    with get_read_connection() as conn:
+        where, params = _circuit_filter(conn, id_vivo, ["ID_VIVO", "Novo_ID_Vivo"])
+        query = query_template.format(source=read_model_source(conn), where=where)
+        df = pd.read_sql_query(query, conn, params=params)
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'search_by_id_vivo', id_vivo)
+    set_cached_data(df, 300, 'search_by_id_vivo', id_vivo, tables=_STORE_CIRCUIT_TABLES)
     
     return df
 
+@track_query()
+@single_flight()
 def search_by_address(address: str) -> pd.DataFrame:
     """
-    Busca por endereço, bairro ou cidade
+    Busca por endereço, bairro, cidade, UF ou CEP
+    
+    Usa o índice FTS5 lojas_lojas_fts (prefixo de palavra, sem distinção de
+    acentos, resultados ordenados por relevância) quando ele existe; senão
+    recorre ao LIKE. Sem resultados, tenta as cidades mais próximas do texto
+    (erros de digitação; df.attrs["fuzzy"]).
     
     Args:
         address (str): Endereço a ser buscado
@@ -204,9 +314,7 @@ def search_by_address(address: str) -> pd.DataFrame:
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
-    query = '''
-    SELECT
+    columns = '''
         l.PEOP as "People/PEOP",
         l.STATUS as Status_Loja,
         l.LOJAS,
@@ -227,23 +335,49 @@ def search_by_address(address: str) -> pd.DataFrame:
         l.VD_NOVO,
         l.NOME_GGL,
         l.NOME_GR
-    FROM lojas_lojas l
-    WHERE l."ENDEREÇO" LIKE ? OR l.BAIRRO LIKE ? OR l.CIDADE LIKE ?
-    ORDER BY l.LOJAS
     '''
-    search_term = f"%{address}%"
-    df = pd.read_sql_query(query, conn, params=(search_term, search_term, search_term))
-    conn.close()
+    match_query = prefix_match_query(address)
+    with get_read_connection() as conn:
+        if match_query and fulltext_available(conn, ADDRESS_FTS):
+            query = f'''
+            SELECT {columns}
+            FROM lojas_lojas_fts f
+            JOIN lojas_lojas l ON l.rowid = f.rowid
+            WHERE lojas_lojas_fts MATCH ?
+            ORDER BY f.rank, l.LOJAS
+            '''
+            df = pd.read_sql_query(query, conn, params=(match_query,))
+        else:
+            query = f'''
+            SELECT {columns}
+            FROM lojas_lojas l
+            WHERE l."ENDEREÇO" LIKE ? OR l.BAIRRO LIKE ? OR l.CIDADE LIKE ?
+            ORDER BY l.LOJAS
+            '''
+            search_term = f"%{address}%"
+            df = pd.read_sql_query(query, conn, params=(search_term, search_term, search_term))
+        if df.empty:
+            where, params = _fuzzy_filter(conn, "l", address, ["CIDADE"])
+            if where:
+                query = f"SELECT {columns} FROM lojas_lojas l WHERE {where} ORDER BY l.LOJAS"
+                df = pd.read_sql_query(query, conn, params=params)
+                df.attrs["fuzzy"] = True
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'search_by_address', address)
+    set_cached_data(df, 300, 'search_by_address', address, tables=_STORE_TABLES)
     
     return df
 
+@track_query()
+@single_flight()
 def search_by_ggl_gr(name: str) -> pd.DataFrame:
     """
     Busca por GGL ou GR
     
+    Compara o início do nome sem acentos, maiúsculas ou pontuação, usando a
+    tabela normalizada (lojas_lojas_norm) quando ela existe. Sem resultados,
+    tenta os nomes mais próximos (erros de digitação; df.attrs["fuzzy"]).
+    
     Args:
         name (str): Nome do GGL ou GR
         
@@ -255,8 +389,7 @@ def search_by_ggl_gr(name: str) -> pd.DataFrame:
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
-    query = '''
+    query_template = '''
     SELECT
         l.PEOP as "People/PEOP",
         l.STATUS as Status_Loja,
@@ -279,18 +412,25 @@ def search_by_ggl_gr(name: str) -> pd.DataFrame:
         l.NOME_GGL,
         l.NOME_GR
     FROM lojas_lojas l
-    WHERE l.NOME_GGL LIKE ? OR l.NOME_GR LIKE ?
+    WHERE {where}
     ORDER BY l.LOJAS
     '''
-    search_term = f"%{name}%"
-    df = pd.read_sql_query(query, conn, params=(search_term, search_term))
-    conn.close()
+    with get_read_connection() as conn:
+        where, params = _text_filter(conn, "l", "lojas_lojas", name, ["NOME_GGL", "NOME_GR"])
+        df = pd.read_sql_query(query_template.format(where=where), conn, params=params)
+        if df.empty:
+            where, params = _fuzzy_filter(conn, "l", name, ["NOME_GGL", "NOME_GR"])
+            if where:
+                df = pd.read_sql_query(query_template.format(where=where), conn, params=params)
+                df.attrs["fuzzy"] = True
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'search_by_ggl_gr', name)
+    set_cached_data(df, 300, 'search_by_ggl_gr', name, tables=_STORE_TABLES)
     
     return df
 
+@track_query()
+@single_flight()
 def get_dashboard_stats() -> dict:
     """
     Retorna estatísticas para o dashboard
@@ -303,76 +443,108 @@ def get_dashboard_stats() -> dict:
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
     stats = {}
-    
-    # Total de lojas
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM lojas_lojas")
-    stats['total_lojas'] = cursor.fetchone()[0]
-    
-    # Lojas por status
-    cursor.execute("""
-        SELECT STATUS, COUNT(*) as count 
-        FROM lojas_lojas 
-        GROUP BY STATUS 
-        ORDER BY count DESC
-    """)
-    stats['lojas_por_status'] = dict(cursor.fetchall())
-    
-    # Total de circuitos
-    cursor.execute("SELECT COUNT(*) FROM inventario_planilha1")
-    stats['total_circuitos'] = cursor.fetchone()[0]
-    
-    # Circuitos por operadora
-    cursor.execute("""
-        SELECT Operadora, COUNT(*) as count 
-        FROM inventario_planilha1 
-        WHERE Operadora IS NOT NULL
-        GROUP BY Operadora 
-        ORDER BY count DESC
-    """)
-    stats['circuitos_por_operadora'] = dict(cursor.fetchall())
-    
-    # Lojas por UF
-    cursor.execute("""
-        SELECT UF, COUNT(*) as count 
-        FROM lojas_lojas 
-        WHERE UF IS NOT NULL
-        GROUP BY UF 
-        ORDER BY count DESC
-    """)
-    stats['lojas_por_uf'] = dict(cursor.fetchall())
-    
-    conn.close()
+    with get_read_connection() as conn:
+        # Total de lojas
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM lojas_lojas")
+        stats['total_lojas'] = cursor.fetchone()[0]
+        
+        # Lojas por status
+        cursor.execute("""
+            SELECT STATUS, COUNT(*) as count 
+            FROM lojas_lojas 
+            GROUP BY STATUS 
+            ORDER BY count DESC
+        """)
+        stats['lojas_por_status'] = dict(cursor.fetchall())
+        
+        # Total de circuitos
+        cursor.execute("SELECT COUNT(*) FROM inventario_planilha1")
+        stats['total_circuitos'] = cursor.fetchone()[0]
+        
+        # Circuitos por operadora
+        cursor.execute("""
+            SELECT Operadora, COUNT(*) as count 
+            FROM inventario_planilha1 
+            WHERE Operadora IS NOT NULL
+            GROUP BY Operadora 
+            ORDER BY count DESC
+        """)
+        stats['circuitos_por_operadora'] = dict(cursor.fetchall())
+        
+        # Lojas por UF
+        cursor.execute("""
+            SELECT UF, COUNT(*) as count 
+            FROM lojas_lojas 
+            WHERE UF IS NOT NULL
+            GROUP BY UF 
+            ORDER BY count DESC
+        """)
+        stats['lojas_por_uf'] = dict(cursor.fetchall())
     
     # Armazenar no cache por 10 minutos (estatísticas mudam menos frequentemente)
-    set_cached_data(stats, 600, 'get_dashboard_stats')
+    set_cached_data(stats, 600, 'get_dashboard_stats', tables=_STORE_CIRCUIT_TABLES)
     
     return stats 
 
+@track_query()
+@single_flight()
 def search_circuits_by_operator(operadora: str) -> pd.DataFrame:
     """
     Busca todas as lojas e circuitos de uma operadora específica.
+    
+    Compara o início do nome normalizado (sem acentos, maiúsculas ou pontuação).
     """
     # Tentar obter do cache primeiro
     cached_result = get_cached_data('search_circuits_by_operator', operadora)
     if cached_result is not None:
         return cached_result
     
-    conn = get_connection()
-    query = '''
-    SELECT i.People as "People/PEOP", l.LOJAS, i.Operadora, i.Circuito_Designação, i.Novo_Circuito_Designação
-    FROM inventario_planilha1 i
-    LEFT JOIN lojas_lojas l ON i.People = l.PEOP
-    WHERE i.Operadora LIKE ?
-    ORDER BY l.LOJAS
+    query_template = '''
+    SELECT r.People as "People/PEOP", r.LOJAS, r.Operadora, r.Circuito_Designação, r.Novo_Circuito_Designação
+    FROM {source}
+    WHERE {where}
+    ORDER BY r.LOJAS
     '''
-    search_term = f"%{operadora}%"
-    df = pd.read_sql_query(query, conn, params=(search_term,))
-    conn.close()
+    with get_read_connection() as conn:
+        where, params = _text_filter(conn, "r", "inventario_planilha1", operadora, ["Operadora"],
+                                     rowid="inventario_rowid")
+        query = query_template.format(source=read_model_source(conn), where=where)
+        df = pd.read_sql_query(query, conn, params=params)
     
     # Armazenar no cache por 5 minutos
-    set_cached_data(df, 300, 'search_circuits_by_operator', operadora)
+    set_cached_data(df, 300, 'search_circuits_by_operator', operadora, tables=_STORE_CIRCUIT_TABLES)
     
-    return df 
\ No newline at end of file
+    return df
+
+@track_query()
+def suggest_stores(text: str, limit: int = 20, with_circuits: bool = False) -> list:
+    """
+    Sugestões de lojas por nome, PEOP ou código (índice em memória)
+
+    O índice é compartilhado pelo processo e só é recarregado do banco
+    quando a versão dos dados de lojas_lojas/inventario_planilha1 muda.
+
+    Args:
+        text (str): Texto digitado (prefixo ou trecho; sem resultados, tenta
+            os nomes mais próximos)
+        limit (int): Máximo de sugestões
+        with_circuits (bool): Apenas lojas com circuitos no inventário
+            (inclui People sem cadastro em lojas_lojas)
+
+    Returns:
+        list: Dicionários id, codigo, nome, endereco, cidade, uf, status, people e registered
+    """
+    if with_circuits:
+        predicate = lambda entry: entry["people"] is not None
+    else:
+        predicate = lambda entry: entry["registered"]
+    with get_read_connection() as conn:
+        index = get_store_index(conn)
+        suggestions = index.search(text, limit, predicate)
+        if suggestions or not config.SEARCH_CONFIG.get("fuzzy_search"):
+            return suggestions
+        # Nome digitado com erro: sugere as lojas com os nomes mais próximos
+        names = {match["value"] for match in get_fuzzy_index(conn).search(text, ["LOJAS"], limit)}
+    return [entry for entry in index.entries if entry["nome"] in names and predicate(entry)][:limit]
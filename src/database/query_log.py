@@ -0,0 +1,312 @@
+"""
+Instrumentação de consultas: tempos por fingerprint e log de consultas lentas
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import config
+
+from src.database.metrics import record_statement
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\"])\d+(?:\.\d+)?(?![\w\"])")
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_REPEATED_TUPLES = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+
+# Statements que aceitam EXPLAIN QUERY PLAN
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normaliza uma query para agrupar execuções equivalentes
+
+    Literais viram '?', espaços são colapsados e listas de placeholders
+    de tamanho variável (IN (...), VALUES (...), ...) são resumidas.
+
+    Args:
+        sql (str): Query SQL
+
+    Returns:
+        str: Fingerprint da query
+    """
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = re.sub(r"\s*,\s*", ", ", normalized)
+    normalized = re.sub(r"\(\s+", "(", re.sub(r"\s+\)", ")", normalized))
+    normalized = _REPEATED_TUPLES.sub(r"\1, ...", normalized)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", normalized)
+
+def params_shape(params: Any) -> Any:
+    """
+    Descreve os parâmetros de uma query sem expor os valores
+
+    Args:
+        params (Any): Sequência ou dicionário de parâmetros
+
+    Returns:
+        Any: Tipos dos parâmetros (lista, dicionário ou resumo para listas longas)
+    """
+    if not params:
+        return []
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    types = [type(value).__name__ for value in params]
+    if len(types) > 20:
+        return {'count': len(types), 'types': sorted(set(types))}
+    return types
+
+
+class QueryLog:
+    """
+    Estatísticas por fingerprint e registros das consultas lentas
+
+    Consultas montadas com SQL dinâmico podem gerar fingerprints sem fim;
+    acima de `max_fingerprints`, o de menor tempo acumulado é descartado
+    para dar lugar ao novo.
+    """
+
+    def __init__(self, max_entries: int = 100, max_fingerprints: int = 1000):
+        self._lock = threading.Lock()
+        self._slow = deque(maxlen=max_entries)
+        self._by_fingerprint: Dict[str, Dict[str, Any]] = {}
+        self._max_fingerprints = max_fingerprints
+
+    def record(self, conn: Optional[sqlite3.Connection], sql: str, params: Any, shape: Any,
+               rows: int, elapsed_ms: float):
+        """
+        Registra a execução de um statement
+
+        O plano (EXPLAIN QUERY PLAN) é capturado na mesma conexão na primeira
+        execução de cada fingerprint e em toda execução acima de
+        PERFORMANCE_CONFIG["slow_query_threshold_ms"].
+
+        Args:
+            conn (sqlite3.Connection, optional): Conexão em que o statement rodou
+                (None = não capturar o plano)
+            sql (str): Query executada
+            params (Any): Parâmetros usados (para o EXPLAIN; não são armazenados)
+            shape (Any): Formato dos parâmetros (ver params_shape)
+            rows (int): Linhas retornadas ou afetadas
+            elapsed_ms (float): Tempo total (execução + leitura das linhas)
+        """
+        key = fingerprint(sql)
+        threshold = config.PERFORMANCE_CONFIG["slow_query_threshold_ms"]
+        slow = elapsed_ms >= threshold
+
+        with self._lock:
+            stats = self._by_fingerprint.get(key)
+            if stats is None:
+                if len(self._by_fingerprint) >= self._max_fingerprints:
+                    cheapest = min(self._by_fingerprint.values(), key=lambda s: s['total_ms'])
+                    del self._by_fingerprint[cheapest['fingerprint']]
+                stats = {'fingerprint': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                         'rows': 0, 'slow_count': 0, 'plan': None}
+                self._by_fingerprint[key] = stats
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['rows'] += rows
+            if elapsed_ms > stats['max_ms']:
+                stats['max_ms'] = elapsed_ms
+            if slow:
+                stats['slow_count'] += 1
+            needs_plan = stats['plan'] is None and conn is not None
+
+        plan = None
+        if needs_plan or (slow and conn is not None):
+            plan = explain_query_plan(conn, sql, params)
+        if needs_plan and plan is not None:
+            # Plano da primeira execução de cada fingerprint (uso de índices)
+            with self._lock:
+                stats['plan'] = plan
+
+        if not slow:
+            return
+
+        entry = {
+            'fingerprint': key,
+            'params_shape': shape,
+            'rows': rows,
+            'elapsed_ms': round(elapsed_ms, 2),
+            'plan': plan,
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            self._slow.append(entry)
+        logging.warning(f"[SQL lenta] {entry['elapsed_ms']}ms ({rows} linhas): {key}")
+
+    def get_slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Retorna as consultas lentas mais recentes (mais nova primeiro)"""
+        with self._lock:
+            return list(reversed(self._slow))[:limit]
+
+    def get_top_queries(self, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Retorna os fingerprints com maior tempo acumulado (limit=None retorna todos)"""
+        with self._lock:
+            stats = [dict(s) for s in self._by_fingerprint.values()]
+        for s in stats:
+            s['avg_ms'] = s['total_ms'] / s['count'] if s['count'] else 0
+        return sorted(stats, key=lambda s: s['total_ms'], reverse=True)[:limit]
+
+    def clear(self):
+        """Descarta todos os registros"""
+        with self._lock:
+            self._slow.clear()
+            self._by_fingerprint.clear()
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: Any) -> Optional[List[str]]:
+    """
+    Captura o EXPLAIN QUERY PLAN de um statement
+
+    Args:
+        conn (sqlite3.Connection): Conexão em que o statement rodou
+        sql (str): Query
+        params (Any): Parâmetros da query
+
+    Returns:
+        list: Linhas do plano (indentadas pela hierarquia) ou None
+    """
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    try:
+        # Cursor básico: o EXPLAIN não deve ser instrumentado
+        cursor = sqlite3.Cursor(conn)
+        try:
+            rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        finally:
+            cursor.close()
+    except sqlite3.Error:
+        return None
+    depth = {0: 0}
+    plan = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        plan.append("  " * (depth[node_id] - 1) + detail)
+    return plan
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor que mede cada statement (execução + leitura) e o registra no QueryLog
+
+    O registro é feito quando o resultado termina de ser lido, quando o
+    cursor executa outro statement, é fechado ou descartado.
+    """
+
+    _current = None
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters, params_shape(parameters))
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        first = seq_of_parameters[0] if seq_of_parameters else ()
+        self._begin(sql, first, {'batch': len(seq_of_parameters), 'row': params_shape(first)})
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._track(start, 0 if row is None else 1, exhausted=row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._track(start, len(rows), exhausted=not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._track(start, len(rows), exhausted=True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._track(start, 0, exhausted=True)
+            raise
+        self._track(start, 1, exhausted=False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Só captura o plano se a conexão ainda estiver com a thread que executou
+        current = self._current
+        if current is not None:
+            conn = self.connection
+            owner = getattr(conn, '_pool', None) is None or getattr(conn, '_checked_out', True)
+            self._finish(explain=owner and current[5] == threading.get_ident())
+
+    def _begin(self, sql: str, params: Any, shape: Any):
+        self._finish()
+        # [sql, params, formato, linhas, segundos, thread]
+        self._current = [sql, params, shape, 0, 0.0, threading.get_ident()]
+
+    def _timed(self, method, *args):
+        current = self._current
+        start = time.perf_counter()
+        try:
+            result = method(*args)
+        except BaseException:
+            current[4] += time.perf_counter() - start
+            self._finish()
+            raise
+        current[4] += time.perf_counter() - start
+        if self.description is None:
+            # Sem resultado para ler (DML, DDL, PRAGMA de escrita): registra já
+            self._finish()
+        return result
+
+    def _track(self, start: float, rows: int, exhausted: bool):
+        current = self._current
+        if current is None:
+            return
+        current[3] += rows
+        current[4] += time.perf_counter() - start
+        if exhausted:
+            self._finish()
+
+    def _finish(self, explain: bool = True):
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+        sql, params, shape, rows, elapsed, _ = current
+        if not rows and self.rowcount > 0:
+            rows = self.rowcount
+        try:
+            record_statement(rows, elapsed)
+            get_query_log().record(self.connection if explain else None, sql, params,
+                                   shape, rows, elapsed * 1000)
+        except Exception as e:
+            # A instrumentação nunca deve quebrar a consulta
+            logging.debug(f"Falha ao registrar consulta: {e}")
+
+
+_query_log: Optional[QueryLog] = None
+_query_log_lock = threading.Lock()
+
+def get_query_log() -> QueryLog:
+    """Obtém (criando se necessário) o QueryLog global"""
+    global _query_log
+    with _query_log_lock:
+        if _query_log is None:
+            _query_log = QueryLog(config.PERFORMANCE_CONFIG["slow_query_log_size"],
+                                  config.PERFORMANCE_CONFIG["query_log_max_fingerprints"])
+        return _query_log
@@ -0,0 +1,140 @@
+"""
+Modelo de leitura: junção inventário x lojas materializada e mantida por triggers
+"""
+import sqlite3
+from typing import Dict, List, Optional
+
+from src.database.pagination import quote_identifier
+
+# Tabela com uma linha por circuito do inventário e os dados da sua loja
+READ_MODEL_TABLE = "store_circuits"
+
+# Colunas do inventário e das lojas copiadas para o modelo de leitura
+INVENTORY_COLUMNS = ["People", "Status_Loja", "Operadora", "Circuito_Designação", "Novo_Circuito_Designação",
+                     "ID_VIVO", "Novo_ID_Vivo"]
+STORE_COLUMNS = ["STATUS", "LOJAS", "CODIGO", "ENDEREÇO", "BAIRRO", "CIDADE", "UF", "CEP", "TELEFONE1",
+                 "TELEFONE2", "CELULAR", "E_MAIL", "2ª_a_6ª", "SAB", "DOM", "FUNC.", "VD_NOVO",
+                 "NOME_GGL", "NOME_GR"]
+
+
+def _select_sql(inventory_columns: List[str] = INVENTORY_COLUMNS, store_columns: List[str] = STORE_COLUMNS) -> str:
+    """Consulta que gera as linhas do modelo (a mesma junção usada antes pelas buscas)"""
+    selected = [f"i.{quote_identifier(col)}" for col in inventory_columns if col != "Status_Loja"]
+    selected.append("COALESCE(i.Status_Loja, l.STATUS) AS Status_Loja")
+    selected += [f"l.{quote_identifier(col)}" for col in store_columns if col != "STATUS"]
+    return (f"SELECT i.rowid AS inventario_rowid, {', '.join(selected)} "
+            f"FROM inventario_planilha1 i LEFT JOIN lojas_lojas l ON i.People = l.PEOP")
+
+def read_model_source(conn: sqlite3.Connection) -> str:
+    """
+    Origem das linhas inventário x loja para as buscas (alias `r`)
+
+    Usa a tabela materializada quando ela existe; senão a junção como
+    subconsulta, com as colunas que existirem nas tabelas de origem. Em
+    ambos os casos `r.inventario_rowid` é o rowid de inventario_planilha1.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+
+    Returns:
+        str: Trecho para o FROM
+    """
+    if read_model_available(conn):
+        return f"{quote_identifier(READ_MODEL_TABLE)} r"
+    inventory = {row[1] for row in conn.execute("PRAGMA table_info(inventario_planilha1)")}
+    stores = {row[1] for row in conn.execute("PRAGMA table_info(lojas_lojas)")}
+    select = _select_sql([col for col in INVENTORY_COLUMNS if col in inventory],
+                         [col for col in STORE_COLUMNS if col in stores])
+    return f"({select}) r"
+
+def read_model_available(conn: sqlite3.Connection) -> bool:
+    """
+    Indica se o modelo de leitura existe e está sendo mantido
+
+    Sem os triggers (tabela de origem recriada e ensure_indexes ainda não
+    executado), o conteúdo pode estar desatualizado e não deve ser usado.
+    """
+    names = [READ_MODEL_TABLE] + [f"{READ_MODEL_TABLE}_{source}_{event}"
+                                  for source in ("inventario", "lojas") for event in ("ai", "au", "ad")]
+    placeholders = ", ".join("?" for _ in names)
+    found = conn.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({placeholders})", names).fetchone()[0]
+    return found == len(names)
+
+def ensure_read_model(conn: sqlite3.Connection) -> Optional[bool]:
+    """
+    Cria o modelo de leitura, seus índices e os triggers que o mantêm
+
+    Escritas no inventário atualizam só as linhas do circuito; escritas em
+    lojas_lojas recalculam as linhas dos People afetados. O conteúdo é
+    recriado quando a tabela é criada ou quando os triggers não existem
+    (tabelas de origem recriadas pela ingestão).
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+
+    Returns:
+        bool: True se criou/recriou, False se já estava em dia,
+        None se as tabelas ou as colunas de origem não existem
+    """
+    for table, columns in (("inventario_planilha1", INVENTORY_COLUMNS), ("lojas_lojas", ["PEOP"] + STORE_COLUMNS)):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+        if not existing or not set(columns) <= existing:
+            return None
+
+    model = quote_identifier(READ_MODEL_TABLE)
+    select = _select_sql()
+    store_columns = ", ".join(quote_identifier(col) for col in ["PEOP"] + STORE_COLUMNS)
+    refresh_people = lambda ref: (
+        f"DELETE FROM {model} WHERE inventario_rowid IN "
+        f"(SELECT rowid FROM inventario_planilha1 WHERE People = {ref}.PEOP); "
+        f"INSERT INTO {model} {select} WHERE i.People = {ref}.PEOP;")
+    triggers = {
+        f"{READ_MODEL_TABLE}_inventario_ai": f"AFTER INSERT ON inventario_planilha1 BEGIN "
+                                            f"INSERT INTO {model} {select} WHERE i.rowid = new.rowid; END",
+        f"{READ_MODEL_TABLE}_inventario_au": f"AFTER UPDATE ON inventario_planilha1 BEGIN "
+                                            f"DELETE FROM {model} WHERE inventario_rowid = old.rowid; "
+                                            f"INSERT INTO {model} {select} WHERE i.rowid = new.rowid; END",
+        f"{READ_MODEL_TABLE}_inventario_ad": f"AFTER DELETE ON inventario_planilha1 BEGIN "
+                                            f"DELETE FROM {model} WHERE inventario_rowid = old.rowid; END",
+        f"{READ_MODEL_TABLE}_lojas_ai": f"AFTER INSERT ON lojas_lojas BEGIN {refresh_people('new')} END",
+        f"{READ_MODEL_TABLE}_lojas_au": f"AFTER UPDATE OF {store_columns} ON lojas_lojas BEGIN "
+                                       f"{refresh_people('old')} {refresh_people('new')} END",
+        f"{READ_MODEL_TABLE}_lojas_ad": f"AFTER DELETE ON lojas_lojas BEGIN {refresh_people('old')} END",
+    }
+
+    expected_columns = ["inventario_rowid"] + [col for col in INVENTORY_COLUMNS if col != "Status_Loja"] + \
+        ["Status_Loja"] + [col for col in STORE_COLUMNS if col != "STATUS"]
+    model_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({model})")]
+    objects = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    if model_columns == expected_columns and all(trigger in objects for trigger in triggers):
+        return False
+
+    # CREATE TABLE ... AS preserva a afinidade das colunas de origem (People = PEOP continua valendo)
+    conn.execute(f"DROP TABLE IF EXISTS {model}")
+    conn.execute(f"CREATE TABLE {model} AS {select} LIMIT 0")
+    for column in ("inventario_rowid", "People"):
+        index = quote_identifier(f"idx_{READ_MODEL_TABLE}_{column.lower()}")
+        conn.execute(f"CREATE INDEX {index} ON {model} ({quote_identifier(column)})")
+    for trigger, body in triggers.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {quote_identifier(trigger)}")
+        conn.execute(f"CREATE TRIGGER {quote_identifier(trigger)} {body}")
+    conn.execute(f"INSERT INTO {model} {select}")
+    conn.execute(f"ANALYZE {model}")
+    return True
+
+def ensure_read_models(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    Aplica o modelo de leitura (mesmo formato de relatório dos demais registros)
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+
+    Returns:
+        dict: Nome da tabela em 'created', 'existing' ou 'skipped'
+    """
+    result = {'created': [], 'existing': [], 'skipped': []}
+    status = ensure_read_model(conn)
+    key = 'skipped' if status is None else 'created' if status else 'existing'
+    result[key].append(READ_MODEL_TABLE)
+    conn.commit()
+    return result
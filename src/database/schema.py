@@ -0,0 +1,128 @@
+"""
+Catálogo de metadados do schema (tabelas, colunas, PK e índices) em memória
+"""
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.database.pagination import quote_identifier
+
+# Tipos de coluna tratados como texto nas buscas genéricas
+TEXT_TYPES = ("TEXT", "VARCHAR", "CHAR")
+
+
+class SchemaCatalog:
+    """
+    Metadados de todas as tabelas de um banco, carregados uma única vez
+
+    A cada consulta só é lido o `PRAGMA schema_version` (um contador no
+    cabeçalho do arquivo); quando ele muda — CREATE/ALTER/DROP feitos por
+    qualquer conexão ou processo — o catálogo é recarregado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._stats = {'lookups': 0, 'loads': 0}
+
+    def get_tables(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna os metadados de todas as tabelas
+
+        Args:
+            conn (sqlite3.Connection): Conexão usada para validar/carregar o catálogo
+
+        Returns:
+            dict: Metadados por nome de tabela
+        """
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            self._stats['lookups'] += 1
+            if version != self._version:
+                self._tables = self._load(conn)
+                self._version = version
+                self._stats['loads'] += 1
+            return self._tables
+
+    def get_table(self, conn: sqlite3.Connection, table: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna os metadados de uma tabela
+
+        Args:
+            conn (sqlite3.Connection): Conexão usada para validar/carregar o catálogo
+            table (str): Nome da tabela
+
+        Returns:
+            dict: name, columns (linhas do PRAGMA table_info), column_names,
+            column_types, text_columns, primary_key e indexes; None se não existir
+        """
+        return self.get_tables(conn).get(table)
+
+    def invalidate(self):
+        """Força a recarga do catálogo na próxima consulta"""
+        with self._lock:
+            self._version = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do catálogo"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats['schema_version'] = self._version
+            stats['tables'] = len(self._tables)
+            return stats
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        tables = {}
+        names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        for name in names:
+            quoted = quote_identifier(name)
+            columns = conn.execute(f"PRAGMA table_info({quoted})").fetchall()
+            indexes = []
+            for index in conn.execute(f"PRAGMA index_list({quoted})").fetchall():
+                index_columns = conn.execute(f"PRAGMA index_info({quote_identifier(index[1])})").fetchall()
+                indexes.append({
+                    'name': index[1],
+                    'unique': bool(index[2]),
+                    'columns': [col[2] for col in sorted(index_columns)]
+                })
+            tables[name] = {
+                'name': name,
+                'columns': columns,
+                'column_names': [col[1] for col in columns],
+                'column_types': {col[1]: col[2] for col in columns},
+                'text_columns': [col[1] for col in columns if col[2] in TEXT_TYPES],
+                'primary_key': [col[1] for col in sorted(columns, key=lambda c: c[5]) if col[5] > 0],
+                'indexes': indexes
+            }
+        return tables
+
+
+# Um catálogo por arquivo de banco
+_catalogs: Dict[str, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(db_path: str) -> SchemaCatalog:
+    """
+    Obtém (criando se necessário) o catálogo de um banco
+
+    Args:
+        db_path (str): Caminho absoluto do banco
+
+    Returns:
+        SchemaCatalog: Catálogo do banco
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None:
+            catalog = SchemaCatalog()
+            _catalogs[db_path] = catalog
+        return catalog
+
+def invalidate_catalogs():
+    """Força a recarga de todos os catálogos"""
+    with _catalogs_lock:
+        catalogs = list(_catalogs.values())
+    for catalog in catalogs:
+        catalog.invalidate()
@@ -0,0 +1,140 @@
+"""
+Prazos (deadlines) e cancelamento de consultas via progress handler do SQLite
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+# Instruções da VM do SQLite entre verificações do prazo
+_PROGRESS_INTERVAL = 10000
+
+_deadline: ContextVar[Optional[float]] = ContextVar("query_deadline", default=None)
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("query_cancel_event", default=None)
+_disconnect_waiter: ContextVar[Optional[Callable[[], Awaitable[None]]]] = ContextVar(
+    "query_disconnect_waiter", default=None
+)
+
+
+class QueryInterruptedError(sqlite3.OperationalError):
+    """A consulta foi interrompida pelo progress handler"""
+
+
+class QueryTimeoutError(QueryInterruptedError):
+    """A consulta foi interrompida por exceder o prazo"""
+
+
+class QueryCancelledError(QueryInterruptedError):
+    """A consulta foi interrompida porque o cliente desconectou"""
+
+
+@contextmanager
+def query_deadline(seconds: Optional[float]):
+    """
+    Define um prazo para as consultas executadas dentro do bloco
+
+    Prazos aninhados mantêm o mais curto. O contexto é propagado para os
+    executores do banco (contextvars), então vale também para run_read/run_write.
+
+    Args:
+        seconds (float, optional): Tempo máximo em segundos (None ou <= 0 = sem prazo)
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and current < deadline:
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def query_cancellation(event: threading.Event):
+    """
+    Associa um evento de cancelamento às consultas executadas dentro do bloco
+
+    Args:
+        event (threading.Event): Quando sinalizado, a consulta em andamento é interrompida
+    """
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+@contextmanager
+def disconnect_waiter(waiter: Callable[[], Awaitable[None]]):
+    """
+    Registra, para a requisição atual, uma corrotina que termina quando o cliente desconecta
+
+    Args:
+        waiter (Callable): Função async sem argumentos
+    """
+    token = _disconnect_waiter.set(waiter)
+    try:
+        yield
+    finally:
+        _disconnect_waiter.reset(token)
+
+def get_disconnect_waiter() -> Optional[Callable[[], Awaitable[None]]]:
+    """Retorna a corrotina de desconexão da requisição atual, se houver"""
+    return _disconnect_waiter.get()
+
+def deadline_exceeded() -> bool:
+    """Indica se o prazo do contexto atual já expirou"""
+    deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+def remaining_time() -> Optional[float]:
+    """Segundos até o prazo do contexto atual (None se não houver prazo)"""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def query_cancelled() -> bool:
+    """Indica se o cancelamento do contexto atual foi sinalizado"""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+def install_progress_handler(conn: sqlite3.Connection):
+    """
+    Instala na conexão o progress handler que interrompe consultas fora do prazo
+
+    Sem prazo nem cancelamento no contexto, o handler apenas retorna 0.
+
+    Args:
+        conn (sqlite3.Connection): Conexão recém-criada
+    """
+    conn.set_progress_handler(_check_progress, _PROGRESS_INTERVAL)
+
+def _check_progress() -> int:
+    # Valor diferente de zero faz o SQLite abortar com "interrupted"
+    return 1 if deadline_exceeded() or query_cancelled() else 0
+
+def translate_interrupt(error: BaseException) -> BaseException:
+    """
+    Converte a interrupção causada pelo prazo/cancelamento no erro tipado
+
+    Deve ser chamada no mesmo contexto em que a consulta rodou. Erros que
+    não vieram do progress handler são devolvidos sem alteração.
+
+    Args:
+        error (BaseException): Erro levantado pela consulta (sqlite3 ou pandas)
+
+    Returns:
+        BaseException: QueryCancelledError, QueryTimeoutError ou o próprio erro
+    """
+    if isinstance(error, QueryInterruptedError):
+        return error
+    if "interrupted" not in str(error):
+        return error
+    if query_cancelled():
+        return QueryCancelledError("Consulta cancelada: o cliente desconectou")
+    if deadline_exceeded():
+        return QueryTimeoutError("Consulta interrompida: prazo excedido")
+    return error
@@ -0,0 +1,145 @@
+"""
+Índice em memória para sugestões de lojas (typeahead) por nome, PEOP e código
+"""
+import bisect
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.database.normalize import normalize_search_text
+from src.database.versions import VersionedValue
+
+# Tabelas cujas alterações invalidam o índice de lojas
+STORE_TABLES = ("lojas_lojas", "inventario_planilha1")
+
+# Ordem das sugestões: chave igual, prefixo da chave, prefixo de palavra, trecho
+_EXACT, _PREFIX, _WORD_PREFIX, _INFIX = range(4)
+
+
+class TypeaheadIndex:
+    """
+    Sugestões por prefixo (arrays ordenados) e por trecho (mapa de trigramas)
+
+    Cada entrada tem uma ou mais chaves normalizadas; a busca normaliza o
+    texto digitado da mesma forma (normalize.normalize_search_text).
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], keys: Callable[[Dict[str, Any]], List[str]]):
+        """
+        Constrói o índice
+
+        Args:
+            entries (list): Entradas devolvidas nas sugestões
+            keys (Callable): Função que retorna as chaves normalizadas de uma entrada
+        """
+        self.entries = entries
+        self._keys: List[List[str]] = [keys(entry) for entry in entries]
+        self._prefixes: List[Tuple[str, int, int]] = []
+        self._trigrams: Dict[str, set] = {}
+        for position, entry_keys in enumerate(self._keys):
+            for key in entry_keys:
+                self._prefixes.append((key, _PREFIX, position))
+                for word in key.split(" ")[1:]:
+                    self._prefixes.append((word, _WORD_PREFIX, position))
+                for i in range(len(key) - 2):
+                    self._trigrams.setdefault(key[i:i + 3], set()).add(position)
+        self._prefixes.sort()
+        self._sorted_keys = [key for key, _, _ in self._prefixes]
+
+    def search(self, query: str, limit: int = 20,
+               predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna as melhores sugestões para o texto digitado
+
+        Args:
+            query (str): Texto digitado
+            limit (int): Máximo de sugestões
+            predicate (Callable, optional): Filtro adicional sobre as entradas
+
+        Returns:
+            list: Entradas ordenadas por relevância e depois pela primeira chave
+        """
+        term = normalize_search_text(query)
+        if not term:
+            return []
+        ranks: Dict[int, int] = {}
+
+        start = bisect.bisect_left(self._sorted_keys, term)
+        for i in range(start, len(self._prefixes)):
+            key, kind, position = self._prefixes[i]
+            if not key.startswith(term):
+                break
+            rank = _EXACT if key == term and kind == _PREFIX else kind
+            if rank < ranks.get(position, _INFIX + 1):
+                ranks[position] = rank
+
+        if len(term) >= 3:
+            postings = [self._trigrams.get(term[i:i + 3], set()) for i in range(len(term) - 2)]
+            for position in set.intersection(*sorted(postings, key=len)):
+                if position not in ranks and any(term in key for key in self._keys[position]):
+                    ranks[position] = _INFIX
+
+        positions = [p for p in ranks if predicate is None or predicate(self.entries[p])]
+        best = sorted(positions, key=lambda p: (ranks[p], self._keys[p][0] if self._keys[p] else ""))
+        return [self.entries[p] for p in best[:limit]]
+
+
+def load_store_entries(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """
+    Lê as lojas (lojas_lojas) e os People do inventário sem cadastro de loja
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+
+    Returns:
+        list: id, codigo, nome, endereco, cidade, uf e status por loja, mais
+        `people` (valor de People no inventário, None se a loja não tem circuitos)
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    people = {}
+    if "inventario_planilha1" in tables:
+        # Chave em texto: PEOP e People podem ter chegado da planilha com tipos diferentes
+        people = {str(row[0]): row[0] for row in conn.execute(
+            "SELECT DISTINCT People FROM inventario_planilha1 WHERE People IS NOT NULL")}
+
+    entries, seen = [], set()
+    if "lojas_lojas" in tables:
+        rows = conn.execute('SELECT CODIGO, PEOP, LOJAS, "ENDEREÇO", CIDADE, UF, STATUS FROM lojas_lojas')
+        for row in rows:
+            row = tuple(row)
+            if row in seen:
+                continue
+            seen.add(row)
+            entries.append({"id": row[0], "codigo": row[1], "nome": row[2], "endereco": row[3],
+                            "cidade": row[4], "uf": row[5], "status": row[6],
+                            "people": people.get(str(row[1])), "registered": True})
+
+    registered = {str(entry["codigo"]) for entry in entries}
+    for key in sorted(set(people) - registered):
+        entries.append({"id": None, "codigo": people[key], "nome": None, "endereco": None,
+                        "cidade": None, "uf": None, "status": None,
+                        "people": people[key], "registered": False})
+    return entries
+
+def _store_keys(entry: Dict[str, Any]) -> List[str]:
+    keys = [normalize_search_text(entry["nome"]), normalize_search_text(entry["codigo"]),
+            normalize_search_text(entry["id"])]
+    return [key for key in keys if key]
+
+
+_store_index = VersionedValue(STORE_TABLES, lambda conn: TypeaheadIndex(load_store_entries(conn), _store_keys))
+
+def get_store_index(conn: sqlite3.Connection) -> TypeaheadIndex:
+    """
+    Obtém o índice de lojas, reconstruindo-o se os dados mudaram
+
+    Args:
+        conn (sqlite3.Connection): Conexão usada para checar a versão e recarregar
+
+    Returns:
+        TypeaheadIndex: Índice compartilhado pelo processo
+    """
+    return _store_index.get(conn)
+
+def reset_store_index():
+    """Descarta o índice de lojas (recarregado na próxima sugestão)"""
+    _store_index.reset()
@@ -0,0 +1,127 @@
+"""
+Versões de dados por tabela (contadores mantidos por triggers)
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.database.pagination import quote_identifier
+
+# Tabela com um contador por tabela monitorada
+VERSIONS_TABLE = "data_versions"
+
+# Tabelas cujas escritas incrementam a versão
+VERSIONED_TABLES: List[str] = ["lojas_lojas", "inventario_planilha1"]
+
+# Sem a tabela de versões, estruturas derivadas são reconstruídas no máximo a cada intervalo
+FALLBACK_REFRESH_SECONDS = 60
+
+
+def ensure_data_versions(conn: sqlite3.Connection, tables: Optional[Sequence[str]] = None) -> Dict[str, List[str]]:
+    """
+    Cria a tabela de versões e os triggers que a incrementam a cada escrita
+
+    Args:
+        conn (sqlite3.Connection): Conexão de escrita
+        tables (Sequence, optional): Tabelas monitoradas (padrão: VERSIONED_TABLES)
+
+    Returns:
+        dict: 'data_versions.<tabela>' em 'created', 'existing' e 'skipped'
+    """
+    tables = VERSIONED_TABLES if tables is None else tables
+    result = {'created': [], 'existing': [], 'skipped': []}
+    versions = quote_identifier(VERSIONS_TABLE)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {versions} "
+                 f"(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)")
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+
+    for table in tables:
+        if table not in existing:
+            result['skipped'].append(f"{VERSIONS_TABLE}.{table}")
+            continue
+        triggers = {f"{table}_version_{event[0].lower()}": event for event in ("INSERT", "UPDATE", "DELETE")}
+        if all(name in existing for name in triggers):
+            result['existing'].append(f"{VERSIONS_TABLE}.{table}")
+            continue
+        bump = (f"INSERT INTO {versions} (table_name, version) VALUES ('{table}', 1) "
+                f"ON CONFLICT(table_name) DO UPDATE SET version = version + 1")
+        for name, event in triggers.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {quote_identifier(name)}")
+            conn.execute(f"CREATE TRIGGER {quote_identifier(name)} AFTER {event} ON {quote_identifier(table)} "
+                         f"BEGIN {bump}; END")
+        # Tabela nova ou recriada pela ingestão: conta como uma alteração
+        conn.execute(bump)
+        result['created'].append(f"{VERSIONS_TABLE}.{table}")
+    conn.commit()
+    return result
+
+def get_data_version(conn: sqlite3.Connection, tables: Sequence[str]) -> Tuple:
+    """
+    Retorna uma chave que muda sempre que os dados das tabelas mudam
+
+    Combina o `PRAGMA schema_version` (tabelas recriadas) com os contadores
+    de data_versions. Sem a tabela de versões, o segundo item é None.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        tables (Sequence): Tabelas de interesse
+
+    Returns:
+        tuple: (schema_version, versões das tabelas)
+    """
+    schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    placeholders = ", ".join("?" for _ in tables)
+    try:
+        rows = conn.execute(f"SELECT table_name, version FROM {quote_identifier(VERSIONS_TABLE)} "
+                            f"WHERE table_name IN ({placeholders})", list(tables)).fetchall()
+    except sqlite3.OperationalError:
+        return schema_version, None
+    versions = dict(rows)
+    return schema_version, tuple(versions.get(table, 0) for table in tables)
+
+
+class VersionedValue:
+    """
+    Estrutura em memória derivada do banco, reconstruída quando os dados mudam
+
+    Compartilhada pelo processo; a versão (get_data_version) é conferida a
+    cada acesso, o que custa duas consultas indexadas.
+    """
+
+    def __init__(self, tables: Sequence[str], build: Callable[[sqlite3.Connection], Any]):
+        """
+        Args:
+            tables (Sequence): Tabelas de origem da estrutura
+            build (Callable): Função que constrói a estrutura a partir de uma conexão
+        """
+        self.tables = tuple(tables)
+        self._build = build
+        self._value = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, conn: sqlite3.Connection) -> Any:
+        """
+        Retorna a estrutura, reconstruindo-a se a versão dos dados mudou
+
+        Args:
+            conn (sqlite3.Connection): Conexão usada para checar a versão e recarregar
+
+        Returns:
+            Any: Valor retornado por `build`
+        """
+        version = get_data_version(conn, self.tables)
+        if version[1] is None:
+            version = (version[0], int(time.time() // FALLBACK_REFRESH_SECONDS))
+        with self._lock:
+            if self._version is None or version != self._version:
+                self._value = self._build(conn)
+                self._version = version
+            return self._value
+
+    def reset(self):
+        """Descarta a estrutura (reconstruída no próximo acesso)"""
+        with self._lock:
+            self._value = None
+            self._version = None
@@ -3,7 +3,10 @@ Módulo de operações de edição de dados
 """
 import streamlit as st
 from src.editor.audit import log_change
-from src.database.connection import get_connection
+from src.database.connection import get_connection, get_read_connection
+from src.database.counts import invalidate_counts
+from src.database.normalize import sync_pending_normalization
+from src.cache import invalidate_cached_tables
 from typing import List, Dict, Any, Optional
 
 # ============================================================================
@@ -14,28 +17,27 @@ def get_lojas(limit: int = 50, offset: int = 0, status: Optional[str] = None,
               uf: Optional[str] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
     """Busca lojas com filtros e paginação"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM lojas WHERE 1=1"
-        params = []
-        
-        if status:
-            query += " AND status = ?"
-            params.append(status)
-        if uf:
-            query += " AND uf = ?"
-            params.append(uf)
-        if search:
-            query += " AND (nome LIKE ? OR endereco LIKE ?)"
-            params.extend([f"%{search}%", f"%{search}%"])
-        
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM lojas WHERE 1=1"
+            params = []
+            
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            if uf:
+                query += " AND uf = ?"
+                params.append(uf)
+            if search:
+                query += " AND (nome LIKE ? OR endereco LIKE ?)"
+                params.extend([f"%{search}%", f"%{search}%"])
+            
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+            
+            cursor.execute(query, params)
+            results = cursor.fetchall()
         
         if results:
             columns = [description[0] for description in cursor.description]
@@ -50,28 +52,27 @@ def get_circuitos(limit: int = 50, offset: int = 0, operadora: Optional[str] = N
                   status: Optional[str] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
     """Busca circuitos com filtros e paginação"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM circuitos WHERE 1=1"
-        params = []
-        
-        if operadora:
-            query += " AND operadora = ?"
-            params.append(operadora)
-        if status:
-            query += " AND status = ?"
-            params.append(status)
-        if search:
-            query += " AND (designacao LIKE ? OR operadora LIKE ?)"
-            params.extend([f"%{search}%", f"%{search}%"])
-        
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM circuitos WHERE 1=1"
+            params = []
+            
+            if operadora:
+                query += " AND operadora = ?"
+                params.append(operadora)
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            if search:
+                query += " AND (designacao LIKE ? OR operadora LIKE ?)"
+                params.extend([f"%{search}%", f"%{search}%"])
+            
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+            
+            cursor.execute(query, params)
+            results = cursor.fetchall()
         
         if results:
             columns = [description[0] for description in cursor.description]
@@ -86,25 +87,24 @@ def get_inventario(limit: int = 50, offset: int = 0, status: Optional[str] = Non
                    search: Optional[str] = None) -> List[Dict[str, Any]]:
     """Busca inventário com filtros e paginação"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM inventario WHERE 1=1"
-        params = []
-        
-        if status:
-            query += " AND status = ?"
-            params.append(status)
-        if search:
-            query += " AND (equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?)"
-            params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
-        
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM inventario WHERE 1=1"
+            params = []
+            
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            if search:
+                query += " AND (equipamento LIKE ? OR modelo LIKE ? OR serial LIKE ?)"
+                params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
+            
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+            
+            cursor.execute(query, params)
+            results = cursor.fetchall()
         
         if results:
             columns = [description[0] for description in cursor.description]
@@ -118,19 +118,20 @@ def get_inventario(limit: int = 50, offset: int = 0, status: Optional[str] = Non
 def create_loja(loja_data: Dict[str, Any]) -> Dict[str, Any]:
     """Cria uma nova loja"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        fields = list(loja_data.keys())
-        placeholders = ", ".join(["?" for _ in fields])
-        values = list(loja_data.values())
-        
-        query = f"INSERT INTO lojas ({', '.join(fields)}) VALUES ({placeholders})"
-        cursor.execute(query, values)
-        
-        loja_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            fields = list(loja_data.keys())
+            placeholders = ", ".join(["?" for _ in fields])
+            values = list(loja_data.values())
+            
+            query = f"INSERT INTO lojas ({', '.join(fields)}) VALUES ({placeholders})"
+            cursor.execute(query, values)
+            
+            loja_id = cursor.lastrowid
+            conn.commit()
+        invalidate_counts("lojas")
+        invalidate_cached_tables("lojas")
         
         # Buscar a loja criada
         return get_loja_by_id(loja_id)
@@ -141,24 +142,25 @@ def create_loja(loja_data: Dict[str, Any]) -> Dict[str, Any]:
 def update_loja(loja_id: int, loja_data: Dict[str, Any]) -> Dict[str, Any]:
     """Atualiza uma loja existente"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Buscar valores antigos para log
-        cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
-        old_data = cursor.fetchone()
-        if not old_data:
-            raise ValueError("Loja não encontrada")
-        
-        # Construir query de update
-        fields = list(loja_data.keys())
-        set_clause = ", ".join([f"{field} = ?" for field in fields])
-        values = list(loja_data.values()) + [loja_id]
-        
-        query = f"UPDATE lojas SET {set_clause} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Buscar valores antigos para log
+            cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
+            old_data = cursor.fetchone()
+            if not old_data:
+                raise ValueError("Loja não encontrada")
+            
+            # Construir query de update
+            fields = list(loja_data.keys())
+            set_clause = ", ".join([f"{field} = ?" for field in fields])
+            values = list(loja_data.values()) + [loja_id]
+            
+            query = f"UPDATE lojas SET {set_clause} WHERE id = ?"
+            cursor.execute(query, values)
+            conn.commit()
+        invalidate_counts("lojas")
+        invalidate_cached_tables("lojas")
         
         # Log das alterações
         for field, new_value in loja_data.items():
@@ -173,12 +175,13 @@ def update_loja(loja_id: int, loja_data: Dict[str, Any]) -> Dict[str, Any]:
 def delete_loja(loja_id: int) -> bool:
     """Deleta uma loja"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM lojas WHERE id = ?", (loja_id,))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM lojas WHERE id = ?", (loja_id,))
+            conn.commit()
+        invalidate_counts("lojas")
+        invalidate_cached_tables("lojas")
         
         return True
     except Exception as e:
@@ -188,19 +191,20 @@ def delete_loja(loja_id: int) -> bool:
 def create_circuito(circuito_data: Dict[str, Any]) -> Dict[str, Any]:
     """Cria um novo circuito"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        fields = list(circuito_data.keys())
-        placeholders = ", ".join(["?" for _ in fields])
-        values = list(circuito_data.values())
-        
-        query = f"INSERT INTO circuitos ({', '.join(fields)}) VALUES ({placeholders})"
-        cursor.execute(query, values)
-        
-        circuito_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            fields = list(circuito_data.keys())
+            placeholders = ", ".join(["?" for _ in fields])
+            values = list(circuito_data.values())
+            
+            query = f"INSERT INTO circuitos ({', '.join(fields)}) VALUES ({placeholders})"
+            cursor.execute(query, values)
+            
+            circuito_id = cursor.lastrowid
+            conn.commit()
+        invalidate_counts("circuitos")
+        invalidate_cached_tables("circuitos")
         
         return get_circuito_by_id(circuito_id)
     except Exception as e:
@@ -210,17 +214,18 @@ def create_circuito(circuito_data: Dict[str, Any]) -> Dict[str, Any]:
 def update_circuito(circuito_id: int, circuito_data: Dict[str, Any]) -> Dict[str, Any]:
     """Atualiza um circuito existente"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        fields = list(circuito_data.keys())
-        set_clause = ", ".join([f"{field} = ?" for field in fields])
-        values = list(circuito_data.values()) + [circuito_id]
-        
-        query = f"UPDATE circuitos SET {set_clause} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            fields = list(circuito_data.keys())
+            set_clause = ", ".join([f"{field} = ?" for field in fields])
+            values = list(circuito_data.values()) + [circuito_id]
+            
+            query = f"UPDATE circuitos SET {set_clause} WHERE id = ?"
+            cursor.execute(query, values)
+            conn.commit()
+        invalidate_counts("circuitos")
+        invalidate_cached_tables("circuitos")
         
         return get_circuito_by_id(circuito_id)
     except Exception as e:
@@ -230,12 +235,13 @@ def update_circuito(circuito_id: int, circuito_data: Dict[str, Any]) -> Dict[str
 def delete_circuito(circuito_id: int) -> bool:
     """Deleta um circuito"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM circuitos WHERE id = ?", (circuito_id,))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM circuitos WHERE id = ?", (circuito_id,))
+            conn.commit()
+        invalidate_counts("circuitos")
+        invalidate_cached_tables("circuitos")
         
         return True
     except Exception as e:
@@ -245,19 +251,20 @@ def delete_circuito(circuito_id: int) -> bool:
 def create_inventario_item(item_data: Dict[str, Any]) -> Dict[str, Any]:
     """Cria um novo item de inventário"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        fields = list(item_data.keys())
-        placeholders = ", ".join(["?" for _ in fields])
-        values = list(item_data.values())
-        
-        query = f"INSERT INTO inventario ({', '.join(fields)}) VALUES ({placeholders})"
-        cursor.execute(query, values)
-        
-        item_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            fields = list(item_data.keys())
+            placeholders = ", ".join(["?" for _ in fields])
+            values = list(item_data.values())
+            
+            query = f"INSERT INTO inventario ({', '.join(fields)}) VALUES ({placeholders})"
+            cursor.execute(query, values)
+            
+            item_id = cursor.lastrowid
+            conn.commit()
+        invalidate_counts("inventario")
+        invalidate_cached_tables("inventario")
         
         return get_inventario_item_by_id(item_id)
     except Exception as e:
@@ -267,17 +274,18 @@ def create_inventario_item(item_data: Dict[str, Any]) -> Dict[str, Any]:
 def update_inventario_item(item_id: int, item_data: Dict[str, Any]) -> Dict[str, Any]:
     """Atualiza um item de inventário existente"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        fields = list(item_data.keys())
-        set_clause = ", ".join([f"{field} = ?" for field in fields])
-        values = list(item_data.values()) + [item_id]
-        
-        query = f"UPDATE inventario SET {set_clause} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            fields = list(item_data.keys())
+            set_clause = ", ".join([f"{field} = ?" for field in fields])
+            values = list(item_data.values()) + [item_id]
+            
+            query = f"UPDATE inventario SET {set_clause} WHERE id = ?"
+            cursor.execute(query, values)
+            conn.commit()
+        invalidate_counts("inventario")
+        invalidate_cached_tables("inventario")
         
         return get_inventario_item_by_id(item_id)
     except Exception as e:
@@ -287,12 +295,13 @@ def update_inventario_item(item_id: int, item_data: Dict[str, Any]) -> Dict[str,
 def delete_inventario_item(item_id: int) -> bool:
     """Deleta um item de inventário"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM inventario WHERE id = ?", (item_id,))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM inventario WHERE id = ?", (item_id,))
+            conn.commit()
+        invalidate_counts("inventario")
+        invalidate_cached_tables("inventario")
         
         return True
     except Exception as e:
@@ -303,11 +312,10 @@ def delete_inventario_item(item_id: int) -> bool:
 def get_loja_by_id(loja_id: int) -> Optional[Dict[str, Any]]:
     """Busca uma loja por ID"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM lojas WHERE id = ?", (loja_id,))
+            result = cursor.fetchone()
         
         if result:
             columns = [description[0] for description in cursor.description]
@@ -320,11 +328,10 @@ def get_loja_by_id(loja_id: int) -> Optional[Dict[str, Any]]:
 def get_circuito_by_id(circuito_id: int) -> Optional[Dict[str, Any]]:
     """Busca um circuito por ID"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM circuitos WHERE id = ?", (circuito_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM circuitos WHERE id = ?", (circuito_id,))
+            result = cursor.fetchone()
         
         if result:
             columns = [description[0] for description in cursor.description]
@@ -337,11 +344,10 @@ def get_circuito_by_id(circuito_id: int) -> Optional[Dict[str, Any]]:
 def get_inventario_item_by_id(item_id: int) -> Optional[Dict[str, Any]]:
     """Busca um item de inventário por ID"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM inventario WHERE id = ?", (item_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM inventario WHERE id = ?", (item_id,))
+            result = cursor.fetchone()
         
         if result:
             columns = [description[0] for description in cursor.description]
@@ -368,18 +374,21 @@ def update_lojas_record(peop_code: str, field: str, new_value: str) -> bool:
         bool: True se atualizado com sucesso, False caso contrário
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Buscar valor anterior para o log
-        cursor.execute(f'SELECT "{field}" FROM lojas_lojas WHERE PEOP = ?', (peop_code,))
-        result = cursor.fetchone()
-        old_value = result[0] if result else None
-        
-        # Atualizar registro
-        cursor.execute(f'UPDATE lojas_lojas SET "{field}" = ? WHERE PEOP = ?', (new_value, peop_code))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Buscar valor anterior para o log
+            cursor.execute(f'SELECT "{field}" FROM lojas_lojas WHERE PEOP = ?', (peop_code,))
+            result = cursor.fetchone()
+            old_value = result[0] if result else None
+            
+            # Atualizar registro
+            cursor.execute(f'UPDATE lojas_lojas SET "{field}" = ? WHERE PEOP = ?', (new_value, peop_code))
+            sync_pending_normalization(conn, ["lojas_lojas"])
+            conn.commit()
+        invalidate_counts("lojas_lojas")
+        # Alterar o próprio PEOP afeta também as consultas do novo código
+        invalidate_cached_tables("lojas_lojas", [peop_code, new_value] if field == "PEOP" else [peop_code])
         
         # Registrar no log
         log_change("lojas_lojas", peop_code, field, old_value, new_value)
@@ -402,18 +411,21 @@ def update_inventario_record(people_code: str, field: str, new_value: str) -> bo
         bool: True se atualizado com sucesso, False caso contrário
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Buscar valor anterior para o log
-        cursor.execute(f'SELECT "{field}" FROM inventario_planilha1 WHERE People = ?', (people_code,))
-        result = cursor.fetchone()
-        old_value = result[0] if result else None
-        
-        # Atualizar registro
-        cursor.execute(f'UPDATE inventario_planilha1 SET "{field}" = ? WHERE People = ?', (new_value, people_code))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Buscar valor anterior para o log
+            cursor.execute(f'SELECT "{field}" FROM inventario_planilha1 WHERE People = ?', (people_code,))
+            result = cursor.fetchone()
+            old_value = result[0] if result else None
+            
+            # Atualizar registro
+            cursor.execute(f'UPDATE inventario_planilha1 SET "{field}" = ? WHERE People = ?', (new_value, people_code))
+            sync_pending_normalization(conn, ["inventario_planilha1"])
+            conn.commit()
+        invalidate_counts("inventario_planilha1")
+        invalidate_cached_tables("inventario_planilha1",
+                                 [people_code, new_value] if field == "People" else [people_code])
         
         # Registrar no log
         log_change("inventario_planilha1", people_code, field, old_value, new_value)
@@ -435,18 +447,17 @@ def get_record_by_id(table: str, record_id: str) -> dict:
         dict: Dados do registro ou None se não encontrado
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        if table == "lojas_lojas":
-            cursor.execute("SELECT * FROM lojas_lojas WHERE PEOP = ?", (record_id,))
-        elif table == "inventario_planilha1":
-            cursor.execute("SELECT * FROM inventario_planilha1 WHERE People = ?", (record_id,))
-        else:
-            return None
-        
-        result = cursor.fetchone()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            if table == "lojas_lojas":
+                cursor.execute("SELECT * FROM lojas_lojas WHERE PEOP = ?", (record_id,))
+            elif table == "inventario_planilha1":
+                cursor.execute("SELECT * FROM inventario_planilha1 WHERE People = ?", (record_id,))
+            else:
+                return None
+            
+            result = cursor.fetchone()
         
         if result:
             # Converter para dict
@@ -515,44 +526,52 @@ def batch_update_records(table: str, updates: list) -> dict:
         'error_messages': []
     }
     
+    # Chaves (PEOP/People) das linhas alteradas, para invalidar só o cache afetado
+    written_keys = []
+    
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        for record_id, field, new_value in updates:
-            try:
-                # Validar valor
-                is_valid, error_msg = validate_field_value(table, field, new_value)
-                if not is_valid:
-                    results['errors'] += 1
-                    results['error_messages'].append(f"Registro {record_id}: {error_msg}")
-                    continue
-                
-                # Buscar valor anterior
-                if table == "lojas_lojas":
-                    cursor.execute(f'SELECT "{field}" FROM lojas_lojas WHERE PEOP = ?', (record_id,))
-                else:
-                    cursor.execute(f'SELECT "{field}" FROM inventario_planilha1 WHERE People = ?', (record_id,))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            for record_id, field, new_value in updates:
+                try:
+                    # Validar valor
+                    is_valid, error_msg = validate_field_value(table, field, new_value)
+                    if not is_valid:
+                        results['errors'] += 1
+                        results['error_messages'].append(f"Registro {record_id}: {error_msg}")
+                        continue
+                    
+                    # Buscar valor anterior
+                    if table == "lojas_lojas":
+                        cursor.execute(f'SELECT "{field}" FROM lojas_lojas WHERE PEOP = ?', (record_id,))
+                    else:
+                        cursor.execute(f'SELECT "{field}" FROM inventario_planilha1 WHERE People = ?', (record_id,))
+                    
+                    result = cursor.fetchone()
+                    old_value = result[0] if result else None
+                    
+                    # Atualizar
+                    if table == "lojas_lojas":
+                        cursor.execute(f'UPDATE lojas_lojas SET "{field}" = ? WHERE PEOP = ?', (new_value, record_id))
+                    else:
+                        cursor.execute(f'UPDATE inventario_planilha1 SET "{field}" = ? WHERE People = ?', (new_value, record_id))
+                    
+                    # Log da alteração
+                    log_change(table, record_id, field, old_value, new_value)
+                    written_keys.append(record_id)
+                    if field in ("PEOP", "People"):
+                        written_keys.append(new_value)
+                    results['success'] += 1
                 
-                result = cursor.fetchone()
-                old_value = result[0] if result else None
-                
-                # Atualizar
-                if table == "lojas_lojas":
-                    cursor.execute(f'UPDATE lojas_lojas SET "{field}" = ? WHERE PEOP = ?', (new_value, record_id))
-                else:
-                    cursor.execute(f'UPDATE inventario_planilha1 SET "{field}" = ? WHERE People = ?', (new_value, record_id))
-                
-                # Log da alteração
-                log_change(table, record_id, field, old_value, new_value)
-                results['success'] += 1
-                
-            except Exception as e:
-                results['errors'] += 1
-                results['error_messages'].append(f"Registro {record_id}: {str(e)}")
-        
-        conn.commit()
-        conn.close()
+                except Exception as e:
+                    results['errors'] += 1
+                    results['error_messages'].append(f"Registro {record_id}: {str(e)}")
+            
+            sync_pending_normalization(conn, [table])
+            conn.commit()
+        invalidate_counts(table)
+        invalidate_cached_tables(table, written_keys)
         
     except Exception as e:
         results['errors'] += 1
@@ -60,10 +60,16 @@ def show_cache_management():
             st.write("**Hits:**", f"{stats['hits']:,}")
             st.write("**Misses:**", f"{stats['misses']:,}")
             st.write("**Evictions:**", f"{stats['evictions']:,}")
+            st.write("**Coalescidas:**", f"{stats['coalesced']:,}")
+            st.write("**Memória:**", f"{stats['current_bytes'] / 1024 / 1024:.1f} MB"
+                     + (f" de {stats['max_bytes'] / 1024 / 1024:.0f} MB" if stats['max_bytes'] else ""))
         
         with col2:
             st.write("**Criado em:**", stats['created_at'].strftime('%d/%m/%Y %H:%M'))
             st.write("**Habilitado:**", "Sim" if stats['enabled'] else "Não")
+            st.write("**Backend:**", "compartilhado (SQLite)" if stats['backend'] == 'sqlite' else "memória")
+            for namespace, size in sorted(stats['bytes_by_namespace'].items(), key=lambda item: -item[1]):
+                st.write(f"**{namespace}:**", f"{size / 1024:.0f} KB")
     
     # Ações do cache
     st.subheader("🔧 Ações do Cache")
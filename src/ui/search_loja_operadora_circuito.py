@@ -1,19 +1,18 @@
 import streamlit as st
 import pandas as pd
-from src.database.connection import get_connection
+from src.database.connection import get_read_connection
+from src.database.queries import suggest_stores
 from src.ui.components import display_search_results, export_dataframe
 
 def get_lojas_filtradas(busca_loja):
-    conn = get_connection()
-    lojas = pd.read_sql_query(
-        'SELECT DISTINCT People, LOJAS FROM inventario_planilha1 LEFT JOIN lojas_lojas ON inventario_planilha1.People = lojas_lojas.PEOP ORDER BY LOJAS', conn)
-    conn.close()
-    if busca_loja.strip():
-        return lojas[lojas['LOJAS'].str.contains(busca_loja, case=False, na=False) | lojas['People'].astype(str).str.contains(busca_loja, case=False, na=False)]
-    return lojas.iloc[:0]
+    if not busca_loja.strip():
+        return pd.DataFrame(columns=['People', 'LOJAS'])
+    sugestoes = suggest_stores(busca_loja, limit=20, with_circuits=True)
+    return pd.DataFrame([{'People': loja['people'], 'LOJAS': loja['nome']} for loja in sugestoes],
+                        columns=['People', 'LOJAS'])
 
 def get_operadoras_para_loja(people_sel):
-    conn = get_connection()
+    conn = get_read_connection()
     operadoras = pd.read_sql_query(
         'SELECT DISTINCT Operadora FROM inventario_planilha1 WHERE People = ? AND Operadora IS NOT NULL AND Operadora != ""',
         conn, params=(people_sel,))['Operadora'].sort_values().tolist()
@@ -21,7 +20,7 @@ def get_operadoras_para_loja(people_sel):
     return operadoras
 
 def get_circuitos_para_loja_operadora(people_sel, operadora_sel):
-    conn = get_connection()
+    conn = get_read_connection()
     circuitos = pd.read_sql_query(
         'SELECT DISTINCT "Circuito_Designação", "Novo_Circuito_Designação" FROM inventario_planilha1 WHERE People = ? AND Operadora = ?',
         conn, params=(people_sel, operadora_sel))
@@ -29,7 +28,7 @@ def get_circuitos_para_loja_operadora(people_sel, operadora_sel):
     return pd.unique(pd.concat([circuitos["Circuito_Designação"], circuitos["Novo_Circuito_Designação"]]).dropna())
 
 def get_detalhes_circuito(people_sel, operadora_sel, circuito_sel):
-    conn = get_connection()
+    conn = get_read_connection()
     df_circ = pd.read_sql_query(
         '''SELECT * FROM inventario_planilha1 LEFT JOIN lojas_lojas ON inventario_planilha1.People = lojas_lojas.PEOP
            WHERE inventario_planilha1.People = ? AND inventario_planilha1.Operadora = ?
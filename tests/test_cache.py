@@ -15,6 +15,14 @@ from src.cache import (
     get_cached_data, set_cached_data, clear_cache,
     get_cache_stats, is_cache_enabled, enable_cache, disable_cache
 )
+from src.cache import memory_cache
+from src.cache.memory_cache import MemoryCache, create_cache, estimate_size
+from src.cache.shared_cache import SharedCache
+from src.cache.single_flight import SingleFlight, single_flight
+from src.database.timeouts import QueryTimeoutError, deadline_exceeded, query_deadline
+import sqlite3
+import threading
+import pandas as pd
 
 class TestCacheBasic:
     """Testes básicos do cache"""
@@ -207,5 +215,337 @@ class TestCachePerformance:
         # Verificar se houve evictions
         assert stats['evictions'] > 0
 
+class TestCacheEviction:
+    """Testes da política de despejo (LRU) do MemoryCache"""
+    
+    def test_evicts_least_recently_used(self):
+        """Testa que uma entrada lida recentemente sobrevive ao despejo"""
+        cache = MemoryCache(max_size=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key, 60)
+        assert cache.get("a") == "a"
+        cache.set("d", "d", 60)
+        assert cache.get("b") is None
+        assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+        assert cache.get_stats()['evictions'] == 1
+    
+    def test_expired_entries_do_not_use_capacity(self):
+        """Testa que entradas vencidas saem antes de despejar entradas válidas"""
+        cache = MemoryCache(max_size=2)
+        cache.set("short", 1, 1)
+        cache.set("long", 2, 60)
+        time.sleep(1.1)
+        cache.set("new", 3, 60)
+        assert cache.get("long") == 2 and cache.get("new") == 3
+        assert cache.get_stats()['evictions'] == 0
+
+class TestCacheMemoryBudget:
+    """Testes do orçamento de memória (max_bytes) do MemoryCache"""
+    
+    def test_dataframe_size_uses_deep_memory_usage(self):
+        """Testa que DataFrames contam o conteúdo das strings"""
+        df = pd.DataFrame({"LOJAS": ["x" * 1000] * 10})
+        assert estimate_size(df) == df.memory_usage(index=True, deep=True).sum()
+        assert estimate_size(df) > 10000
+        assert estimate_size({"rows": ["x" * 1000] * 10}) > 10000
+    
+    def test_evicts_by_bytes(self):
+        """Testa que o despejo LRU respeita o limite de bytes"""
+        value = "x" * 1000
+        cache = MemoryCache(max_size=100, max_bytes=3 * estimate_size(value))
+        for key in ("a", "b", "c"):
+            cache.set(key, value, 60, namespace="lojas")
+        cache.get("a")
+        cache.set("d", value, 60, namespace="people")
+        stats = cache.get_stats()
+        assert cache.get("b") is None and cache.get("a") == value
+        assert stats['current_bytes'] <= stats['max_bytes']
+        assert stats['bytes_by_namespace'] == {"lojas": 2 * estimate_size(value), "people": estimate_size(value)}
+    
+    def test_rejects_value_larger_than_budget(self):
+        """Testa que um valor maior que o orçamento não esvazia o cache"""
+        cache = MemoryCache(max_bytes=2000)
+        cache.set("small", "x", 60)
+        assert not cache.set("big", "x" * 5000, 60)
+        assert cache.get("small") == "x"
+        assert cache.get_stats()['rejected'] == 1
+    
+    def test_overwrite_and_clear_update_bytes(self):
+        """Testa que regravar e limpar mantêm a contabilidade consistente"""
+        cache = MemoryCache()
+        cache.set("k", "x" * 100, 60)
+        cache.set("k", "x" * 10, 60)
+        assert cache.get_stats()['current_bytes'] == estimate_size("x" * 10)
+        cache.clear()
+        assert cache.get_stats()['current_bytes'] == 0
+        assert cache.get_stats()['bytes_by_namespace'] == {}
+
+class TestCacheInvalidation:
+    """Testes da invalidação por tabelas e chaves do MemoryCache"""
+    
+    @pytest.fixture
+    def cache(self):
+        cache = MemoryCache()
+        cache.set("people_p1", 1, 60, tables=["lojas_lojas", "inventario_planilha1"], keys=["P1"])
+        cache.set("people_p2", 2, 60, tables=["lojas_lojas", "inventario_planilha1"], keys=["P2"])
+        cache.set("address", 3, 60, tables=["lojas_lojas"])
+        cache.set("untagged", 4, 60)
+        return cache
+    
+    def test_keyed_invalidation(self, cache):
+        """Testa que uma escrita com chave mantém as entradas de outras chaves"""
+        assert cache.invalidate("lojas_lojas", ["P1"]) == 2
+        assert [cache.get(key) for key in ("people_p1", "people_p2", "address", "untagged")] == [None, 2, None, 4]
+    
+    def test_table_invalidation(self, cache):
+        """Testa que uma escrita sem chave descarta tudo o que depende da tabela"""
+        assert cache.invalidate("inventario_planilha1") == 2
+        assert [cache.get(key) for key in ("people_p1", "people_p2", "address", "untagged")] == [None, None, 3, 4]
+        assert cache.invalidate("inventario_planilha1") == 0
+        assert cache.get_stats()['invalidations'] == 2
+    
+    def test_evicted_entries_leave_index(self, cache):
+        """Testa que entradas despejadas ou regravadas saem do índice de dependências"""
+        cache.set("people_p1", 5, 60)
+        assert cache.invalidate("lojas_lojas", ["P1"]) == 1
+        assert cache.get("people_p1") == 5
+        cache.clear()
+        assert cache.invalidate("lojas_lojas") == 0
+    
+    def test_stale_reader_does_not_reinstall(self, cache):
+        """Testa que valores lidos antes de uma escrita nas suas tabelas/chaves são descartados"""
+        since = cache.generation()
+        cache.invalidate("lojas_lojas", ["P1"])
+        assert not cache.set("people_p1", "velho", 60, tables=["lojas_lojas"], keys=["P1"], since=since)
+        assert not cache.set("address", "velho", 60, tables=["lojas_lojas"], since=since)
+        assert cache.set("people_p2", "novo", 60, tables=["lojas_lojas"], keys=["P2"], since=since)
+        assert cache.set("circuits", "novo", 60, tables=["inventario_planilha1"], since=since)
+        assert cache.get("people_p1") is None
+        assert cache.get_stats()['stale'] == 2
+    
+    def test_stale_reader_does_not_reinstall_after_clear(self, cache):
+        """Testa que valores lidos antes de um clear() são descartados, com ou sem tabelas"""
+        since = cache.generation()
+        cache.clear()
+        assert not cache.set("address", "velho", 60, tables=["lojas_lojas"], since=since)
+        assert not cache.set("untagged", "velho", 60, since=since)
+        assert cache.set("address", "novo", 60, tables=["lojas_lojas"], since=cache.generation())
+        assert cache.get("untagged") is None
+        assert cache.get_stats()['stale'] == 2
+    
+    def test_cached_data_miss_records_generation(self, cache, monkeypatch):
+        """Testa o descarte via get_cached_data/set_cached_data quando a escrita ocorre no meio"""
+        monkeypatch.setattr(memory_cache, "_cache_instance", cache)
+        assert memory_cache.get_cached_data("search_by_ggl_gr", "ana") is None
+        memory_cache.invalidate_cached_tables("lojas_lojas")
+        assert not memory_cache.set_cached_data("velho", 60, "search_by_ggl_gr", "ana", tables=["lojas_lojas"])
+        assert memory_cache.get_cached_data("search_by_ggl_gr", "ana") is None
+        assert memory_cache.set_cached_data("novo", 60, "search_by_ggl_gr", "ana", tables=["lojas_lojas"])
+        assert memory_cache.get_cached_data("search_by_ggl_gr", "ana") == "novo"
+
+class TestSharedCache:
+    """Testes do cache compartilhado entre processos (arquivo SQLite)"""
+    
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "cache" / "shared.db")
+    
+    def test_workers_share_entries_and_invalidations(self, path):
+        """Testa que duas instâncias no mesmo arquivo veem as mesmas entradas"""
+        worker1, worker2 = SharedCache(path), SharedCache(path)
+        df = pd.DataFrame({"PEOP": ["P1"], "LOJAS": ["Loja 1"]})
+        assert worker1.set("people_p1", df, 60, "unified_search_people", tables=["lojas_lojas"], keys=["P1"])
+        worker1.set("people_p2", {"rows": 2}, 60, tables=["lojas_lojas"], keys=["P2"])
+        assert worker2.get("people_p1").equals(df)
+        assert worker2.invalidate("lojas_lojas", ["P1"]) == 1
+        assert worker1.get("people_p1") is None and worker1.get("people_p2") == {"rows": 2}
+        worker2.clear()
+        assert worker1.get("people_p2") is None
+    
+    def test_stale_write_from_other_worker(self, path):
+        """Testa que a invalidação feita por outra instância descarta a leitura em andamento"""
+        worker1, worker2 = SharedCache(path), SharedCache(path)
+        since = worker1.generation()
+        worker2.invalidate("lojas_lojas", ["P1"])
+        assert not worker1.set("people_p1", 1, 60, tables=["lojas_lojas"], keys=["P1"], since=since)
+        assert worker1.set("people_p2", 2, 60, tables=["lojas_lojas"], keys=["P2"], since=since)
+        assert worker1.set("people_p1", 1, 60, tables=["lojas_lojas"], keys=["P1"], since=worker1.generation())
+        assert worker1.get_stats()['stale'] == 1
+        since = worker1.generation()
+        worker2.clear()
+        assert not worker1.set("people_p2", 2, 60, tables=["lojas_lojas"], keys=["P2"], since=since)
+    
+    def test_values_round_trip_without_pickle(self, path):
+        """Testa a serialização em JSON de DataFrames (com attrs) e dicts com chaves não-texto"""
+        cache = SharedCache(path)
+        df = pd.DataFrame({"PEOP": ["P1", None], "total": [1, 2], "media": [1.5, None]})
+        df.attrs["fuzzy"] = True
+        stats = {"total_lojas": 2, "lojas_por_status": {"ATIVA": 1, None: 1}}
+        cache.set("df", df, 60)
+        cache.set("stats", stats, 60)
+        cached = cache.get("df")
+        assert cached.equals(df) and cached.attrs == {"fuzzy": True}
+        assert cache.get("stats") == stats
+        assert not cache.set("unsupported", {1, 2}, 60)
+        assert cache.get_stats()['rejected'] == 1
+    
+    @pytest.mark.skipif(sys.platform == "win32", reason="permissões POSIX")
+    def test_file_is_private(self, path):
+        """Testa que o diretório e o arquivo do cache são acessíveis só ao usuário"""
+        SharedCache(path).set("k", "v", 60)
+        assert Path(path).parent.stat().st_mode & 0o777 == 0o700
+        assert Path(path).stat().st_mode & 0o777 == 0o600
+    
+    def test_failed_clear_does_not_leave_transaction_open(self, path):
+        """Testa que uma falha no clear() desfaz a transação e o cache continua utilizável"""
+        cache = SharedCache(path)
+        cache.set("k", "v", 60)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TRIGGER falha BEFORE DELETE ON cache_entries BEGIN SELECT RAISE(ABORT, 'falha'); END")
+        conn.commit()
+        cache.clear()
+        conn.execute("DROP TRIGGER falha")
+        conn.commit()
+        conn.close()
+        assert cache.get("k") == "v"
+        assert cache.set("k2", "v2", 60)
+        cache.clear()
+        assert cache.get("k") is None
+        assert cache.get_stats()['errors'] == 1
+    
+    def test_stats_cover_all_workers(self, path):
+        """Testa que as estatísticas somam os contadores de todas as instâncias"""
+        worker1, worker2 = SharedCache(path), SharedCache(path)
+        worker1.set("k", "v", 60, "search_by_address")
+        worker1.get("k")
+        worker2.get("k")
+        worker2.get("missing")
+        # Cada instância publica seus contadores a cada segundo ou ao ler as estatísticas
+        worker2.get_stats()
+        stats = worker1.get_stats()
+        assert (stats['hits'], stats['misses'], stats['sets']) == (2, 1, 1)
+        assert stats['current_size'] == 1 and stats['backend'] == 'sqlite'
+        assert list(stats['bytes_by_namespace']) == ["search_by_address"]
+    
+    def test_expiration_and_eviction(self, path):
+        """Testa TTL e despejo dos menos usados respeitando max_size"""
+        cache = SharedCache(path, max_size=2)
+        cache.set("short", 1, 1)
+        time.sleep(1.1)
+        assert cache.get("short") is None
+        cache.set("a", 1, 60)
+        cache.set("b", 2, 60)
+        cache.set("c", 3, 60)
+        assert cache.get("a") is None and cache.get("c") == 3
+        assert cache.get_stats()['evictions'] == 1
+    
+    def test_backend_is_configurable(self, path):
+        """Testa a escolha do backend pela configuração"""
+        assert isinstance(create_cache({"max_cache_size_mb": 1}), MemoryCache)
+        shared = create_cache({"max_cache_size_mb": 1, "backend": "sqlite", "shared_path": path})
+        assert isinstance(shared, SharedCache)
+        with pytest.raises(ValueError):
+            create_cache({"max_cache_size_mb": 1, "backend": "redis"})
+
+class TestSingleFlight:
+    """Testes da coalescência de chamadas concorrentes"""
+    
+    def _run_concurrently(self, func, callers=8):
+        """Dispara func em várias threads ao mesmo tempo; retorna resultados e exceções"""
+        barrier = threading.Barrier(callers)
+        outcomes = [None] * callers
+        def run(i):
+            barrier.wait()
+            try:
+                outcomes[i] = func()
+            except Exception as e:
+                outcomes[i] = e
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Testa que chamadores concorrentes recebem o resultado de uma única execução"""
+        group = SingleFlight()
+        calls = []
+        def slow_query():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"total": 42}
+        outcomes = self._run_concurrently(lambda: group.do("stats", slow_query))
+        assert len(calls) == 1
+        assert all(outcome is outcomes[0] for outcome in outcomes)
+        stats = group.get_stats()
+        assert (stats['executions'], stats['coalesced'], stats['in_flight']) == (1, 7, 0)
+    
+    def test_exception_is_shared(self):
+        """Testa que a exceção da execução chega a todos os chamadores"""
+        group = SingleFlight()
+        def failing_query():
+            time.sleep(0.2)
+            raise RuntimeError("banco indisponível")
+        outcomes = self._run_concurrently(lambda: group.do("stats", failing_query), callers=4)
+        assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+        assert group.get_stats()['executions'] == 1
+        # Após a falha, uma nova chamada executa de novo
+        assert group.do("stats", lambda: "ok") == "ok"
+    
+    def test_decorator_keys_by_arguments(self):
+        """Testa que o decorador só coalesce chamadas com os mesmos argumentos"""
+        calls = []
+        @single_flight()
+        def search(term):
+            calls.append(term)
+            time.sleep(0.2)
+            return term.upper()
+        outcomes = self._run_concurrently(lambda: search("SPO-001"), callers=4)
+        outcomes += self._run_concurrently(lambda: search(threading.current_thread().name), callers=3)
+        assert calls.count("SPO-001") == 1 and len(calls) == 4
+        assert outcomes[:4] == ["SPO-001"] * 4
+        assert 'coalesced' in get_cache_stats()
+    
+    def test_leader_interruption_is_not_shared(self):
+        """Testa que o prazo de quem executa não derruba quem espera: outro executa de novo"""
+        group = SingleFlight()
+        calls = []
+        def query():
+            calls.append(1)
+            time.sleep(0.3)
+            if deadline_exceeded():
+                raise sqlite3.OperationalError("interrupted")
+            return "ok"
+        leader_errors = []
+        def leader():
+            try:
+                with query_deadline(0.1):
+                    group.do("designation", query)
+            except sqlite3.OperationalError as e:
+                leader_errors.append(e)
+        follower_result = []
+        thread = threading.Thread(target=leader)
+        thread.start()
+        time.sleep(0.05)
+        follower_result.append(group.do("designation", query))
+        thread.join()
+        assert follower_result == ["ok"] and len(calls) == 2
+        assert len(leader_errors) == 1
+        assert group.get_stats()['retried'] == 1
+    
+    def test_waiter_honours_own_deadline(self):
+        """Testa que quem espera desiste no seu próprio prazo"""
+        group = SingleFlight()
+        thread = threading.Thread(target=group.do, args=("stats", time.sleep, 1.0))
+        thread.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        with pytest.raises(QueryTimeoutError):
+            with query_deadline(0.2):
+                group.do("stats", time.sleep, 1.0)
+        assert time.monotonic() - start < 0.6
+        thread.join()
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
@@ -1,8 +1,14 @@
 """
 Testes unitários para o módulo database
 """
+import asyncio
+import gc
+import pandas as pd
 import pytest
+import sqlite3
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Adicionar src ao path
@@ -16,6 +22,27 @@ from src.database import (
     search_by_id_vivo, search_by_address, search_by_ggl_gr,
     get_dashboard_stats
 )
+import config
+from src.database import connection as db_connection
+from src.database.connection import apply_connection_profile
+from src.database.executor import DatabaseExecutor, run_export, run_read
+from src.database.timeouts import (
+    QueryCancelledError, QueryTimeoutError, disconnect_waiter, query_deadline
+)
+from src.database.pagination import InvalidCursorError
+from src.database.pool import ConnectionPool, PooledConnection, PoolTimeoutError
+from src.database.counts import CountCache
+from src.database.query_log import QueryLog, fingerprint, get_query_log
+from src.database.indexes import INDEX_REGISTRY
+from src.database.normalize import normalize_search_text, normalization_pending
+from src.database.queries import search_circuits_by_operator, suggest_stores, unified_search_people_many
+from src.cache.memory_cache import get_cached_data
+from src.database.typeahead import TypeaheadIndex, reset_store_index
+from src.database.fuzzy import FuzzyIndex, edit_distance, reset_fuzzy_index
+from src.database.read_model import READ_MODEL_TABLE, read_model_available
+from src.database.versions import get_data_version
+from src.cache.memory_cache import clear_cache
+from src.database.metrics import MetricsRegistry, get_registry, record_request, track_query, track_request
 
 class TestDatabaseConnection:
     """Testes para conexão com banco de dados"""
@@ -101,5 +128,1094 @@ class TestDatabaseErrorHandling:
         results = unified_search_people(None)
         assert results is not None
 
+class TestConnectionPool:
+    """Testes para o pool de conexões"""
+    
+    @pytest.fixture
+    def pool(self, tmp_path):
+        db_path = str(tmp_path / "pool.db")
+        connect = lambda: sqlite3.connect(db_path, check_same_thread=False, factory=PooledConnection)
+        pool = ConnectionPool(connect, max_size=2, timeout=0.2)
+        yield pool
+        pool.close()
+    
+    def test_connection_is_reused(self, pool):
+        """Testa se close() devolve a conexão ao pool para reutilização"""
+        conn = pool.acquire()
+        conn.close()
+        assert pool.acquire() is conn
+        stats = pool.get_stats()
+        assert stats['created'] == 1
+        assert stats['checkouts'] == 2
+    
+    def test_with_block_releases_connection(self, pool):
+        """Testa se o bloco with faz commit e devolve a conexão"""
+        with pool.acquire() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+            assert pool.get_stats()['in_use'] == 1
+        assert pool.get_stats()['in_use'] == 0
+        with pool.acquire() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    
+    def test_pool_is_bounded(self, pool):
+        """Testa se o pool respeita o limite e expira a espera"""
+        first, second = pool.acquire(), pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(timeout=0.05)
+        assert pool.get_stats()['timeouts'] == 1
+        first.close()
+        second.close()
+    
+    def test_waiting_caller_gets_released_connection(self, pool):
+        """Testa se quem espera recebe a conexão devolvida por outra thread"""
+        held = [pool.acquire(), pool.acquire()]
+        timer = threading.Timer(0.05, held[0].close)
+        timer.start()
+        conn = pool.acquire(timeout=1)
+        assert conn is held[0]
+        assert pool.get_stats()['wait_time_max_ms'] > 0
+        conn.close()
+        held[1].close()
+    
+    def test_broken_connection_is_recycled(self, pool):
+        """Testa se conexões fechadas por fora são substituídas"""
+        conn = pool.acquire()
+        conn.close()
+        sqlite3.Connection.close(conn)
+        new_conn = pool.acquire()
+        assert new_conn is not conn
+        assert new_conn.execute("SELECT 1").fetchone()[0] == 1
+        assert pool.get_stats()['recycled'] == 1
+        new_conn.close()
+    
+    def test_lost_connection_frees_slot(self, pool):
+        """Testa se uma conexão descartada sem close() libera a vaga"""
+        pool.acquire()
+        pool.acquire()
+        gc.collect()
+        assert pool.get_stats()['size'] == 0
+        conn = pool.acquire(timeout=0.05)
+        conn.close()
+
+class TestConnectionProfile:
+    """Testes para o perfil de conexão (PRAGMAs)"""
+    
+    def test_profile_is_applied(self, tmp_path):
+        """Testa se os PRAGMAs do perfil são aplicados à conexão"""
+        conn = sqlite3.connect(str(tmp_path / "profile.db"))
+        apply_connection_profile(conn, {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -4000,
+            "temp_store": "MEMORY",
+            "busy_timeout_ms": 1234
+        })
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4000
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        conn.close()
+    
+    def test_invalid_profile_value(self, tmp_path):
+        """Testa se valores inválidos são rejeitados"""
+        conn = sqlite3.connect(str(tmp_path / "profile.db"))
+        with pytest.raises(ValueError):
+            apply_connection_profile(conn, {"journal_mode": "WAL; DROP TABLE x"})
+        conn.close()
+
+class TestReadOnlyConnection:
+    """Testes para o caminho de conexões somente leitura"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "ro.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+        yield db_path
+        db_connection.close_pools()
+    
+    def test_read_connection_reads(self, db_path):
+        """Testa leitura pela conexão somente leitura"""
+        with db_connection.get_read_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    
+    def test_read_connection_rejects_writes(self, db_path):
+        """Testa se a conexão somente leitura rejeita escritas"""
+        with pytest.raises(sqlite3.OperationalError):
+            with db_connection.get_read_connection() as conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+        with db_connection.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    
+    def test_read_pool_is_separate(self, db_path):
+        """Testa se leitura e escrita usam pools distintos"""
+        assert db_connection.get_pool(read_only=True) is not db_connection.get_pool()
+        with db_connection.get_read_connection():
+            assert db_connection.get_pool_stats(read_only=True)['in_use'] == 1
+            assert db_connection.get_pool_stats()['in_use'] == 0
+
+class TestDatabaseExecutor:
+    """Testes para o executor de chamadas bloqueantes"""
+    
+    @pytest.fixture
+    def executor(self):
+        executor = DatabaseExecutor("test", max_workers=1)
+        yield executor
+        executor.shutdown()
+    
+    def test_run_returns_result(self, executor):
+        """Testa se run() devolve o resultado da chamada"""
+        assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+        stats = executor.get_stats()
+        assert stats['completed'] == 1
+        assert stats['queue_depth'] == 0
+    
+    def test_run_propagates_errors(self, executor):
+        """Testa se exceções da chamada chegam ao código async"""
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(executor.run(lambda: 1 / 0))
+        assert executor.get_stats()['failed'] == 1
+    
+    def test_queue_depth_is_tracked(self, executor):
+        """Testa a profundidade da fila com o único worker ocupado"""
+        started = threading.Event()
+        release = threading.Event()
+        
+        def blocking():
+            started.set()
+            release.wait(5)
+        
+        first = executor.submit(blocking)
+        started.wait(5)
+        second = executor.submit(blocking)
+        assert executor.get_stats()['queue_depth'] == 1
+        release.set()
+        first.result(5)
+        second.result(5)
+        stats = executor.get_stats()
+        assert stats['queue_depth'] == 0
+        assert stats['max_queue_depth'] >= 1
+
+class TestKeysetPagination:
+    """Testes para a paginação por cursor"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "pages.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute('CREATE TABLE t (nome TEXT, "UF." TEXT)')
+            # Valores repetidos e NULL exercitam o desempate por rowid
+            conn.executemany('INSERT INTO t VALUES (?, ?)',
+                             [(None if i % 7 == 0 else f"n{i % 5}", "SP" if i % 2 else "RJ")
+                              for i in range(23)])
+        yield db_path
+        db_connection.close_pools()
+    
+    def _walk(self, **kwargs):
+        rows, cursor = [], None
+        while True:
+            page = db_connection.load_table_page("t", limit=4, cursor=cursor, **kwargs)
+            rows.extend(page['rows'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return rows
+    
+    @pytest.mark.parametrize("order_by,order_dir", [
+        (None, "asc"), ("nome", "asc"), ("nome", "desc"), ("UF.", "desc")
+    ])
+    def test_cursor_matches_offset_order(self, db_path, order_by, order_dir):
+        """Testa se percorrer por cursor equivale a uma única consulta ordenada"""
+        expected = db_connection.load_table_page("t", limit=100, order_by=order_by,
+                                                 order_dir=order_dir)['rows']
+        assert self._walk(order_by=order_by, order_dir=order_dir) == expected
+        assert len(expected) == 23
+    
+    def test_prev_cursor_returns_previous_page(self, db_path):
+        """Testa a navegação de volta com prev_cursor"""
+        first = db_connection.load_table_page("t", limit=4, order_by="nome")
+        assert first['prev_cursor'] is None
+        second = db_connection.load_table_page("t", limit=4, order_by="nome",
+                                               cursor=first['next_cursor'])
+        back = db_connection.load_table_page("t", limit=4, order_by="nome",
+                                             cursor=second['prev_cursor'])
+        assert back['rows'] == first['rows']
+        assert back['prev_cursor'] is None
+        assert back['next_cursor'] is not None
+    
+    def test_cursor_with_search(self, db_path):
+        """Testa se o cursor respeita o filtro de busca"""
+        rows = self._walk(search="n1", order_by="nome")
+        assert len(rows) == db_connection.load_table_page("t", search="n1")['total']
+        assert all(row['nome'] == "n1" for row in rows)
+    
+    def test_cursor_from_other_order_is_rejected(self, db_path):
+        """Testa se um cursor de outra ordenação é recusado"""
+        page = db_connection.load_table_page("t", limit=4, order_by="nome")
+        with pytest.raises(InvalidCursorError):
+            db_connection.load_table_page("t", limit=4, cursor=page['next_cursor'])
+        with pytest.raises(InvalidCursorError):
+            db_connection.load_table_page("t", limit=4, cursor="nao-e-um-cursor")
+
+class TestChunkedReader:
+    """Testes para a leitura em blocos"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "chunks.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER, nome TEXT)")
+            conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"n{i}") for i in range(10)])
+        yield db_path
+        db_connection.close_pools()
+    
+    def test_chunks_respect_batch_size(self, db_path):
+        """Testa o tamanho dos blocos e a devolução da conexão"""
+        chunks = list(db_connection.iter_table_chunks("t", batch_size=4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert list(chunks[0].columns) == ["id", "nome"]
+        assert db_connection.get_pool_stats(read_only=True)['in_use'] == 0
+    
+    def test_closed_generator_releases_connection(self, db_path):
+        """Testa se interromper a iteração devolve a conexão ao pool"""
+        rows = db_connection.iter_query_rows("SELECT * FROM t", batch_size=3)
+        next(rows)
+        assert db_connection.get_pool_stats(read_only=True)['in_use'] == 1
+        rows.close()
+        assert db_connection.get_pool_stats(read_only=True)['in_use'] == 0
+    
+    @pytest.mark.parametrize("file_format,extension", [("csv", "csv"), ("excel", "xlsx")])
+    def test_export_table(self, db_path, tmp_path, file_format, extension):
+        """Testa a exportação em blocos para CSV e Excel"""
+        filepath = str(tmp_path / f"t.{extension}")
+        assert db_connection.export_table("t", filepath, file_format, batch_size=3) == 10
+        df = pd.read_csv(filepath) if file_format == "csv" else pd.read_excel(filepath)
+        assert list(df.columns) == ["id", "nome"]
+        assert df["id"].tolist() == list(range(10))
+
+class TestSchemaCatalog:
+    """Testes para o catálogo de metadados do schema"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "schema.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT, uf TEXT)")
+            conn.execute("CREATE UNIQUE INDEX idx_t_nome_uf ON t (nome, uf)")
+        yield db_path
+        db_connection.close_pools()
+    
+    def test_metadata_is_loaded_once(self, db_path):
+        """Testa se consultas repetidas reutilizam o catálogo"""
+        for _ in range(3):
+            assert db_connection.get_primary_key_column("t") == "id"
+        db_connection.get_table_info("t")
+        stats = db_connection.get_schema_catalog().get_stats()
+        assert stats['loads'] == 1
+        assert stats['lookups'] == 4
+    
+    def test_metadata_contents(self, db_path):
+        """Testa colunas, tipos e índices do catálogo"""
+        schema = db_connection.get_table_schema("t")
+        assert schema['column_names'] == ["id", "nome", "uf"]
+        assert schema['text_columns'] == ["nome", "uf"]
+        assert schema['indexes'] == [{'name': "idx_t_nome_uf", 'unique': True, 'columns': ["nome", "uf"]}]
+        assert db_connection.get_table_schema("inexistente") is None
+    
+    def test_schema_change_invalidates(self, db_path):
+        """Testa a recarga do catálogo quando o schema_version muda"""
+        db_connection.get_table_schema("t")
+        with db_connection.get_connection() as conn:
+            conn.execute("ALTER TABLE t ADD COLUMN cidade TEXT")
+        assert "cidade" in db_connection.get_table_schema("t")['column_names']
+        assert db_connection.get_schema_catalog().get_stats()['loads'] == 2
+
+class TestCountCache:
+    """Testes para o cache de contagens de paginação"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "counts.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT)")
+            conn.executemany("INSERT INTO t (nome) VALUES (?)", [(f"n{i % 4}",) for i in range(40)])
+        yield db_path
+        db_connection.close_pools()
+    
+    def test_total_is_cached_and_invalidated(self, db_path):
+        """Testa o cache do total e a invalidação após escrita"""
+        assert db_connection.count_rows("t", "WHERE nome = ?", ["n1"]) == (10, True)
+        assert db_connection.count_rows("t", "WHERE nome = ?", ["n1"]) == (10, True)
+        assert db_connection.get_count_stats()['hits'] == 1
+        db_connection.insert_row("t", {"nome": "n1"})
+        assert db_connection.count_rows("t", "WHERE nome = ?", ["n1"]) == (11, True)
+    
+    def test_large_table_total_is_estimated(self, db_path, monkeypatch):
+        """Testa a estimativa via sqlite_stat1 acima do limite de contagem exata"""
+        monkeypatch.setitem(config.PERFORMANCE_CONFIG, "exact_count_max_rows", 10)
+        with db_connection.get_connection() as conn:
+            conn.execute("ANALYZE")
+        assert db_connection.count_rows("t") == (40, False)
+        total, exact = db_connection.count_rows("t", "WHERE nome = ?", ["n2"])
+        assert not exact
+        assert total == 10
+    
+    def test_entries_are_bounded_lru(self, db_path, monkeypatch):
+        """Testa o limite de entradas com descarte do total menos usado"""
+        monkeypatch.setitem(config.PERFORMANCE_CONFIG, "count_cache_max_entries", 2)
+        for nome in ("n0", "n1", "n0", "n2"):
+            db_connection.count_rows("t", "WHERE nome = ?", [nome])
+        stats = db_connection.get_count_stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
+        hits = stats['hits']
+        db_connection.count_rows("t", "WHERE nome = ?", ["n0"])
+        assert db_connection.get_count_stats()['hits'] == hits + 1
+    
+    def test_invalidation_during_count_discards_total(self, db_path, monkeypatch):
+        """Testa que um total calculado antes de uma escrita concorrente não fica em cache"""
+        cache = CountCache()
+        compute = cache._compute
+        
+        def compute_with_write(conn, *args):
+            result = compute(conn, *args)
+            cache.invalidate("t")
+            return result
+        
+        monkeypatch.setattr(cache, "_compute", compute_with_write)
+        with db_connection.get_read_connection() as conn:
+            assert cache.count(conn, "t") == (40, True)
+        stats = cache.get_stats()
+        assert stats['entries'] == 0
+        assert stats['discarded'] == 1
+    
+    def test_page_without_total(self, db_path):
+        """Testa o opt-out include_total=False"""
+        page = db_connection.load_table_page("t", limit=5, include_total=False)
+        assert page['total'] is None
+        assert page['total_exact'] is None
+        assert len(page['rows']) == 5
+
+class TestBulkWrite:
+    """Testes para as escritas em lote"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "bulk.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT NOT NULL, uf TEXT)")
+            conn.executemany("INSERT INTO t (nome) VALUES (?)", [("a",), ("b",), ("c",)])
+        yield db_path
+        db_connection.close_pools()
+    
+    def _rows(self):
+        with db_connection.get_read_connection() as conn:
+            return conn.execute("SELECT id, nome, uf FROM t ORDER BY id").fetchall()
+    
+    def test_bulk_insert_update_delete(self, db_path):
+        """Testa inserção, atualização e exclusão no mesmo lote"""
+        result = db_connection.bulk_write(
+            "t",
+            inserts=[{"nome": "d"}, {"nome": "e", "uf": "SP"}],
+            updates=[(1, {"uf": "RJ"}), ("2", {"uf": "MG"})],
+            deletes=[3]
+        )
+        assert (result['inserted'], result['updated'], result['deleted'], result['error']) == (2, 2, 1, 0)
+        assert self._rows() == [(1, "a", "RJ"), (2, "b", "MG"), (4, "d", None), (5, "e", "SP")]
+    
+    def test_per_row_outcomes(self, db_path):
+        """Testa se falhas e registros ausentes são apontados linha a linha"""
+        result = db_connection.bulk_write(
+            "t",
+            inserts=[{"nome": "d"}, {"nome": None}, {"nome": "f"}],
+            updates=[(99, {"uf": "SP"})],
+            deletes=[42]
+        )
+        statuses = [(r['operation'], r['index'], r['status']) for r in result['results']]
+        assert statuses == [
+            ("insert", 0, "inserted"), ("insert", 1, "error"), ("insert", 2, "inserted"),
+            ("update", 0, "not_found"), ("delete", 0, "not_found")
+        ]
+        assert "NOT NULL" in result['results'][1]['error']
+        assert [row[1] for row in self._rows()] == ["a", "b", "c", "d", "f"]
+    
+    def test_bulk_write_invalidates_counts(self, db_path):
+        """Testa a invalidação do total em cache após o lote"""
+        assert db_connection.count_rows("t") == (3, True)
+        db_connection.bulk_insert_rows("t", [{"nome": "x"}, {"nome": "y"}])
+        assert db_connection.count_rows("t") == (5, True)
+
+class TestQueryDeadline:
+    """Testes para prazo e cancelamento de consultas"""
+    
+    # Consulta que só termina se for interrompida
+    ENDLESS_QUERY = ("SELECT COUNT(*) FROM (WITH RECURSIVE c(x) AS "
+                     "(SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c)")
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "deadline.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        yield db_path
+        db_connection.close_pools()
+    
+    def _endless(self):
+        with db_connection.get_read_connection() as conn:
+            return conn.execute(self.ENDLESS_QUERY).fetchone()
+    
+    def test_deadline_interrupts_query(self, db_path):
+        """Testa a interrupção da consulta ao exceder o prazo"""
+        async def run():
+            with query_deadline(0.2):
+                return await run_read(self._endless)
+        with pytest.raises(QueryTimeoutError):
+            asyncio.run(run())
+        # A conexão interrompida volta ao pool utilizável
+        with db_connection.get_read_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    
+    def test_disconnect_cancels_query(self, db_path):
+        """Testa o cancelamento da consulta quando o cliente desconecta"""
+        async def disconnected():
+            await asyncio.sleep(0.1)
+        
+        async def run():
+            with disconnect_waiter(disconnected):
+                return await run_read(self._endless)
+        with pytest.raises(QueryCancelledError):
+            asyncio.run(run())
+    
+    def test_export_is_not_cut_by_query_deadline(self, db_path, tmp_path, monkeypatch):
+        """Testa que a exportação usa o próprio prazo, e não o das consultas"""
+        monkeypatch.setitem(config.PERFORMANCE_CONFIG, "query_timeout_seconds", 0.2)
+        monkeypatch.setitem(config.PERFORMANCE_CONFIG, "export_timeout_seconds", 30)
+        with db_connection.get_connection() as conn:
+            conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(50)])
+        filepath = str(tmp_path / "t.csv")
+        
+        def slow_export():
+            time.sleep(0.3)
+            with db_connection.get_read_connection() as conn:
+                conn.execute("SELECT COUNT(*) FROM (WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL "
+                             "SELECT x + 1 FROM c WHERE x < 100000) SELECT x FROM c)").fetchone()
+            return db_connection.export_table("t", filepath)
+        
+        with pytest.raises(QueryTimeoutError):
+            asyncio.run(run_read(slow_export))
+        assert asyncio.run(run_export(slow_export)) == 50
+    
+    def test_queries_without_deadline_are_unaffected(self, db_path):
+        """Testa que o progress handler não interfere fora de um prazo"""
+        with db_connection.get_read_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM (WITH RECURSIVE c(x) AS "
+                                "(SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000) "
+                                "SELECT x FROM c)").fetchone()[0] == 100000
+
+class TestSlowQueryLog:
+    """Testes para a instrumentação de consultas e o log de consultas lentas"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "slow.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT)")
+            conn.executemany("INSERT INTO t (nome) VALUES (?)", [(f"n{i}",) for i in range(50)])
+        get_query_log().clear()
+        yield db_path
+        get_query_log().clear()
+        db_connection.close_pools()
+    
+    def test_fingerprint_normalizes_literals(self):
+        """Testa a normalização de literais, espaços e listas de placeholders"""
+        assert fingerprint("SELECT *  FROM t\n WHERE a = 'x' AND b > 10") == \
+            "SELECT * FROM t WHERE a = ? AND b > ?"
+        assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)") == \
+            fingerprint("SELECT * FROM t WHERE id IN (?,?)")
+    
+    def test_statements_are_recorded(self, db_path):
+        """Testa o registro de linhas e formato dos parâmetros por fingerprint"""
+        with db_connection.get_read_connection() as conn:
+            rows = conn.execute("SELECT * FROM t WHERE id > ?", (10,)).fetchall()
+        assert len(rows) == 40
+        top = {q['fingerprint']: q for q in get_query_log().get_top_queries()}
+        stats = top["SELECT * FROM t WHERE id > ?"]
+        assert stats['count'] == 1
+        assert stats['rows'] == 40
+    
+    def test_slow_query_captures_plan(self, db_path, monkeypatch):
+        """Testa a captura do EXPLAIN QUERY PLAN acima do limite"""
+        monkeypatch.setitem(config.PERFORMANCE_CONFIG, "slow_query_threshold_ms", 0)
+        with db_connection.get_read_connection() as conn:
+            pd.read_sql_query("SELECT * FROM t WHERE nome = ?", conn, params=["n1"])
+        slow = get_query_log().get_slow_queries()
+        assert slow[0]['fingerprint'] == "SELECT * FROM t WHERE nome = ?"
+        assert slow[0]['params_shape'] == ['str']
+        assert slow[0]['rows'] == 1
+        assert any("SCAN t" in line for line in slow[0]['plan'])
+    
+    def test_fast_queries_are_not_logged_as_slow(self, db_path):
+        """Testa que consultas abaixo do limite não entram no log de lentas"""
+        with db_connection.get_read_connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM t").fetchone()
+        assert get_query_log().get_slow_queries() == []
+    
+    def test_fingerprints_are_bounded(self):
+        """Testa o descarte do fingerprint de menor tempo acumulado acima do limite"""
+        log = QueryLog(max_fingerprints=2)
+        log.record(None, "SELECT a FROM t", (), [], 1, 5.0)
+        log.record(None, "SELECT b FROM t", (), [], 1, 1.0)
+        log.record(None, "SELECT c FROM t", (), [], 1, 3.0)
+        assert [q['fingerprint'] for q in log.get_top_queries()] == ["SELECT a FROM t", "SELECT c FROM t"]
+
+class TestIndexRegistry:
+    """Testes para o registro declarativo de índices"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "indexes.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE lojas_lojas (PEOP TEXT, CODIGO TEXT, UF TEXT, STATUS TEXT, LOJAS TEXT)")
+            conn.executemany("INSERT INTO lojas_lojas VALUES (?, ?, 'SP', 'ATIVA', ?)",
+                             [(f"P{i}", f"C{i}", f"Loja {i}") for i in range(20)])
+        get_query_log().clear()
+        yield db_path
+        get_query_log().clear()
+        db_connection.close_pools()
+    
+    def test_ensure_indexes_is_idempotent(self, db_path):
+        """Testa a criação única dos índices e a omissão de tabelas ausentes"""
+        lojas = {spec["name"] for spec in INDEX_REGISTRY if spec["table"] == "lojas_lojas"}
+        first = db_connection.ensure_indexes()
+        assert set(first['created']) == lojas
+        assert all(spec["name"] in first['skipped'] for spec in INDEX_REGISTRY
+                   if spec["table"] == "inventario_planilha1")
+        second = db_connection.ensure_indexes()
+        assert second['created'] == []
+        assert set(second['existing']) == lojas
+    
+    def test_report_shows_index_usage(self, db_path):
+        """Testa o relatório de índices existentes e usados pelas consultas"""
+        db_connection.ensure_indexes()
+        with db_connection.get_read_connection() as conn:
+            conn.execute("SELECT LOJAS FROM lojas_lojas WHERE PEOP = ?", ("P1",)).fetchall()
+        report = {entry['name']: entry for entry in db_connection.get_index_report()}
+        assert report["idx_lojas_lojas_peop"]['exists'] is True
+        assert report["idx_lojas_lojas_peop"]['used'] is True
+        assert report["idx_lojas_lojas_uf"]['used'] is False
+        assert report["idx_inventario_planilha1_people"]['exists'] is False
+
+class TestMetrics:
+    """Testes para as métricas de SQL por requisição e por consulta nomeada"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "metrics.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, nome TEXT)")
+            conn.executemany("INSERT INTO t (nome) VALUES (?)", [(f"n{i}",) for i in range(10)])
+        get_registry().reset()
+        yield db_path
+        get_registry().reset()
+        db_connection.close_pools()
+    
+    def test_render_prometheus_text(self):
+        """Testa o formato texto do Prometheus (contadores e histogramas)"""
+        registry = MetricsRegistry()
+        registry.inc("consultavd_http_requests_total", route='/a"b')
+        for value in range(1, 101):
+            registry.observe("consultavd_http_request_duration_seconds", value / 100, route="/x")
+        registry.observe("consultavd_http_request_duration_seconds", 60.0, route="/x")
+        registry.observe("consultavd_http_request_statements", 7, route="/x")
+        text = registry.render()
+        assert "# TYPE consultavd_http_requests_total counter" in text
+        assert 'consultavd_http_requests_total{route="/a\\"b"} 1' in text
+        assert "# TYPE consultavd_http_request_duration_seconds histogram" in text
+        assert 'consultavd_http_request_duration_seconds_bucket{route="/x",le="0.1"} 10' in text
+        assert 'consultavd_http_request_duration_seconds_bucket{route="/x",le="1"} 100' in text
+        assert 'consultavd_http_request_duration_seconds_bucket{route="/x",le="+Inf"} 101' in text
+        assert 'consultavd_http_request_duration_seconds_count{route="/x"} 101' in text
+        assert 'consultavd_http_request_statements_bucket{route="/x",le="10"} 1' in text
+        histogram = registry.get_histogram("consultavd_http_request_duration_seconds", route="/x")
+        assert histogram['count'] == 101 and histogram['buckets'][0.5] == 50
+    
+    def test_named_query_counts_statements(self, db_path):
+        """Testa a contagem de statements e linhas por consulta nomeada"""
+        @track_query("listar_t")
+        def listar():
+            with db_connection.get_read_connection() as conn:
+                conn.execute("SELECT * FROM t").fetchall()
+                conn.execute("SELECT * FROM t WHERE id = 1").fetchall()
+        listar()
+        registry = get_registry()
+        assert registry.get_counter("consultavd_query_calls_total", query="listar_t") == 1
+        assert registry.get_counter("consultavd_query_statements_total", query="listar_t") == 2
+        assert registry.get_counter("consultavd_query_rows_total", query="listar_t") == 11
+    
+    def _fetch_nome(self, row_id):
+        with db_connection.get_read_connection() as conn:
+            return conn.execute("SELECT nome FROM t WHERE id = ?", (row_id,)).fetchall()
+    
+    def test_request_over_statement_limit_is_flagged(self, db_path, monkeypatch):
+        """Testa a sinalização de requisições com statements demais (N+1)"""
+        monkeypatch.setitem(config.MONITORING_CONFIG, "max_statements_per_request", 3)
+        async def request():
+            with track_request() as counter:
+                for i in range(5):
+                    await run_read(self._fetch_nome, i)
+            return counter
+        counter = asyncio.run(request())
+        assert counter.statements == 5
+        assert record_request("/api/x", 0.01, counter) is True
+        assert get_registry().get_counter("consultavd_http_requests_flagged_total", route="/api/x") == 1
+
+class TestAddressFullText:
+    """Testes para o índice FTS5 de endereços"""
+    
+    ROWS = [
+        ("P1", "Loja Paulista", "Avenida Paulista, 1000", "Bela Vista", "São Paulo", "SP", "01310100"),
+        ("P2", "Loja Centro", "Rua São João, 12", "Centro", "Sao Paulo", "SP", "01000000"),
+        ("P3", "Loja Campinas", "Rua Augusta, 5", "Cambuí", "Campinas", "SP", "13000000"),
+    ]
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "fts.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        self._create_lojas(replace=False)
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def _create_lojas(self, replace: bool):
+        columns = ["PEOP", "LOJAS", "ENDEREÇO", "BAIRRO", "CIDADE", "UF", "CEP"]
+        extra = ["STATUS", "CODIGO", "TELEFONE1", "TELEFONE2", "CELULAR", "E_MAIL",
+                 "2ª_a_6ª", "SAB", "DOM", "FUNC.", "VD_NOVO", "NOME_GGL", "NOME_GR"]
+        df = pd.DataFrame(self.ROWS, columns=columns)
+        for column in extra:
+            df[column] = ""
+        with db_connection.get_connection() as conn:
+            df.to_sql("lojas_lojas", conn, if_exists="replace" if replace else "fail", index=False)
+    
+    def test_prefix_and_accent_insensitive_match(self, db_path):
+        """Testa a busca por prefixo sem distinção de acentos"""
+        assert "lojas_lojas_fts" in db_connection.ensure_indexes()['created']
+        assert sorted(search_by_address("sao paul")["People/PEOP"]) == ["P1", "P2"]
+        assert list(search_by_address("av paulista")["People/PEOP"]) == ["P1"]
+        assert list(search_by_address("cambui")["People/PEOP"]) == ["P3"]
+    
+    def test_triggers_keep_index_in_sync(self, db_path):
+        """Testa a sincronização do índice após UPDATE, INSERT e DELETE"""
+        db_connection.ensure_indexes()
+        with db_connection.get_connection() as conn:
+            conn.execute("UPDATE lojas_lojas SET CIDADE = 'Santos' WHERE PEOP = 'P3'")
+            conn.execute("INSERT INTO lojas_lojas (PEOP, LOJAS, CIDADE) VALUES ('P4', 'Loja Nova', 'Santos')")
+            conn.execute("DELETE FROM lojas_lojas WHERE PEOP = 'P2'")
+        assert sorted(search_by_address("santos")["People/PEOP"]) == ["P3", "P4"]
+        assert search_by_address("campinas").empty
+        assert list(search_by_address("sao joao")["People/PEOP"]) == []
+    
+    def test_index_rebuilt_after_table_replace(self, db_path):
+        """Testa a reconstrução do índice quando a ingestão recria a tabela"""
+        db_connection.ensure_indexes()
+        self._create_lojas(replace=True)
+        assert "lojas_lojas_fts" in db_connection.ensure_indexes()['created']
+        assert "lojas_lojas_fts" in db_connection.ensure_indexes()['existing']
+        assert list(search_by_address("campinas")["People/PEOP"]) == ["P3"]
+
+class TestCircuitTrigram:
+    """Testes para o índice de trigramas de designações e IDs Vivo"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "trgm.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute('CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, Operadora TEXT, '
+                         '"Circuito_Designação" TEXT, "Novo_Circuito_Designação" TEXT, ID_VIVO TEXT, Novo_ID_Vivo TEXT)')
+            conn.executemany("INSERT INTO inventario_planilha1 VALUES (?, 'ATIVA', 'VIVO', ?, ?, ?, ?)", [
+                ("P1", "SPO-IP-00123", "", "V12345", ""),
+                ("P2", "RJO-MPLS-77812", "SPO-IP-99123", "V55555", "V12399"),
+                ("P3", "BHE-IP-55555", "", "X98765", ""),
+            ])
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+        db_connection.ensure_indexes()
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def test_substring_match_on_both_columns(self, db_path):
+        """Testa a busca por trecho nas designações atual e nova, sem distinção de maiúsculas"""
+        assert sorted(search_by_designation("ip-0")["People/PEOP"]) == ["P1"]
+        assert sorted(search_by_designation("spo-ip")["People/PEOP"]) == ["P1", "P2"]
+        assert sorted(search_by_id_vivo("123")["People/PEOP"]) == ["P1", "P2"]
+        # ID Vivo não entra na busca por designação
+        assert search_by_designation("V12345").empty
+    
+    def test_short_terms_fall_back_to_like(self, db_path):
+        """Testa trechos com menos de 3 caracteres (sem trigrama)"""
+        assert sorted(search_by_designation("BH")["People/PEOP"]) == ["P3"]
+    
+    def test_index_follows_updates(self, db_path):
+        """Testa a sincronização do índice após alterar a designação"""
+        with db_connection.get_connection() as conn:
+            conn.execute('UPDATE inventario_planilha1 SET "Circuito_Designação" = \'CWB-IP-31415\' '
+                         "WHERE People = 'P3'")
+        assert list(search_by_designation("31415")["People/PEOP"]) == ["P3"]
+        assert search_by_designation("BHE-IP").empty
+
+class TestNormalizedSearch:
+    """Testes para a normalização de texto e as tabelas normalizadas"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "norm.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute('CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, Operadora TEXT, '
+                         '"Circuito_Designação" TEXT, "Novo_Circuito_Designação" TEXT, ID_VIVO TEXT, Novo_ID_Vivo TEXT)')
+            conn.executemany("INSERT INTO inventario_planilha1 VALUES (?, 'ATIVA', ?, ?, '', ?, '')", [
+                ("P1", "Telefônica", "SPO-IP-00123", "V-123"),
+                ("P2", "CLARO", "RJO MPLS 778", "V-456"),
+            ])
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+            conn.execute("INSERT INTO lojas_lojas (PEOP, LOJAS, NOME_GGL, NOME_GR) "
+                         "VALUES ('P1', 'Loja 1', 'João Araújo', 'Márcia Souza')")
+        db_connection.ensure_indexes()
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def test_normalize_search_text(self):
+        """Testa a normalização de acentos, maiúsculas e pontuação"""
+        assert normalize_search_text("São  Paulo") == normalize_search_text("SAO PAULO") == "sao paulo"
+        assert normalize_search_text("SPO-IP 00123", compact=True) == "spoip00123"
+        assert normalize_search_text(12345.0, compact=True) == "12345"
+        assert normalize_search_text(None) == ""
+    
+    def test_designation_ignores_dashes_and_spaces(self, db_path):
+        """Testa a busca por designação digitada com ou sem traços e espaços"""
+        assert list(search_by_designation("spo ip 001")["People/PEOP"]) == ["P1"]
+        assert list(search_by_designation("RJO-MPLS")["People/PEOP"]) == ["P2"]
+        assert list(search_by_id_vivo("v123")["People/PEOP"]) == ["P1"]
+    
+    def test_name_prefix_is_accent_insensitive(self, db_path, monkeypatch):
+        """Testa a busca de GGL/GR e operadora sem acentos nem maiúsculas"""
+        monkeypatch.setitem(config.SEARCH_CONFIG, "fuzzy_search", False)
+        assert list(search_by_ggl_gr("joao ara")["People/PEOP"]) == ["P1"]
+        assert list(search_by_ggl_gr("MARCIA")["People/PEOP"]) == ["P1"]
+        assert list(search_by_ggl_gr("souza")["People/PEOP"]) == ["P1"]
+        assert list(search_by_ggl_gr("marcia sou")["People/PEOP"]) == ["P1"]
+        assert search_by_ggl_gr("arcia").empty
+        assert list(search_circuits_by_operator("telefonica")["People/PEOP"]) == ["P1"]
+    
+    def test_shadow_table_follows_writes(self, db_path):
+        """Testa a atualização da tabela normalizada nas escritas da aplicação"""
+        db_connection.update_row("lojas_lojas", "PEOP", "P1", {"NOME_GR": "Zé Ninguém"})
+        assert list(search_by_ggl_gr("ze nin")["People/PEOP"]) == ["P1"]
+        assert search_by_ggl_gr("marcia").empty
+    
+    def test_writes_from_plain_sqlite_clients(self, db_path):
+        """Testa que conexões sem as funções da aplicação escrevem e são normalizadas depois"""
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO lojas_lojas (PEOP, LOJAS, NOME_GGL) VALUES ('P2', 'Loja 2', 'Ana Conceição')")
+        conn.execute("UPDATE lojas_lojas SET NOME_GR = 'Paulo Souza' WHERE PEOP = 'P1'")
+        conn.commit()
+        conn.close()
+        # Pendentes: a busca não escreve e encontra as linhas com LIKE
+        assert list(search_by_ggl_gr("Ana Conc")["People/PEOP"]) == ["P2"]
+        assert list(search_by_ggl_gr("paulo")["People/PEOP"]) == ["P1"]
+        with db_connection.get_read_connection() as read_conn:
+            assert normalization_pending(read_conn, "lojas_lojas")
+        # A próxima escrita da aplicação normaliza a fila
+        db_connection.update_row("lojas_lojas", "PEOP", "P1", {"TELEFONE1": "1133334444"})
+        with db_connection.get_read_connection() as read_conn:
+            assert not normalization_pending(read_conn, "lojas_lojas")
+        assert list(search_by_ggl_gr("conceicao")["People/PEOP"]) == ["P2"]
+    
+    def test_derived_tables_are_hidden(self, db_path):
+        """Testa que as tabelas normalizadas e do FTS5 não aparecem na listagem"""
+        assert sorted(db_connection.get_tables()) == ["inventario_planilha1", "lojas_lojas"]
+
+class TestStoreTypeahead:
+    """Testes para o índice em memória de sugestões de lojas"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "typeahead.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE inventario_planilha1 (People TEXT, Operadora TEXT)")
+            conn.executemany("INSERT INTO inventario_planilha1 VALUES (?, 'VIVO')", [("P100",), ("P999",)])
+            conn.execute('CREATE TABLE lojas_lojas (CODIGO TEXT, PEOP TEXT, LOJAS TEXT, "ENDEREÇO" TEXT, '
+                         'CIDADE TEXT, UF TEXT, STATUS TEXT)')
+            conn.executemany("INSERT INTO lojas_lojas VALUES (?, ?, ?, '', '', 'SP', 'ATIVA')", [
+                ("L1", "P100", "Shopping Paulista"), ("L2", "P200", "São Paulo Centro"),
+            ])
+        db_connection.ensure_indexes()
+        reset_store_index()
+        yield db_path
+        reset_store_index()
+        db_connection.close_pools()
+    
+    def test_ranking(self):
+        """Testa a ordem: chave igual, prefixo, prefixo de palavra e trecho"""
+        entries = [{"name": name} for name in ("Mooca Paulista", "Paulista", "Paulistano", "Sampaulo")]
+        index = TypeaheadIndex(entries, lambda entry: [normalize_search_text(entry["name"])])
+        names = [entry["name"] for entry in index.search("PAULISTA")]
+        assert names == ["Paulista", "Paulistano", "Mooca Paulista"]
+        assert [entry["name"] for entry in index.search("aul", limit=2)] == ["Mooca Paulista", "Paulista"]
+        assert index.search("  ") == []
+    
+    def test_suggest_by_name_peop_and_code(self, db_path):
+        """Testa as sugestões por nome sem acentos, por PEOP e por código"""
+        assert [loja["codigo"] for loja in suggest_stores("sao pau")] == ["P200"]
+        assert [loja["codigo"] for loja in suggest_stores("paulista")] == ["P100"]
+        assert [loja["id"] for loja in suggest_stores("p2")] == ["L2"]
+        assert [loja["codigo"] for loja in suggest_stores("l1")] == ["P100"]
+    
+    def test_with_circuits_includes_unregistered_people(self, db_path):
+        """Testa que a busca guiada só sugere lojas com circuitos (inclusive sem cadastro)"""
+        assert sorted(loja["people"] for loja in suggest_stores("p", with_circuits=True)) == ["P100", "P999"]
+        assert suggest_stores("p999") == []
+    
+    def test_rebuilds_when_data_version_changes(self, db_path):
+        """Testa que o índice acompanha as escritas nas tabelas de origem"""
+        with db_connection.get_connection() as conn:
+            before = get_data_version(conn, ["lojas_lojas"])
+            conn.execute("INSERT INTO lojas_lojas VALUES ('L3', 'P300', 'Loja Nova', '', '', 'RJ', 'ATIVA')")
+            assert get_data_version(conn, ["lojas_lojas"]) != before
+        assert [loja["codigo"] for loja in suggest_stores("loja nova")] == ["P300"]
+
+class TestFuzzySearch:
+    """Testes para a busca aproximada usada quando a busca exata não encontra nada"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "fuzzy.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+            conn.executemany("INSERT INTO lojas_lojas (PEOP, CODIGO, LOJAS, CIDADE, NOME_GGL, NOME_GR) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", [
+                ("P1", "L1", "Shopping Ibirapuera", "São Paulo", "Marcelo Tavares", "Ana Ribeiro"),
+                ("P2", "L2", "Barra Shopping", "Rio de Janeiro", "Roberta Fontes", "Ana Ribeiro"),
+            ])
+        db_connection.ensure_indexes()
+        clear_cache()
+        reset_fuzzy_index()
+        reset_store_index()
+        yield db_path
+        clear_cache()
+        reset_fuzzy_index()
+        reset_store_index()
+        db_connection.close_pools()
+    
+    def test_edit_distance(self):
+        """Testa a distância com transposição e o corte"""
+        assert edit_distance("marcia", "marica", 2) == 1
+        assert edit_distance("kitten", "sitting", 3) == 3
+        assert edit_distance("kitten", "sitting", 1) == 2
+    
+    def test_ranked_near_matches(self):
+        """Testa a ordem por distância e o limite de erros por tamanho de palavra"""
+        index = FuzzyIndex([("CIDADE", "Santos"), ("CIDADE", "Santo André"), ("CIDADE", "Sorocaba"),
+                            ("CIDADE", "Rio de Janeiro")])
+        assert [m["value"] for m in index.search("santso")] == ["Santos", "Santo André"]
+        assert index.search("santos", columns=["LOJAS"]) == []
+        assert index.search("rio janeiro")[0]["value"] == "Rio de Janeiro"
+        assert index.search("sao") == []
+    
+    def test_search_functions_fall_back_to_fuzzy(self, db_path):
+        """Testa o fallback das buscas quando o texto tem erro de digitação"""
+        df = search_by_ggl_gr("marcleo tavraes")
+        assert list(df["People/PEOP"]) == ["P1"] and df.attrs["fuzzy"] is True
+        assert list(search_by_ggl_gr("marcelo")["People/PEOP"]) == ["P1"]
+        assert not search_by_ggl_gr("marcelo").attrs.get("fuzzy")
+        assert list(search_by_address("rio de janiero")["People/PEOP"]) == ["P2"]
+        assert [loja["codigo"] for loja in suggest_stores("shoping ibirapuea")] == ["P1"]
+    
+    def test_fuzzy_can_be_disabled(self, db_path, monkeypatch):
+        """Testa que SEARCH_CONFIG["fuzzy_search"] desliga o fallback"""
+        monkeypatch.setitem(config.SEARCH_CONFIG, "fuzzy_search", False)
+        assert search_by_ggl_gr("marcleo tavraes").empty
+        assert suggest_stores("shoping ibirapuea") == []
+
+class TestPeopleBatchSearch:
+    """Testes para a busca unificada de vários códigos People/PEOP"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "batch.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, Operadora TEXT)")
+            conn.executemany("INSERT INTO inventario_planilha1 VALUES (?, 'ATIVA', ?)",
+                             [("P1", "VIVO"), ("P1", "CLARO"), ("P2", "OI")])
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+            conn.executemany("INSERT INTO lojas_lojas (PEOP, STATUS, LOJAS) VALUES (?, 'ATIVA', ?)",
+                             [("P1", "Loja 1"), ("P3", "Loja 3")])
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def test_matches_single_search(self, db_path):
+        """Testa que cada código tem o mesmo resultado da busca individual"""
+        results, not_found = unified_search_people_many(["P1", "P2", "P3", "P9", " P1 ", ""])
+        assert list(results) == ["P1", "P2", "P3", "P9"]
+        assert not_found == ["P9"]
+        clear_cache()
+        records = lambda df: sorted(map(str, df.astype(object).where(df.notna(), None).to_dict("records")))
+        for code in ("P1", "P2", "P3", "P9"):
+            single = unified_search_people(code)
+            assert list(results[code].columns) == list(single.columns)
+            assert records(results[code]) == records(single)
+    
+    def test_uses_and_fills_cache(self, db_path):
+        """Testa que códigos em cache não vão ao banco e que os demais entram no cache"""
+        cached = unified_search_people("P2")
+        results, _ = unified_search_people_many(["P2", "P3"])
+        assert results["P2"] is cached
+        assert get_cached_data('unified_search_people', "P3") is results["P3"]
+
+class TestStoreCircuitReadModel:
+    """Testes para o modelo de leitura inventário x lojas mantido por triggers"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "read_model.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute('CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, Operadora TEXT, '
+                         '"Circuito_Designação" TEXT, "Novo_Circuito_Designação" TEXT, ID_VIVO TEXT, Novo_ID_Vivo TEXT)')
+            conn.executemany("INSERT INTO inventario_planilha1 VALUES (?, NULL, ?, ?, '', ?, '')", [
+                ("P1", "VIVO", "SPO-001", "V1"), ("P2", "CLARO", "RJO-002", "V2"),
+            ])
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+            conn.execute("INSERT INTO lojas_lojas (PEOP, STATUS, LOJAS, CODIGO) VALUES ('P1', 'ATIVA', 'Loja 1', 'L1')")
+        first = db_connection.ensure_indexes()
+        assert READ_MODEL_TABLE in first['created']
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def _rows(self):
+        with db_connection.get_read_connection() as conn:
+            return conn.execute(f'SELECT People, Status_Loja, LOJAS, "Circuito_Designação" FROM {READ_MODEL_TABLE} '
+                                'ORDER BY People, "Circuito_Designação"').fetchall()
+    
+    def test_built_and_hidden(self, db_path):
+        """Testa o conteúdo inicial, a reaplicação idempotente e a listagem de tabelas"""
+        assert self._rows() == [("P1", "ATIVA", "Loja 1", "SPO-001"), ("P2", None, None, "RJO-002")]
+        assert READ_MODEL_TABLE in db_connection.ensure_indexes()['existing']
+        assert READ_MODEL_TABLE not in db_connection.get_tables()
+    
+    def test_follows_inventory_and_store_writes(self, db_path):
+        """Testa a atualização incremental a partir de escritas nas duas tabelas"""
+        with db_connection.get_connection() as conn:
+            conn.execute("INSERT INTO inventario_planilha1 VALUES ('P1', NULL, 'OI', 'SPO-003', '', 'V3', '')")
+            conn.execute("UPDATE inventario_planilha1 SET Operadora = 'TIM' WHERE \"Circuito_Designação\" = 'SPO-001'")
+            conn.execute("INSERT INTO lojas_lojas (PEOP, STATUS, LOJAS) VALUES ('P2', 'INATIVA', 'Loja 2')")
+            conn.execute("UPDATE lojas_lojas SET LOJAS = 'Loja Um' WHERE PEOP = 'P1'")
+            conn.execute("DELETE FROM inventario_planilha1 WHERE \"Circuito_Designação\" = 'SPO-003'")
+        assert self._rows() == [("P1", "ATIVA", "Loja Um", "SPO-001"), ("P2", "INATIVA", "Loja 2", "RJO-002")]
+        with db_connection.get_connection() as conn:
+            conn.execute("DELETE FROM lojas_lojas WHERE PEOP = 'P2'")
+        assert self._rows()[1] == ("P2", None, None, "RJO-002")
+    
+    def test_searches_read_from_model(self, db_path):
+        """Testa as buscas sobre o modelo e o retorno à junção quando ele está desatualizado"""
+        df = search_by_designation("SPO-001")
+        assert list(df["LOJAS"]) == ["Loja 1"] and list(df["Operadora"]) == ["VIVO"]
+        assert list(unified_search_people("P2")["People/PEOP"]) == ["P2"]
+        with db_connection.get_connection() as conn:
+            conn.execute("DROP TRIGGER store_circuits_lojas_au")
+            assert not read_model_available(conn)
+            conn.execute("UPDATE lojas_lojas SET LOJAS = 'Loja Um' WHERE PEOP = 'P1'")
+        clear_cache()
+        assert list(search_by_id_vivo("V1")["LOJAS"]) == ["Loja Um"]
+
+class TestWriteInvalidation:
+    """Testes para a invalidação do cache de consultas pelas escritas"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "invalidation.db")
+        monkeypatch.setitem(config.DATABASE_CONFIG, "path", db_path)
+        with db_connection.get_connection() as conn:
+            conn.execute("CREATE TABLE inventario_planilha1 (People TEXT, Status_Loja TEXT, Operadora TEXT)")
+            conn.execute('CREATE TABLE lojas_lojas (PEOP TEXT, STATUS TEXT, LOJAS TEXT, CODIGO TEXT, "ENDEREÇO" TEXT, '
+                         'BAIRRO TEXT, CIDADE TEXT, UF TEXT, CEP TEXT, TELEFONE1 TEXT, TELEFONE2 TEXT, CELULAR TEXT, '
+                         'E_MAIL TEXT, "2ª_a_6ª" TEXT, SAB TEXT, DOM TEXT, "FUNC." TEXT, VD_NOVO TEXT, '
+                         'NOME_GGL TEXT, NOME_GR TEXT)')
+            conn.executemany("INSERT INTO lojas_lojas (PEOP, STATUS, LOJAS, NOME_GGL) VALUES (?, 'ATIVA', ?, 'ANA')",
+                             [("P1", "Loja 1"), ("P2", "Loja 2")])
+        clear_cache()
+        yield db_path
+        clear_cache()
+        db_connection.close_pools()
+    
+    def test_editor_reads_use_read_pool(self, db_path):
+        """Testa que as leituras do editor não ocupam o pool de escrita"""
+        from src.editor.operations import get_record_by_id
+        writes = db_connection.get_pool_stats()['checkouts']
+        assert get_record_by_id("lojas_lojas", "P2")["LOJAS"] == "Loja 2"
+        assert db_connection.get_pool_stats()['checkouts'] == writes
+        assert db_connection.get_pool_stats(read_only=True)['checkouts'] >= 1
+    
+    def test_keyed_write_keeps_other_codes(self, db_path, tmp_path, monkeypatch):
+        """Testa que a edição de um PEOP descarta só as consultas afetadas"""
+        from src.editor.operations import update_lojas_record
+        # O log de auditoria é gravado em logs/ no diretório atual
+        monkeypatch.chdir(tmp_path)
+        unified_search_people("P1")
+        other = unified_search_people("P2")
+        search_by_ggl_gr("ANA")
+        assert update_lojas_record("P1", "TELEFONE1", "1133334444")
+        assert list(unified_search_people("P1")["TELEFONE1"]) == ["1133334444"]
+        assert unified_search_people("P2") is other
+        assert get_cached_data('search_by_ggl_gr', "ANA") is None
+    
+    def test_generic_writes_invalidate_table(self, db_path):
+        """Testa que update_row e bulk_write descartam as consultas da tabela"""
+        assert list(unified_search_people("P2")["LOJAS"]) == ["Loja 2"]
+        db_connection.update_row("lojas_lojas", "PEOP", "P2", {"LOJAS": "Loja Dois"})
+        assert list(unified_search_people("P2")["LOJAS"]) == ["Loja Dois"]
+        db_connection.bulk_write("lojas_lojas", inserts=[{"PEOP": "P3", "LOJAS": "Loja 3", "NOME_GGL": "ANA"}])
+        assert len(unified_search_people("P3")) == 1
+        assert len(search_by_ggl_gr("ANA")) == 3
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file